@@ -0,0 +1,668 @@
+import sys
+import logging
+import operator
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, chain, compress, islice, repeat
+from collections.abc import Mapping
+
+
+class NodeView:
+    """
+    A light-weight stand-in for a Node object over a CompactNodes storage
+    it is created on access and only holds the storage and the node index
+    so nothing is kept per node in memory
+    """
+
+    __slots__ = ['_store', '_idx']
+
+    def __init__(self, store, idx):
+        self._store = store
+        self._idx = idx
+
+    def __repr__(self):
+        return "NodeView({})".format(self.id)
+
+    @property
+    def id(self):
+        return self._store.ids[self._idx]
+
+    @property
+    def seq(self):
+        return self._store.sequence(self._idx)
+
+    @property
+    def seq_len(self):
+        return self._store.seq_lens[self._idx]
+
+    @property
+    def seq_pos(self):
+        # the compact storage returns the real sequence even in low memory mode
+        return -1
+
+    @property
+    def optional(self):
+        return self._store.optionals[self._idx]
+
+    @property
+    def start(self):
+        return self._store.side_edges(2 * self._idx)
+
+    @property
+    def end(self):
+        return self._store.side_edges(2 * self._idx + 1)
+
+    @property
+    def visited(self):
+        return self._store.visited[self._idx] == 1
+
+    @visited.setter
+    def visited(self, value):
+        self._store.visited[self._idx] = 1 if value else 0
+
+    @property
+    def chromosome(self):
+        return self._store.chromosomes.get(self._idx, None)
+
+    @chromosome.setter
+    def chromosome(self, value):
+        self._store.chromosomes[self._idx] = value
+
+    def neighbors(self):
+        """
+        Returns all adjacent nodes to self
+        """
+        ids = self._store.ids
+        neighbors = [ids[x] for x in self._store.neighbor_indices(self._idx)]
+        return sorted(neighbors)
+
+    @property
+    def counts(self):
+        # the edge counts when the graph was loaded with them, keyed like Node.counts
+        ec = self._store.edge_tags.get("ec")
+        if ec is None:
+            return None
+        ids, adj, ptr = self._store.ids, self._store.adj, self._store.ptr
+        counts = dict()
+        for direction in (0, 1):
+            side = 2 * self._idx + direction
+            for k in range(ptr[side], ptr[side + 1]):
+                if adj[k] >= 0:
+                    counts[(direction, ids[adj[k] >> 1], adj[k] & 1)] = ec[k]
+        return counts
+
+    def _side(self, direction):
+        if direction not in (0, 1):
+            raise Exception("Trying to access a wrong direction in node {}".format(self.id))
+        return 2 * self._idx + direction
+
+    def in_direction(self, node, direction):
+        """
+        returns true if node is a neighbor in that direction
+        """
+        n_idx = self._store.index_of(node)
+        if n_idx == -1:
+            return False
+        return self._store.has_edge(self._side(direction), n_idx)
+
+    def degree(self, direction=None):
+        """
+        returns the number of edges in that direction, or on both sides if direction is None
+        """
+        if direction is None:
+            return self._store.side_degree(2 * self._idx) + self._store.side_degree(2 * self._idx + 1)
+        return self._store.side_degree(self._side(direction))
+
+    def children(self, direction):
+        """
+        returns the children of a node in given direction
+        """
+        return [x[0] for x in self._store.side_edges(self._side(direction))]
+
+    def remove_from_start(self, neighbor, side, overlap=None):
+        """
+        remove the neighbor edge from the start going to side in neighbor
+        if overlap is given the edge is only removed if it has that overlap
+        """
+        if not self._store.remove_entry(2 * self._idx, neighbor, side, overlap):
+            logging.warning(f"Could not remove edge {(neighbor, side, overlap)} from {self.id}'s start as it does not exist")
+
+    def remove_from_end(self, neighbor, side, overlap=None):
+        """
+        remove the neighbor edge from the end going to side in neighbor
+        if overlap is given the edge is only removed if it has that overlap
+        """
+        if not self._store.remove_entry(2 * self._idx + 1, neighbor, side, overlap):
+            logging.warning(f"Could not remove edge {(neighbor, side, overlap)} from {self.id}'s end as it does not exist")
+
+
+class CompactNodes(Mapping):
+    """
+    Array-backed replacement for the dict of Node objects in Graph.nodes
+
+    Node ids are interned to integers 0..n-1, every node has two sides
+    (side 0 is the start and side 1 the end) and a side is addressed as 2 * idx + side.
+    The adjacency is in CSR form over sides: the edges leaving side s are
+    adj[ptr[s]:ptr[s + 1]], each entry packs the neighbor side as 2 * neighbor + neighbor_side
+    and the overlap of that edge is in overlaps at the same position.
+    Removed edges are tombstoned with -1 and remove_nodes and remove_edges then rebuild the arrays
+    once with compact(), so a batch of removals reallocates them once and not per edge.
+    Numeric L line tags, like the ec:i edge counts, are kept in edge_tags as arrays aligned with adj.
+
+    Indexing with a node id returns a NodeView, so code written against
+    Node objects (bfs, all_components, write_gfa) keeps working.
+    """
+
+    def __init__(self, ids, index, seq_lens, ptr, adj, overlaps,
+                 optionals=None, seq_data=None, seq_pos=None, edge_tags=None):
+        self.ids = ids
+        self.index = index
+        self.seq_lens = seq_lens
+        self.ptr = ptr
+        self.adj = adj
+        self.overlaps = overlaps
+        if optionals is None:
+            optionals = [""] * len(ids)
+        self.optionals = optionals
+        # seq_data is a bytes-like object the sequences are sliced from at seq_pos,
+        # it can be an in-memory blob or a memory map of the GFA file itself.
+        # If it is None the sequences are returned as "*"
+        self.seq_data = seq_data
+        self.seq_pos = seq_pos
+        # numeric L line tags (e.g. ec for edge counts), tag name to an array aligned with adj
+        if edge_tags is None:
+            edge_tags = dict()
+        self.edge_tags = edge_tags
+        self.alive = bytearray(b"\x01") * len(ids)
+        self.visited = bytearray(len(ids))
+        self.chromosomes = dict()
+        self.n_alive = len(ids)
+
+    def __len__(self):
+        return self.n_alive
+
+    def __iter__(self):
+        alive = self.alive
+        for idx, n_id in enumerate(self.ids):
+            if alive[idx]:
+                yield n_id
+
+    def __contains__(self, key):
+        return self.index_of(key) != -1
+
+    def __getitem__(self, key):
+        idx = self.index_of(key)
+        if idx == -1:
+            raise KeyError(key)
+        return NodeView(self, idx)
+
+    def __setitem__(self, key, value):
+        raise TypeError("Nodes cannot be added to a compact graph, "
+                        "load the graph without compact to edit it")
+
+    def __delitem__(self, key):
+        self.remove_node(key)
+
+    def __sizeof__(self):
+        size = sys.getsizeof(self.ids) + sys.getsizeof(self.index)
+        for n_id in self.ids:
+            size += sys.getsizeof(n_id)
+        size += sys.getsizeof(self.optionals)
+        for opt in self.optionals:
+            if opt:
+                size += sys.getsizeof(opt)
+        for arr in (self.seq_lens, self.ptr, self.adj, self.overlaps,
+                    self.seq_data, self.seq_pos, self.alive, self.visited):
+            if arr is not None:
+                size += sys.getsizeof(arr)
+        return size
+
+    def index_of(self, n_id):
+        """
+        returns the integer index of a node id or -1 if the node is not in the graph
+        """
+        idx = self.index.get(n_id, -1)
+        if idx != -1 and not self.alive[idx]:
+            return -1
+        return idx
+
+    def sequence(self, idx):
+        if self.seq_data is None:
+            return "*"
+        pos = self.seq_pos[idx]
+        return self.seq_data[pos:pos + self.seq_lens[idx]].decode()
+
+    def side_edges(self, side):
+        """
+        returns the edges of a side as a dict of (neighbor id, neighbor side) -> overlap like Node.start
+        """
+        ids = self.ids
+        adj = self.adj
+        overlaps = self.overlaps
+        edges = dict()
+        for k in range(self.ptr[side], self.ptr[side + 1]):
+            target = adj[k]
+            if target >= 0:
+                edges[(ids[target >> 1], target & 1)] = overlaps[k]
+        return edges
+
+    def has_edge(self, side, n_idx):
+        """
+        returns True if side has an edge to either side of node n_idx
+        """
+        adj = self.adj
+        for k in range(self.ptr[side], self.ptr[side + 1]):
+            if adj[k] >= 0 and adj[k] >> 1 == n_idx:
+                return True
+        return False
+
+    def side_degree(self, side):
+        adj = self.adj
+        return sum(1 for k in range(self.ptr[side], self.ptr[side + 1]) if adj[k] >= 0)
+
+    def neighbor_indices(self, idx):
+        """
+        generator over the neighbor indices of node idx from both sides
+        """
+        adj = self.adj
+        for k in range(self.ptr[2 * idx], self.ptr[2 * idx + 2]):
+            target = adj[k]
+            if target >= 0:
+                yield target >> 1
+
+    def edges_at_most(self, tag, cutoff):
+        """
+        returns the edges with a value of tag equal or less than cutoff as
+        (node1, side1, node2, side2, overlap) tuples, each edge once
+
+        :param tag: name of an L line tag loaded in edge_tags, e.g. ec
+        :param cutoff: the highest value kept
+        """
+        values = self.edge_tags[tag]
+        ids, ptr, adj, overlaps = self.ids, self.ptr, self.adj, self.overlaps
+        edges = []
+        # the comparison over the whole array runs in C, only the hits come back to python
+        for k in compress(range(len(values)), map(operator.le, values, repeat(cutoff))):
+            target = adj[k]
+            if target < 0:
+                continue
+            # the side that owns position k
+            side = bisect_right(ptr, k) - 1
+            # every edge is in the rows of both its sides, taking it from the smaller one
+            if side <= target:
+                edges.append((ids[side >> 1], side & 1, ids[target >> 1], target & 1, overlaps[k]))
+        return edges
+
+    def remove_entry(self, side, neighbor, neighbor_side, overlap):
+        """
+        tombstones one entry in the adjacency of side, returns False if the entry was not there
+        with overlap None the entry is removed whatever its overlap is
+        """
+        n_idx = self.index_of(neighbor)
+        if n_idx == -1:
+            return False
+        target = 2 * n_idx + neighbor_side
+        for k in range(self.ptr[side], self.ptr[side + 1]):
+            if self.adj[k] == target and (overlap is None or self.overlaps[k] == overlap):
+                self.adj[k] = -1
+                return True
+        return False
+
+    def remove_node(self, n_id):
+        """
+        remove a node and tombstone its edges on both sides and in its neighbors
+        """
+        idx = self.index_of(n_id)
+        if idx == -1:
+            raise KeyError(n_id)
+        adj = self.adj
+        ptr = self.ptr
+        for side in (2 * idx, 2 * idx + 1):
+            for k in range(ptr[side], ptr[side + 1]):
+                target = adj[k]
+                if target < 0:
+                    continue
+                # removing the mirrored entry in the neighbor's side
+                for j in range(ptr[target], ptr[target + 1]):
+                    if adj[j] == side and self.overlaps[j] == self.overlaps[k]:
+                        adj[j] = -1
+                        break
+                adj[k] = -1
+        self.alive[idx] = 0
+        self.n_alive -= 1
+
+    def has_entry(self, side, target, overlap):
+        """
+        returns True if side has an edge to the packed neighbor side target with that overlap
+        """
+        adj = self.adj
+        overlaps = self.overlaps
+        for k in range(self.ptr[side], self.ptr[side + 1]):
+            if adj[k] == target and overlaps[k] == overlap:
+                return True
+        return False
+
+    def remove_nodes(self, n_ids):
+        """
+        removes many nodes at once, the nodes are marked as removed first, then their rows
+        and the entries pointing to them in their neighbors' rows are tombstoned without searching
+        for each mirrored entry and the adjacency is compacted once with compact()
+
+        :return: the number of nodes removed, ids not in the graph are skipped
+        """
+        alive = self.alive
+        removed = []
+        for n_id in n_ids:
+            idx = self.index_of(n_id)
+            if idx != -1 and alive[idx]:
+                alive[idx] = 0
+                removed.append(idx)
+        if not removed:
+            return 0
+        self.n_alive -= len(removed)
+
+        adj = self.adj
+        ptr = self.ptr
+        # sides of the remaining nodes that had an edge to a removed node
+        neighbor_sides = set()
+        for idx in removed:
+            for k in range(ptr[2 * idx], ptr[2 * idx + 2]):
+                target = adj[k]
+                if target >= 0:
+                    if alive[target >> 1]:
+                        neighbor_sides.add(target)
+                    adj[k] = -1
+        for side in neighbor_sides:
+            for k in range(ptr[side], ptr[side + 1]):
+                target = adj[k]
+                if target >= 0 and not alive[target >> 1]:
+                    adj[k] = -1
+        self.compact()
+        return len(removed)
+
+    def remove_edges(self, edges):
+        """
+        removes many edges at once, only the rows of the sides they touch are searched
+        and the adjacency is compacted once at the end
+
+        :param edges: edges as (node1, side1, node2, side2, overlap)
+        :return: the number of edges removed
+        """
+        # the side each edge is stored in, to the (neighbor side, overlap) entries to drop
+        to_drop = dict()
+        for n1, side1, n2, side2, overlap in edges:
+            idx1 = self.index_of(n1)
+            idx2 = self.index_of(n2)
+            if idx1 == -1 or idx2 == -1:
+                continue
+            a, b = 2 * idx1 + side1, 2 * idx2 + side2
+            to_drop.setdefault(a, set()).add((b, overlap))
+            to_drop.setdefault(b, set()).add((a, overlap))
+
+        adj = self.adj
+        overlaps = self.overlaps
+        ptr = self.ptr
+        removed = 0
+        for side, entries in to_drop.items():
+            for k in range(ptr[side], ptr[side + 1]):
+                target = adj[k]
+                if target >= 0 and (target, overlaps[k]) in entries:
+                    adj[k] = -1
+                    # every edge is in the rows of both its sides, counting it from the smaller one
+                    if side <= target:
+                        removed += 1
+        self.compact()
+        return removed
+
+    def compact(self):
+        """
+        rebuilds ptr, adj, overlaps and the edge tags without the removed entries
+        """
+        adj = self.adj
+        keep = bytes(map(operator.le, repeat(0), adj))
+        if keep.count(0) == 0:
+            return
+        # the new start of each row is the number of kept entries before its old start
+        kept_before = array('q', accumulate(keep, initial=0))
+        self.ptr = array('q', map(kept_before.__getitem__, self.ptr))
+        self.adj = array('q', compress(adj, keep))
+        self.overlaps = array('i', compress(self.overlaps, keep))
+        for tag, values in self.edge_tags.items():
+            self.edge_tags[tag] = array(values.typecode, compress(values, keep))
+
+    def degrees(self):
+        """
+        returns an array with the number of edges of every node index, removed nodes have 0
+        """
+        ptr = self.ptr
+        removed = bytes(map(operator.gt, repeat(0), self.adj))
+        return array('q', (ptr[2 * idx + 2] - ptr[2 * idx] - removed.count(1, ptr[2 * idx], ptr[2 * idx + 2])
+                           for idx in range(len(self.ids))))
+
+
+class CompactBuilder:
+    """
+    Collects segments and links while parsing and builds a CompactNodes in finish()
+
+    Links can reference segments that were not seen yet, the ids are interned
+    on first sight and renumbered in the order of the S lines at the end,
+    links to ids that never get an S line are dropped the same way read_gfa ignores them
+    """
+
+    def __init__(self, low_mem=False, edge_tags=()):
+        """
+        :param low_mem: if True only the file offsets of the sequences are kept
+        :param edge_tags: (tag name, array typecode) pairs of the numeric L line tags to keep
+        """
+        self.low_mem = low_mem
+        self.edge_tag_specs = list(edge_tags)
+        self.ids = []
+        self.index = dict()
+        self.has_segment = bytearray()
+        # node indices in the order of their S lines
+        self.segment_order = array('q')
+        self.seq_lens = array('Q')
+        self.seq_pos = array('Q')
+        self.seq_data = None if low_mem else bytearray()
+        self.optionals = []
+        # each link is stored once as packed sides, it is mirrored in finish()
+        self.link_a = array('q')
+        self.link_b = array('q')
+        self.link_overlap = array('i')
+        self.link_tags = [array(code) for _, code in self.edge_tag_specs]
+
+    def intern(self, n_id):
+        idx = self.index.get(n_id, -1)
+        if idx == -1:
+            idx = len(self.ids)
+            self.index[n_id] = idx
+            self.ids.append(n_id)
+            self.has_segment.append(0)
+            self.seq_lens.append(0)
+            self.seq_pos.append(0)
+            self.optionals.append("")
+        return idx
+
+    def add_segment(self, n_id, seq, optional="", file_pos=0, seq_len=None):
+        """
+        adds a segment, seq is given as bytes and file_pos is where seq starts in the GFA file
+        in low memory mode only file_pos is kept, otherwise the sequence itself.
+        seq_len is only needed when seq is not given
+        """
+        idx = self.intern(n_id)
+        if not self.has_segment[idx]:
+            self.segment_order.append(idx)
+        self.has_segment[idx] = 1
+        self.seq_lens[idx] = len(seq) if seq_len is None else seq_len
+        if self.seq_data is not None:
+            self.seq_pos[idx] = len(self.seq_data)
+            self.seq_data += seq
+        else:
+            self.seq_pos[idx] = file_pos
+        self.optionals[idx] = optional
+        return idx
+
+    def add_segments(self, ids, seq_lens, file_pos, optionals, seqs=b""):
+        """
+        adds the segments of many S lines at once, seqs has their sequences one after the other
+        and is not used in low memory mode. When none of the ids was seen before the arrays
+        are extended as a whole, otherwise the segments are added one by one with add_segment
+        """
+        first = len(self.ids)
+        new = dict(zip(ids, range(first, first + len(ids))))
+        if len(new) < len(ids) or not self.index.keys().isdisjoint(new):
+            pos = 0
+            for n_id, seq_len, seq_pos, optional in zip(ids, seq_lens, file_pos, optionals):
+                self.add_segment(n_id, seqs[pos:pos + seq_len], optional, seq_pos, seq_len)
+                pos += seq_len
+            return
+        self.index.update(new)
+        self.ids.extend(ids)
+        self.has_segment.extend(b"\x01" * len(ids))
+        self.segment_order.extend(range(first, first + len(ids)))
+        self.seq_lens.extend(seq_lens)
+        if self.seq_data is not None:
+            # where each sequence starts once seqs is added after the ones before
+            self.seq_pos.extend(islice(accumulate(seq_lens, initial=len(self.seq_data)), len(ids)))
+            self.seq_data += seqs
+        else:
+            self.seq_pos.extend(file_pos)
+        self.optionals.extend(optionals)
+
+    def add_link(self, n1, side1, n2, side2, overlap, tags=()):
+        """
+        adds a link, tags are the values of the edge tags in the order given to the builder
+        """
+        self.link_a.append(2 * self.intern(n1) + side1)
+        self.link_b.append(2 * self.intern(n2) + side2)
+        self.link_overlap.append(overlap)
+        for values, value in zip(self.link_tags, tags):
+            values.append(value)
+
+    def add_links(self, ids, sides1, sides2, overlaps, tags=()):
+        """
+        adds the links of many L lines at once, their sides are packed as 2 * position in ids + side,
+        so each id is interned once and not once per link
+
+        :param tags: an array per edge tag with the values of the links
+        """
+        nodes = array('q', map(self.index.get, ids, repeat(-1)))
+        if -1 in nodes:
+            # ids that had no S line yet
+            for i, n_id in enumerate(ids):
+                if nodes[i] == -1:
+                    nodes[i] = self.intern(n_id)
+        # the side 2 * i + side of the links is the side 2 * nodes[i] + side here
+        starts = array('q', map(operator.add, nodes, nodes))
+        remap = array('q', chain.from_iterable(zip(starts, map(operator.add, starts, repeat(1)))))
+        self.link_a.extend(map(remap.__getitem__, sides1))
+        self.link_b.extend(map(remap.__getitem__, sides2))
+        self.link_overlap.extend(overlaps)
+        for values, new_values in zip(self.link_tags, tags):
+            values.extend(new_values)
+
+    def _order_by_segments(self):
+        """
+        renumbers the nodes in the order of their S lines, the same order as the dict of Nodes,
+        and removes the ids that only appeared in L lines together with the links using them
+        """
+        if len(self.segment_order) == len(self.ids) and \
+                all(idx == pos for pos, idx in enumerate(self.segment_order)):
+            return
+        remap = array('q', [-1]) * len(self.ids)
+        for pos, idx in enumerate(self.segment_order):
+            remap[idx] = pos
+        for idx, n_id in enumerate(self.ids):
+            if not self.has_segment[idx]:
+                logging.warning("Node {} is in links but has no segment, its edges are skipped".format(n_id))
+        keep = self.segment_order
+        self.seq_lens = array('Q', (self.seq_lens[i] for i in keep))
+        self.seq_pos = array('Q', (self.seq_pos[i] for i in keep))
+        self.optionals = [self.optionals[i] for i in keep]
+        self.ids = [self.ids[i] for i in keep]
+        self.index = {n_id: idx for idx, n_id in enumerate(self.ids)}
+
+        link_a, link_b, link_overlap = array('q'), array('q'), array('i')
+        link_tags = [array(values.typecode) for values in self.link_tags]
+        for k, (a, b, ov) in enumerate(zip(self.link_a, self.link_b, self.link_overlap)):
+            new_a = remap[a >> 1]
+            new_b = remap[b >> 1]
+            if new_a == -1 or new_b == -1:
+                continue
+            link_a.append(2 * new_a + (a & 1))
+            link_b.append(2 * new_b + (b & 1))
+            link_overlap.append(ov)
+            for new_values, values in zip(link_tags, self.link_tags):
+                new_values.append(values[k])
+        self.link_a, self.link_b, self.link_overlap = link_a, link_b, link_overlap
+        self.link_tags = link_tags
+
+    def finish(self):
+        self._order_by_segments()
+        n_sides = 2 * len(self.ids)
+        # the tags are placed through the link each entry of adj came from
+        keep_origin = len(self.link_tags) > 0
+
+        # counting the degree of each side then prefix sum to get the row pointers
+        degrees = array('q', [0]) * n_sides
+        for a, b in zip(self.link_a, self.link_b):
+            degrees[a] += 1
+            if a != b:
+                degrees[b] += 1
+        ptr = array('q', accumulate(degrees, initial=0))
+
+        cursor = array('q', ptr)
+        adj = array('q', [-1]) * ptr[n_sides]
+        overlaps = array('i', [0]) * ptr[n_sides]
+        origin = array('q', [0]) * ptr[n_sides] if keep_origin else None
+        for k, (a, b, ov) in enumerate(zip(self.link_a, self.link_b, self.link_overlap)):
+            pos = cursor[a]
+            adj[pos] = b
+            overlaps[pos] = ov
+            cursor[a] = pos + 1
+            if keep_origin:
+                origin[pos] = k
+            if a != b:
+                pos = cursor[b]
+                adj[pos] = a
+                overlaps[pos] = ov
+                cursor[b] = pos + 1
+                if keep_origin:
+                    origin[pos] = k
+        del cursor
+        self.link_a = self.link_b = self.link_overlap = None
+
+        # removing duplicated links like the dicts of Node do, they are keyed by the two sides only,
+        # so a link repeated with another overlap replaces the first one and the overlap
+        # and tags of the last copy are kept. Only the rows with more than one entry can have them,
+        # the rows are sorted by target in place and the extra copies are tombstoned for compact()
+        duplicates = False
+        for s in compress(range(n_sides), map(operator.lt, repeat(1), degrees)):
+            lo, hi = ptr[s], ptr[s + 1]
+            if hi - lo == 2 and adj[lo] < adj[lo + 1]:
+                continue
+            row = dict()
+            for k in range(lo, hi):
+                row[adj[k]] = k
+            order = [row[target] for target in sorted(row)]
+            if order == list(range(lo, hi)):
+                continue
+            padding = [-1] * (hi - lo - len(order))
+            duplicates = duplicates or len(padding) > 0
+            overlaps[lo:hi] = array('i', [overlaps[k] for k in order] + [0] * len(padding))
+            if keep_origin:
+                origin[lo:hi] = array('q', [origin[k] for k in order] + [0] * len(padding))
+            adj[lo:hi] = array('q', [adj[k] for k in order] + padding)
+        del degrees
+
+        edge_tags = dict()
+        for (name, code), values in zip(self.edge_tag_specs, self.link_tags):
+            edge_tags[name] = array(code, map(values.__getitem__, origin))
+        del origin
+        self.link_tags = None
+
+        nodes = CompactNodes(self.ids, self.index, self.seq_lens, ptr, adj, overlaps, optionals=self.optionals,
+                             seq_data=self.seq_data, seq_pos=self.seq_pos, edge_tags=edge_tags)
+        if duplicates:
+            nodes.compact()
+        return nodes
@@ -1,33 +1,65 @@
-from GFASubgraph.graph_io import read_gfa, write_gfa
-from GFASubgraph.connected_components import all_components
+from GFASubgraph.graph_io import read_gfa, read_gfa_compact, write_gfa
+from GFASubgraph.connected_components import all_components, component_labels
 from GFASubgraph.bfs import bfs
 from GFASubgraph.Node import Node
+from GFASubgraph.CompactNodes import CompactNodes
+from GFASubgraph.SubgraphNodes import SubgraphNodes
+from GFASubgraph.graph_index import load_index
+from GFASubgraph.NeighborhoodCache import NeighborhoodCache
 import sys
 import logging
+from array import array
 import os
-import pdb
 
 
 class Graph:
     """
     Graph object containing the important information about the graph
+
+    with compact=True the nodes are kept in an array-backed CompactNodes
+    instead of a dict of Node objects, which needs a fraction of the memory.
+    With compact=True and an up to date index made with the index subcommand the graph
+    is memory mapped from the index instead of parsed, unless use_index=False. The index is
+    compact and reads the sequences from the GFA file, so it is not used for the dict backend.
+    With threads > 1 the GFA is parsed in that many processes.
+    With edge_count=True the ec:i counts of the links are read in the same pass,
+    kept next to the edges for a compact graph or in edge_counts otherwise.
+    With cache_bytes > 0 the neighborhoods returned by bfs are kept in an
+    LRU cache of about that many bytes and repeated queries are answered from it
     """
 
-    __slots__ = ['nodes', 'edge_counts']
+    __slots__ = ['nodes', 'edge_counts', 'graph_file', 'annotations', 'cache']
 
-    def __init__(self, graph_file=None, edge_count=False, low_mem=False):
+    def __init__(self, graph_file=None, edge_count=False, low_mem=False, compact=False, use_index=True,
+                 threads=1, cache_bytes=0):
+        self.graph_file = graph_file
+        self.cache = NeighborhoodCache(cache_bytes) if cache_bytes > 0 else None
+        self.edge_counts = dict()
+        # name to NodeLabels, see annotations.load_node_labels
+        self.annotations = dict()
         if graph_file is not None:
             if not os.path.exists(graph_file):
                 print("Error! Check log file.")
                 logging.error("graph file {} does not exist".format(graph_file))
                 sys.exit()
             # loading nodes from file
-            self.nodes = read_gfa(gfa_file_path=graph_file, low_mem=low_mem)
-            if edge_count:
-                self.edge_counts = self.get_edges_counts(graph_file)
+            # the index is a CompactNodes and does not keep the edge counts
+            indexed_nodes = load_index(graph_file) if use_index and compact and not edge_count else None
+            edge_tags = ["ec"] if edge_count and compact else []
+            edge_counts = self.edge_counts if edge_count and not compact else None
+            if indexed_nodes is not None:
+                self.nodes = indexed_nodes
+            elif threads > 1:
+                # multiprocessing is only imported when the GFA is parsed in parallel
+                from GFASubgraph.parallel_io import read_gfa_parallel
+                self.nodes = read_gfa_parallel(graph_file, low_mem=low_mem, threads=threads, compact=compact,
+                                               edge_tags=edge_tags, edge_counts=edge_counts)
+            elif compact:
+                self.nodes = read_gfa_compact(gfa_file_path=graph_file, low_mem=low_mem, edge_tags=edge_tags)
+            else:
+                self.nodes = read_gfa(gfa_file_path=graph_file, low_mem=low_mem, edge_counts=edge_counts)
         else:
             self.nodes = dict()
-            self.edge_counts = dict()
 
     def __len__(self):
         """
@@ -62,6 +94,7 @@ class Graph:
         """
         if isinstance(value, Node):
             self.nodes[key] = value
+            self.invalidate_cache()
         else:
             raise ValueError("the object given to set should be a Node object")
 
@@ -70,6 +103,7 @@ class Graph:
         overloading deleting item
         """
         del self.nodes[key]
+        self.invalidate_cache()
 
     def reset_visited(self):
         """
@@ -84,21 +118,26 @@ class Graph:
         """
         remove a node and its corresponding edges
         """
-        starts = [x for x in self.nodes[n_id].start]
-        for n_start in starts:
-            overlap = n_start[2]
-            if n_start[1] == 1:
-                self.nodes[n_start[0]].end.remove((n_id, 0, overlap))
-            else:
-                self.nodes[n_start[0]].start.remove((n_id, 0, overlap))
+        self.invalidate_cache()
+        if isinstance(self.nodes, CompactNodes):
+            self.nodes.remove_node(n_id)
+            return
+        if isinstance(self.nodes, SubgraphNodes):
+            # the edges are shared with the full graph, the node only leaves the subgraph
+            del self.nodes[n_id]
+            return
 
-        ends = [x for x in self.nodes[n_id].end]
-        for n_end in ends:
-            overlap = n_end[2]
-            if n_end[1] == 1:
-                self.nodes[n_end[0]].end.remove((n_id, 1, overlap))
-            else:
-                self.nodes[n_end[0]].start.remove((n_id, 1, overlap))
+        nodes = self.nodes
+        node = nodes[n_id]
+        for direction, edges in ((0, node.start), (1, node.end)):
+            for neighbor, side in edges:
+                # the node's own edges go away with it, only the neighbors are changed
+                # so nothing is removed from the dict that is being iterated
+                if neighbor != n_id:
+                    other = nodes[neighbor]
+                    (other.end if side else other.start).pop((n_id, direction), None)
+                    if other.counts is not None:
+                        other.counts.pop((side, n_id, direction), None)
 
         del self.nodes[n_id]
 
@@ -106,13 +145,18 @@ class Graph:
         """
         remove singular nodes with no neighbors
         """
-        nodes_to_remove = [n.id for n in self.nodes.values() if len(n.neighbors()) == 0]
-        for i in nodes_to_remove:
-            self.remove_node(i)
+        nodes_to_remove = [n.id for n in self.nodes.values() if not n.start and not n.end]
+        self.invalidate_cache()
+        if isinstance(self.nodes, CompactNodes):
+            self.nodes.remove_nodes(nodes_to_remove)
+        else:
+            # the nodes have no edges so there is nothing to remove from their neighbors
+            for i in nodes_to_remove:
+                del self.nodes[i]
 
     def write_graph(self, set_of_nodes=None,
                     output_file="output_graph.gfa",
-                    append=False):
+                    append=False, compression=None):
         """writes a graph file as GFA
 
         list_of_nodes can be a list of node ids to write
@@ -120,24 +164,39 @@ class Graph:
         if append is set to true then output file should be an existing
         graph file to append to
         modified to output a modified graph file
+        compression can be gzip or bgzip, output files ending with .gfa.gz are gzipped
         """
-        if not output_file.endswith(".gfa"):
+        if not output_file.endswith(".gfa") and not output_file.endswith(".gfa.gz"):
             output_file += ".gfa"
         # print("I am here")
         write_gfa(self, set_of_nodes=set_of_nodes, output_file=output_file,
-                  append=append)
+                  append=append, compression=compression)
 
-    def bfs(self, start, size):
+    def bfs(self, start, size, ordered=True):
         """
         Returns a neighborhood of size given around start node
 
         :param start: starting node for the BFS search
         :param size: size of the neighborhood to return
+        :param ordered: queue neighbors sorted by id so the result is deterministic, see bfs.bfs
         """
+        if self.cache is None:
+            return bfs(self, start, size, ordered)
 
-        neighborhood = bfs(self, start, size)
+        key = (start, size, ordered)
+        neighborhood = self.cache.get(self, key)
+        if neighborhood is None:
+            neighborhood = bfs(self, start, size, ordered)
+            self.cache.put(self, key, neighborhood)
         return neighborhood
 
+    def invalidate_cache(self):
+        """
+        drops the cached neighborhoods, called whenever nodes or edges change
+        """
+        if self.cache is not None:
+            self.cache.clear()
+
     def output_components(self, output_dir):
         """
         writes each connected component in a separate GFA file
@@ -152,7 +211,25 @@ class Graph:
 
                 self.write_graph(set_of_nodes=cc, output_file=output_file, append=False)
 
+    def low_coverage_edges(self, cutoff):
+        """
+        returns the edges with an ec:i count of at most cutoff as
+        (node1, side1, node2, side2, overlap), the graph needs to be loaded with edge_count=True
+        """
+        if isinstance(self.nodes, CompactNodes):
+            if "ec" not in self.nodes.edge_tags:
+                return []
+            return list(self.nodes.edges_at_most("ec", cutoff))
+        if isinstance(self.nodes, SubgraphNodes):
+            # the counts are kept by the full graph
+            keep = self.nodes
+            return [edge for edge in self.nodes.graph.low_coverage_edges(cutoff)
+                    if edge[0] in keep and edge[2] in keep]
+        # a link repeated with another overlap replaced the first one, whose count is left out
+        return [edge for edge, count in self.edge_counts.items() if count <= cutoff and self.has_edge(edge)]
+
     def remove_edge(self, edge):
+        self.invalidate_cache()
         n1, side1, n2, side2, overlap = edge
         if side1 == 0:
             self.nodes[n1].remove_from_start(n2, side2, overlap)
@@ -163,3 +240,122 @@ class Graph:
             self.nodes[n2].remove_from_start(n1, side1, overlap)
         else:
             self.nodes[n2].remove_from_end(n1, side1, overlap)
+
+    def remove_nodes(self, n_ids):
+        """
+        removes many nodes and their edges at once, the edges between two removed
+        nodes are not touched as both nodes go away
+
+        :param n_ids: iterable of node ids, the ones not in the graph are skipped
+        :return: the number of nodes removed
+        """
+        self.invalidate_cache()
+        if isinstance(self.nodes, CompactNodes):
+            return self.nodes.remove_nodes(n_ids)
+        if isinstance(self.nodes, SubgraphNodes):
+            to_remove = [n_id for n_id in dict.fromkeys(n_ids) if n_id in self.nodes]
+            for n_id in to_remove:
+                del self.nodes[n_id]
+            return len(to_remove)
+
+        nodes = self.nodes
+        # a dict keeps the given order, which is usually close to the order of the nodes in memory
+        to_remove = dict.fromkeys(n_id for n_id in n_ids if n_id in nodes)
+        for n_id in to_remove:
+            node = nodes.pop(n_id)
+            for direction, edges in ((0, node.start), (1, node.end)):
+                for neighbor, side in edges:
+                    if neighbor not in to_remove:
+                        other = nodes[neighbor]
+                        (other.end if side else other.start).pop((n_id, direction), None)
+                        if other.counts is not None:
+                            other.counts.pop((side, n_id, direction), None)
+        return len(to_remove)
+
+    def remove_edges(self, edges):
+        """
+        removes many edges at once
+
+        :param edges: iterable of edges as (node1, side1, node2, side2, overlap)
+        :return: the number of edges removed, the ones not in the graph are skipped
+        """
+        self.invalidate_cache()
+        edges = list(edges)
+        if isinstance(self.nodes, CompactNodes):
+            removed = self.nodes.remove_edges(edges)
+        else:
+            nodes = self.nodes
+            removed = 0
+            for n1, side1, n2, side2, overlap in edges:
+                if n1 not in nodes or n2 not in nodes:
+                    continue
+                if nodes[n1].edges(side1).get((n2, side2)) != overlap:
+                    continue
+                nodes[n1].drop_edge(side1, n2, side2)
+                nodes[n2].drop_edge(side2, n1, side1)
+                removed += 1
+        if removed < len(edges):
+            logging.warning(f"{len(edges) - removed} of the edges to remove were not in the graph")
+        return removed
+
+    def has_edge(self, edge):
+        """
+        returns True if the edge (node1, side1, node2, side2, overlap) is in the graph
+        """
+        n1, side1, n2, side2, overlap = edge
+        if isinstance(self.nodes, CompactNodes):
+            idx1 = self.nodes.index_of(n1)
+            idx2 = self.nodes.index_of(n2)
+            if idx1 == -1 or idx2 == -1:
+                return False
+            return self.nodes.has_entry(2 * idx1 + side1, 2 * idx2 + side2, overlap)
+        if n1 not in self.nodes or n2 not in self.nodes:
+            return False
+        return self.nodes[n1].edges(side1).get((n2, side2)) == overlap
+
+    def degrees(self):
+        """
+        returns (ids, degrees) where degrees is an array with the number of edges
+        of the node in ids at the same position, removed nodes of a compact graph are None in ids
+        """
+        if isinstance(self.nodes, CompactNodes):
+            ids = [n_id if alive else None for n_id, alive in zip(self.nodes.ids, self.nodes.alive)]
+            return ids, self.nodes.degrees()
+        ids = list(self.nodes)
+        return ids, array('q', (len(n.start) + len(n.end) for n in self.nodes.values()))
+
+    def subgraph(self, node_ids):
+        """
+        returns the subgraph induced by node_ids as a Graph that shares the nodes and edges
+        of this graph instead of copying them, see SubgraphNodes, so bfs, components, stats
+        and write_graph can run on e.g. an extracted neighborhood directly
+
+        :param node_ids: the node ids to keep, the ones not in the graph are skipped
+        """
+        graph = Graph()
+        graph.graph_file = self.graph_file
+        graph.annotations = dict(self.annotations)
+        if isinstance(self.nodes, SubgraphNodes):
+            # a subgraph of a subgraph is made over the full graph directly
+            graph.nodes = SubgraphNodes(self.nodes.graph, (n_id for n_id in node_ids if n_id in self.nodes))
+        else:
+            graph.nodes = SubgraphNodes(self, node_ids)
+        return graph
+
+    def stats(self):
+        """
+        returns a dict with the number of nodes, edges and connected components
+        and the total sequence length of the graph
+        """
+        nodes = self.nodes
+        n_edges = 0
+        for n_id in nodes:
+            node = nodes[n_id]
+            for direction, edges in ((0, node.start), (1, node.end)):
+                for n2, side2 in edges:
+                    # every edge is in the edges of both its ends, counting it from the smaller one
+                    if (n_id, direction) <= (n2, side2):
+                        n_edges += 1
+        _, _, sizes, seq_lengths = component_labels(self)
+        return {"nodes": len(nodes), "edges": n_edges, "components": len(sizes),
+                "sequence_length": sum(seq_lengths)}
@@ -0,0 +1,71 @@
+import sys
+from array import array
+from collections import OrderedDict
+from GFASubgraph.CompactNodes import CompactNodes
+
+
+class NeighborhoodCache:
+    """
+    LRU cache of bfs neighborhoods keyed by (start node, size, ordered)
+
+    The neighborhoods are stored frozen, as an array of node indices for a compact
+    graph and as a tuple of the node ids (the same string objects as the graph) otherwise,
+    and the least recently used ones are dropped once they take more than max_bytes.
+    The whole cache is cleared when the graph changes, see Graph.remove_node
+    """
+
+    __slots__ = ['max_bytes', 'n_bytes', 'entries', 'hits', 'misses', 'evictions']
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.n_bytes = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, graph, key):
+        """
+        returns a new set with the cached neighborhood or None if it is not cached
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        if isinstance(entry, array):
+            return set(map(graph.nodes.ids.__getitem__, entry))
+        return set(entry)
+
+    def put(self, graph, key, neighborhood):
+        if isinstance(graph.nodes, CompactNodes):
+            entry = array('q', map(graph.nodes.index_of, neighborhood))
+        else:
+            entry = tuple(neighborhood)
+        n_bytes = sys.getsizeof(entry)
+        if n_bytes > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.n_bytes -= sys.getsizeof(old)
+        self.entries[key] = entry
+        self.n_bytes += n_bytes
+        while self.n_bytes > self.max_bytes:
+            _, dropped = self.entries.popitem(last=False)
+            self.n_bytes -= sys.getsizeof(dropped)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.n_bytes = 0
+
+    def stats(self):
+        """
+        returns a dict with the hits, misses, evictions, number of entries and bytes used
+        """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self.entries), "bytes": self.n_bytes}
@@ -3,17 +3,23 @@ import logging
 
 
 class Node:
-    __slots__ = ['id', 'seq', 'seq_len', 'start', 'end', 'visited', 'optional', 'chromosome']
+    __slots__ = ['id', 'seq', 'seq_len', 'seq_pos', 'start', 'end', 'visited', 'optional', 'chromosome', 'counts']
 
     def __init__(self, identifier):
         self.id = identifier
         self.seq = ""
         self.seq_len = 0
-        self.start = set()
-        self.end = set()
+        # offset of the sequence in the GFA file when loaded in low memory mode
+        self.seq_pos = -1
+        # the edges of each side as (neighbor, neighbor side) -> overlap
+        # so looking up or removing an edge is one dict operation
+        self.start = dict()
+        self.end = dict()
         self.visited = False
         self.optional = ""
         self.chromosome = None
+        # optional edge counts as (side, neighbor, neighbor side) -> count, None until one is added
+        self.counts = None
 
     def __sizeof__(self):
         size = self.id.__sizeof__() + self.seq_len.__sizeof__() + self.visited.__sizeof__()
@@ -21,13 +27,13 @@ class Node:
         if len(self.start) == 0:
             size += self.start.__sizeof__()
         else:
-            for i in self.start:
+            for i in self.start.items():
                 size += sys.getsizeof(i)
 
         if len(self.end) == 0:
             size += self.end.__sizeof__()
         else:
-            for i in self.end:
+            for i in self.end.items():
                 size += sys.getsizeof(i)
 
         return size
@@ -40,51 +46,94 @@ class Node:
         neighbors = [x[0] for x in self.start] + [x[0] for x in self.end]
         return sorted(neighbors)
 
-    def in_direction(self, node, direction):
+    def edges(self, direction):
         """
-        returns true if node is a neighbor in that direction
+        returns the edges dict of the start (0) or the end (1)
         """
-        # todo if I make start and end into dicts
-        #   I can then easily check if the node in that direction by check if (node, 0) or (node, 1) in self.start
-        #   same goes for self.end
         if direction == 0:
-            if node in [x[0] for x in self.start]:
-                return True
-            return False
+            return self.start
+        elif direction == 1:
+            return self.end
         else:
-            if node in [x[0] for x in self.end]:
-                return True
-            return False
+            raise Exception("Trying to access a wrong direction in node {}".format(self.id))
+
+    def in_direction(self, node, direction):
+        """
+        returns true if node is a neighbor in that direction
+        """
+        edges = self.edges(direction)
+        return (node, 0) in edges or (node, 1) in edges
+
+    def degree(self, direction=None):
+        """
+        returns the number of edges in that direction, or on both sides if direction is None
+        """
+        if direction is None:
+            return len(self.start) + len(self.end)
+        return len(self.edges(direction))
 
     def children(self, direction):
         """
         returns the children of a node in given direction
         """
+        return [x[0] for x in self.edges(direction)]
 
-        if direction == 0:
-            return [x[0] for x in self.start]
-        elif direction == 1:
-            return [x[0] for x in self.end]
-        else:
-            raise Exception("Trying to access a wrong direction in node {}".format(self.id))
+    def add_to_start(self, neighbor, side, overlap, count=None):
+        """
+        add an edge from the start going to side in neighbor, with an optional count
+        """
+        self.start[(neighbor, side)] = overlap
+        if count is not None:
+            self.set_count(0, neighbor, side, count)
+
+    def add_to_end(self, neighbor, side, overlap, count=None):
+        """
+        add an edge from the end going to side in neighbor, with an optional count
+        """
+        self.end[(neighbor, side)] = overlap
+        if count is not None:
+            self.set_count(1, neighbor, side, count)
+
+    def set_count(self, direction, neighbor, side, count):
+        if self.counts is None:
+            self.counts = dict()
+        self.counts[(direction, neighbor, side)] = count
+
+    def get_count(self, direction, neighbor, side):
+        """
+        returns the count of an edge or None if it has no count
+        """
+        if self.counts is None:
+            return None
+        return self.counts.get((direction, neighbor, side))
+
+    def drop_edge(self, direction, neighbor, side):
+        """
+        removes the edge to side in neighbor from that direction with its count,
+        returns False if there was no such edge
+        """
+        if self.edges(direction).pop((neighbor, side), None) is None:
+            return False
+        if self.counts is not None:
+            self.counts.pop((direction, neighbor, side), None)
+        return True
 
-    # todo add functions to add edges to start and end that graph_io can then use
-    #   should maybe have an option whether the edge is (neighbor, direction, overlap) or
-    #   (neighbor, direction, overlap, count)
-    def remove_from_start(self, neighbor, side, overlap):
+    def remove_from_start(self, neighbor, side, overlap=None):
         """
         remove the neighbor edge from the start going to side in neighbor
+        if overlap is given the edge is only removed if it has that overlap
         """
-        try:
-            self.start.remove((neighbor, side, overlap))
-        except KeyError:
+        if overlap is not None and self.start.get((neighbor, side)) != overlap:
             logging.warning(f"Could not remove edge {(neighbor, side, overlap)} from {self.id}'s start as it does not exist")
+        elif not self.drop_edge(0, neighbor, side):
+            logging.warning(f"Could not remove edge {(neighbor, side)} from {self.id}'s start as it does not exist")
 
-    def remove_from_end(self, neighbor, side, overlap):
+    def remove_from_end(self, neighbor, side, overlap=None):
         """
         remove the neighbor edge from the end going to side in neighbor
+        if overlap is given the edge is only removed if it has that overlap
         """
-        try:
-            self.end.remove((neighbor, side, overlap))
-        except KeyError:
+        if overlap is not None and self.end.get((neighbor, side)) != overlap:
             logging.warning(f"Could not remove edge {(neighbor, side, overlap)} from {self.id}'s end as it does not exist")
+        elif not self.drop_edge(1, neighbor, side):
+            logging.warning(f"Could not remove edge {(neighbor, side)} from {self.id}'s end as it does not exist")
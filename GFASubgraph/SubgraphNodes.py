@@ -0,0 +1,174 @@
+from collections.abc import Mapping
+
+
+class SubgraphNode:
+    """
+    A node of a SubgraphNodes, the attributes come from the node of the full graph
+    and only the edges to nodes of the subgraph are given
+    """
+
+    __slots__ = ['_view', '_node']
+
+    def __init__(self, view, node):
+        self._view = view
+        self._node = node
+
+    def __repr__(self):
+        return "SubgraphNode({})".format(self._node.id)
+
+    @property
+    def id(self):
+        return self._node.id
+
+    @property
+    def seq(self):
+        return self._node.seq
+
+    @property
+    def seq_len(self):
+        return self._node.seq_len
+
+    @property
+    def seq_pos(self):
+        return self._node.seq_pos
+
+    @property
+    def optional(self):
+        return self._node.optional
+
+    @property
+    def chromosome(self):
+        return self._node.chromosome
+
+    @chromosome.setter
+    def chromosome(self, value):
+        self._node.chromosome = value
+
+    @property
+    def visited(self):
+        # the subgraph has its own flags so a search in it does not mark the full graph
+        return self._node.id in self._view.visited
+
+    @visited.setter
+    def visited(self, value):
+        if value:
+            self._view.visited.add(self._node.id)
+        else:
+            self._view.visited.discard(self._node.id)
+
+    @property
+    def start(self):
+        keep = self._view.ids
+        return {key: overlap for key, overlap in self._node.start.items() if key[0] in keep}
+
+    @property
+    def end(self):
+        keep = self._view.ids
+        return {key: overlap for key, overlap in self._node.end.items() if key[0] in keep}
+
+    @property
+    def counts(self):
+        counts = self._node.counts
+        if counts is None:
+            return None
+        keep = self._view.ids
+        return {key: count for key, count in counts.items() if key[1] in keep}
+
+    def neighbors(self):
+        """
+        Returns all adjacent nodes to self
+        """
+        keep = self._view.ids
+        return [n for n in self._node.neighbors() if n in keep]
+
+    def edges(self, direction):
+        """
+        returns the edges dict of the start (0) or the end (1)
+        """
+        if direction == 0:
+            return self.start
+        elif direction == 1:
+            return self.end
+        else:
+            raise Exception("Trying to access a wrong direction in node {}".format(self.id))
+
+    def in_direction(self, node, direction):
+        """
+        returns true if node is a neighbor in that direction
+        """
+        return node in self._view.ids and self._node.in_direction(node, direction)
+
+    def degree(self, direction=None):
+        """
+        returns the number of edges in that direction, or on both sides if direction is None
+        """
+        if direction is None:
+            return len(self.start) + len(self.end)
+        return len(self.edges(direction))
+
+    def children(self, direction):
+        """
+        returns the children of a node in given direction
+        """
+        return [x[0] for x in self.edges(direction)]
+
+    def drop_edge(self, direction, neighbor, side):
+        raise TypeError("The edges of a subgraph are shared with the full graph, "
+                        "remove them from the full graph or remove nodes from the subgraph")
+
+    def remove_from_start(self, neighbor, side, overlap=None):
+        self.drop_edge(0, neighbor, side)
+
+    def remove_from_end(self, neighbor, side, overlap=None):
+        self.drop_edge(1, neighbor, side)
+
+
+class SubgraphNodes(Mapping):
+    """
+    Induced subgraph of a graph as a mask over its nodes, used in place of Graph.nodes
+
+    Nothing is copied from the full graph, only the ids of the kept nodes are stored
+    and indexing returns a SubgraphNode that leaves out the edges to the other nodes,
+    so bfs, component_labels and write_gfa run on the subgraph as they are.
+    Removing nodes from the subgraph only removes them from the mask,
+    the full graph should not have nodes removed while the subgraph is used
+    """
+
+    __slots__ = ['graph', 'nodes', 'ids', 'visited']
+
+    def __init__(self, graph, node_ids):
+        """
+        :param graph: the full Graph object
+        :param node_ids: the node ids to keep, the ones not in the graph are skipped
+        """
+        self.graph = graph
+        self.nodes = graph.nodes
+        # a dict so the nodes keep the given order
+        self.ids = dict.fromkeys(n_id for n_id in node_ids if n_id in self.nodes)
+        self.visited = set()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __contains__(self, key):
+        return key in self.ids
+
+    def __getitem__(self, key):
+        if key not in self.ids:
+            raise KeyError(key)
+        return SubgraphNode(self, self.nodes[key])
+
+    def __setitem__(self, key, value):
+        raise TypeError("Nodes cannot be added to a subgraph, add them to the full graph")
+
+    def __delitem__(self, key):
+        del self.ids[key]
+        self.visited.discard(key)
+
+    def pop(self, key):
+        node = self[key]
+        del self[key]
+        return node
@@ -0,0 +1,117 @@
+import logging
+from array import array
+from itertools import repeat
+from GFASubgraph.CompactNodes import CompactNodes
+
+
+def node_index(graph):
+    """
+    returns (a get(node id, default) lookup of the node positions, number of positions)
+    a compact graph already has one, for a dict of Nodes it is built from the node order
+    """
+    if isinstance(graph.nodes, CompactNodes):
+        return graph.nodes.index.get, len(graph.nodes.ids)
+    index = {n_id: idx for idx, n_id in enumerate(graph.nodes)}
+    return index.get, len(index)
+
+
+class NodeLabels:
+    """
+    One categorical annotation of the nodes, e.g. the chromosome
+
+    Every distinct label string is kept once in labels and each node only
+    has the integer code of its label in the codes array, -1 for no label.
+    codes has one extra -1 at the end, so looking up a node that is not
+    in the index (position -1) also gives no label without a check
+    """
+
+    __slots__ = ['name', 'labels', 'label_codes', 'codes', 'index']
+
+    def __init__(self, name, index, n_nodes):
+        self.name = name
+        self.labels = []
+        self.label_codes = dict()
+        self.codes = array('i', [-1]) * (n_nodes + 1)
+        self.index = index
+
+    def code_of(self, label):
+        """
+        returns the code of label, giving it the next code if it is new
+        """
+        code = self.label_codes.get(label)
+        if code is None:
+            code = len(self.labels)
+            self.label_codes[label] = code
+            self.labels.append(label)
+        return code
+
+    def __setitem__(self, n_id, label):
+        idx = self.index(n_id, -1)
+        if idx == -1:
+            raise KeyError(n_id)
+        self.codes[idx] = self.code_of(label)
+
+    def get(self, n_id, default=None):
+        code = self.codes[self.index(n_id, -1)]
+        if code == -1:
+            return default
+        return self.labels[code]
+
+    def node_codes(self, nodes):
+        """
+        returns an iterator over the codes of the nodes, -1 for the ones without a label
+        """
+        return map(self.codes.__getitem__, map(self.index, nodes, repeat(-1)))
+
+    def n_labels(self, nodes):
+        """
+        number of different labels among the nodes
+        """
+        codes = set(self.node_codes(nodes))
+        codes.discard(-1)
+        return len(codes)
+
+    def groups(self, nodes):
+        """
+        returns a dict of label and the list of nodes with that label
+        """
+        groups = dict()
+        for n, code in zip(nodes, self.node_codes(nodes)):
+            if code != -1:
+                groups.setdefault(self.labels[code], []).append(n)
+        return groups
+
+
+def load_node_labels(graph, tsv_file, names=("chromosome",)):
+    """
+    reads a TSV of node ids and their labels, no header, into a NodeLabels per column
+    and adds them to graph.annotations
+
+    :param graph: A graph object from class Graph
+    :param tsv_file: first column is the node id, the next ones are labels
+    :param names: names of the label columns after the node id, the extra columns are ignored
+    :return: dict of name and NodeLabels
+    """
+    index, n_nodes = node_index(graph)
+    columns = [NodeLabels(name, index, n_nodes) for name in names]
+    missing = 0
+    with open(tsv_file, "r") as infile:
+        for line in infile:
+            line = line.split()
+            if not line:
+                continue
+            idx = index(line[0], -1)
+            if idx == -1:
+                missing += 1
+                logging.debug(f"The node {line[0]} in the TSV is not present in the graph")
+                continue
+            for column, label in zip(columns, line[1:]):
+                column.codes[idx] = column.code_of(label)
+
+    if missing:
+        logging.warning(f"{missing} nodes in {tsv_file} are not present in the graph")
+    annotations = {column.name: column for column in columns}
+    for column in columns:
+        logging.info(f"Loaded {len(column.labels)} different {column.name} labels from {tsv_file}")
+    graph.annotations.update(annotations)
+    return annotations
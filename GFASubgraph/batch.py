@@ -0,0 +1,112 @@
+import os
+import time
+import logging
+from GFASubgraph.graph_io import ComponentRouter, SequenceSource, node_lines
+from GFASubgraph.multi_bfs import map_chunks, multi_source_bfs, multi_source_distance
+
+
+def parse_limit(limit):
+    """
+    returns (size, max_bp) from the limit column of a job,
+    50 is a neighborhood of 50 nodes and 5000bp is every node within 5000 bp
+    """
+    limit = limit.strip().lower()
+    if limit.endswith("bp"):
+        return None, int(limit[:-2])
+    return int(limit), None
+
+
+def read_jobs(jobs_file, output_dir="."):
+    """
+    Reads the TSV of batch jobs, one job per line with the columns
+    job name, comma separated start nodes, limit and optionally the output GFA.
+    The limit is a neighborhood size like 50 or a distance like 5000bp, the output
+    is relative to output_dir and is output_dir/<job name>.gfa if not given.
+    Empty lines and lines starting with # are skipped
+
+    :param jobs_file: path to the TSV
+    :param output_dir: directory of the outputs
+    :return: list of (job name, start nodes, size, max bp, output path), one of size and max bp is None
+    """
+    jobs = []
+    outputs = dict()
+    with open(jobs_file, "r") as infile:
+        for line_number, line in enumerate(infile, 1):
+            if not line.strip() or line.startswith("#"):
+                continue
+            fields = line.rstrip("\r\n").split("\t")
+            if len(fields) < 3:
+                raise ValueError(f"Line {line_number} of {jobs_file} should have at least 3 columns, "
+                                 f"the job name, start nodes and limit")
+            name = fields[0]
+            start_nodes = [n for n in fields[1].split(",") if n]
+            try:
+                size, max_bp = parse_limit(fields[2])
+            except ValueError:
+                raise ValueError(f"Line {line_number} of {jobs_file}: the limit {fields[2]} should be "
+                                 f"a neighborhood size like 50 or a distance like 5000bp")
+            if len(fields) > 3 and fields[3]:
+                output = os.path.join(output_dir, fields[3])
+            else:
+                output = os.path.join(output_dir, name + ".gfa")
+            if output in outputs:
+                raise ValueError(f"The jobs {outputs[output]} and {name} in {jobs_file} "
+                                 f"both write to {output}")
+            outputs[output] = name
+            jobs.append((name, start_nodes, size, max_bp, output))
+    return jobs
+
+
+def _job_chunk(graph, jobs, _):
+    """
+    runs a chunk of (position, job) and returns [(position, GFA lines of the job), ...]
+    """
+    nodes = graph.nodes
+    sequences = SequenceSource(graph.graph_file)
+    results = []
+    for pos, (name, start_nodes, size, max_bp, _) in jobs:
+        if max_bp is not None:
+            keep = multi_source_distance(graph, start_nodes, max_bp)
+        else:
+            keep = multi_source_bfs(graph, start_nodes, size)
+        lines = []
+        for n in keep:
+            lines.extend(node_lines(nodes, n, keep, sequences))
+        results.append((pos, lines))
+    return results
+
+
+def run_jobs(graph, jobs, cores=1, chunk_size=None, max_open_files=256, buffer_size=2**25):
+    """
+    Runs many neighborhood jobs on one loaded graph and writes the subgraph of each job to its own GFA
+
+    The jobs are run by a pool of workers sharing the graph, like multi_bfs, and the GFA lines
+    of all jobs go through one ComponentRouter, so they share the write buffers and
+    a pool of at most max_open_files file handles
+
+    :param graph: A graph object from class Graph
+    :param jobs: list of jobs from read_jobs
+    :param cores: number of worker processes, 1 runs everything in this process
+    :param chunk_size: number of jobs given to a worker at once, chosen from the number of jobs if None
+    :param max_open_files: most output files kept open at the same time
+    :param buffer_size: number of characters buffered over all outputs before they are written
+    :return: the number of jobs written
+    """
+    for out_dir in {os.path.dirname(job[4]) for job in jobs}:
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+    router = ComponentRouter(max_open_files=max_open_files, buffer_size=buffer_size,
+                             paths={pos: job[4] for pos, job in enumerate(jobs)})
+    start = time.perf_counter()
+    n_done = 0
+    try:
+        for pos, lines in map_chunks(graph, list(enumerate(jobs)), None, cores, chunk_size, _job_chunk):
+            for line in lines:
+                router.add(pos, line)
+            n_done += 1
+    finally:
+        # jobs without any node in the graph still get an empty file
+        router.close(range(len(jobs)))
+    elapsed = time.perf_counter() - start
+    logging.info(f"Ran {n_done} jobs in {elapsed:.2f} seconds ({n_done / max(elapsed, 1e-9):.0f} jobs/sec)")
+    return n_done
@@ -1,11 +1,20 @@
 from collections import deque
+from GFASubgraph import profiling
 
 
-def main_while_loop(graph, start_node, queue, visited, size):
+def main_while_loop(graph, start_node, queue, visited, size, ordered=True):
     neighborhood = {start_node}
     if len(queue) == 0:
         queue.append(start_node)
 
+    # every node that is in the queue or was visited, the popped nodes go to visited
+    # so checking this set is the same as checking visited and the queue
+    # without the linear scan of the deque
+    seen = set(visited)
+    seen.update(queue)
+    n_visited = len(visited)
+    frontier_peak = len(queue)
+
     while len(neighborhood) <= size and len(queue) > 0:
         start = queue.popleft()
 
@@ -14,16 +23,28 @@ def main_while_loop(graph, start_node, queue, visited, size):
 
         visited.add(start)
 
-        neighbors = graph[start].neighbors()
-
-        for n in neighbors:
-            if n not in visited and n not in queue:
-                queue.append(n)
+        node = graph[start]
+        if ordered:
+            for n in node.neighbors():
+                if n not in seen:
+                    seen.add(n)
+                    queue.append(n)
+        else:
+            # going over the edges directly, no list is built or sorted
+            for edges in (node.start, node.end):
+                for n, _ in edges:
+                    if n not in seen:
+                        seen.add(n)
+                        queue.append(n)
+        if len(queue) > frontier_peak:
+            frontier_peak = len(queue)
 
+    profiling.add("traversal", searches=1, nodes_expanded=len(visited) - n_visited)
+    profiling.peak("traversal", frontier_peak=frontier_peak)
     return neighborhood
 
 
-def bfs(graph, start_node, size):
+def bfs(graph, start_node, size, ordered=True):
     """
     Runs bfs and returns the neighborhood smaller than size
     Using only bfs was resulting in a one-sided neighborhood.
@@ -34,6 +55,10 @@ def bfs(graph, start_node, size):
     :param graph: A graph object from class Graph
     :param start_node: starting node for the BFS search
     :param size: size of the neighborhood to return
+    :param ordered: if True the neighbors of each node are queued sorted by id, so the
+        neighborhood is always the same. If False they are queued in the order they are
+        stored, which is faster around high-degree nodes but which nodes make it into the
+        neighborhood at the size limit can change between runs
     """
     queue = deque()
     visited = set()
@@ -42,11 +67,11 @@ def bfs(graph, start_node, size):
 
     queue.append(start_node)
     visited.add(start_node)
-    neighbors = graph[start_node].neighbors()
+    node = graph[start_node]
 
-    if len(neighbors) == 0:  # no neighbors
+    if not node.start and not node.end:  # no neighbors
         return {start_node}
 
-    neighborhood = main_while_loop(graph, start_node, queue, visited, size)
+    neighborhood = main_while_loop(graph, start_node, queue, visited, size, ordered)
 
     return neighborhood
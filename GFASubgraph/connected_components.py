@@ -1,3 +1,8 @@
+from array import array
+from itertools import accumulate
+from GFASubgraph.CompactNodes import CompactNodes
+
+
 def find_component(graph, start_node):
     """
     Find component in the graph starting from given node
@@ -36,6 +41,142 @@ def find_component(graph, start_node):
     return cc
 
 
+def _union_pairs(graph):
+    """
+    returns the node ids by position and a generator of the (i, j) positions
+    of the nodes on each edge, every edge is given once with i < j
+    for compact graphs the positions are the node indices and removed nodes are None
+    """
+    nodes = graph.nodes
+    if isinstance(nodes, CompactNodes):
+        ptr, adj = nodes.ptr, nodes.adj
+
+        def pairs():
+            for side in range(len(ptr) - 1):
+                i = side >> 1
+                for k in range(ptr[side], ptr[side + 1]):
+                    j = adj[k] >> 1
+                    if j > i:
+                        yield i, j
+
+        ids = [n_id if alive else None for n_id, alive in zip(nodes.ids, nodes.alive)]
+        return ids, pairs()
+
+    ids = list(nodes)
+    index = {n_id: i for i, n_id in enumerate(ids)}
+
+    def pairs():
+        for i, n_id in enumerate(ids):
+            node = nodes[n_id]
+            for edges in (node.start, node.end):
+                for n, _ in edges:
+                    j = index[n]
+                    if j > i:
+                        yield i, j
+
+    return ids, pairs()
+
+
+def component_labels(graph):
+    """
+    Labels the connected components with union-find over the edges,
+    the nodes are not touched so no visited flags are left behind
+
+    :param graph: is a graph object from class Graph
+    :return: (ids, labels, sizes, seq_lengths) where labels[i] is the component of the node ids[i]
+        or -1 if that position is a removed node, components are numbered in the order their first
+        node comes in the graph, sizes[c] and seq_lengths[c] are the number of nodes and the summed
+        sequence length of component c
+    """
+    ids, pairs = _union_pairs(graph)
+    n = len(ids)
+    parent = array('q', range(n))
+    rank_size = array('q', [1]) * n
+
+    for i, j in pairs:
+        # finding the roots with path halving
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        while parent[j] != j:
+            parent[j] = parent[parent[j]]
+            j = parent[j]
+        if i == j:
+            continue
+        # union by size
+        if rank_size[i] < rank_size[j]:
+            i, j = j, i
+        parent[j] = i
+        rank_size[i] += rank_size[j]
+    del rank_size
+
+    # relabelling the roots 0..k-1 by the order of their first node
+    labels = array('q', [-1]) * n
+    root_label = dict()
+    sizes = array('q')
+    seq_lengths = array('Q')
+    nodes = graph.nodes
+    for pos in range(n):
+        if ids[pos] is None:
+            continue
+        root = pos
+        while parent[root] != root:
+            parent[root] = parent[parent[root]]
+            root = parent[root]
+        label = root_label.get(root, -1)
+        if label == -1:
+            label = len(sizes)
+            root_label[root] = label
+            sizes.append(0)
+            seq_lengths.append(0)
+        labels[pos] = label
+        sizes[label] += 1
+        seq_lengths[label] += nodes[ids[pos]].seq_len
+    return ids, labels, sizes, seq_lengths
+
+
+def label_lookup(graph, ids, labels):
+    """
+    returns a function from a node id to its component label, -1 if the node is not in the graph
+
+    :param graph: the graph object the labels were made from
+    :param ids: the ids from component_labels
+    :param labels: the labels from component_labels
+    """
+    nodes = graph.nodes
+    if isinstance(nodes, CompactNodes):
+        def labels_of(n_id):
+            idx = nodes.index_of(n_id)
+            if idx == -1:
+                return -1
+            return labels[idx]
+    else:
+        label_dict = dict(zip(ids, labels))
+
+        def labels_of(n_id):
+            return label_dict.get(n_id, -1)
+    return labels_of
+
+
+def component_members(labels, sizes):
+    """
+    groups the node positions by component like the rows of a CSR, so the nodes
+    of a component are found without going over all the labels
+
+    :param labels: the labels from component_labels
+    :param sizes: the sizes from component_labels
+    :return: (order, offsets) where order[offsets[c]:offsets[c + 1]] are the positions in ids of the nodes of component c
+    """
+    offsets = array('q', accumulate(sizes, initial=0))
+    fill = offsets[:-1]
+    order = array('q', [0]) * offsets[-1]
+    for pos, label in enumerate(labels):
+        if label != -1:
+            order[fill[label]] = pos
+            fill[label] += 1
+    return order, offsets
+
+
 def all_components(graph):
     """
     find all connected components in the graph
@@ -43,10 +184,9 @@ def all_components(graph):
     :params graph: is a graph object from class Graph
     :return: list of set of components
     """
-    connected_comp = []
-    # visited = set()
-    for n in graph.nodes:
-        if not graph.nodes[n].visited:
-            connected_comp.append(find_component(graph, n))
-            # visited = visited.union(connected_comp[-1])
+    ids, labels, sizes, _ = component_labels(graph)
+    connected_comp = [set() for _ in range(len(sizes))]
+    for n_id, label in zip(ids, labels):
+        if label != -1:
+            connected_comp[label].add(n_id)
     return connected_comp
@@ -0,0 +1,81 @@
+import re
+import gzip
+import logging
+
+# a step of a GAF path, > or < followed by the node id
+PATH_STEP = re.compile(r"[<>]([^<>]+)")
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def open_gaf(gaf_file):
+    """
+    opens a GAF file for reading text, gzipped files (.gz or bgzip) are read directly
+    """
+    with open(gaf_file, "rb") as infile:
+        magic = infile.read(2)
+    if magic == GZIP_MAGIC:
+        return gzip.open(gaf_file, "rt")
+    return open(gaf_file, "r")
+
+
+def parse_path(path):
+    """
+    returns the node ids of a GAF path like >1<2>3, or None if the path
+    is not made of oriented node ids (e.g. a stable path name)
+    """
+    if not path or path[0] not in "<>":
+        return None
+    return PATH_STEP.findall(path)
+
+
+def alignment_identity(tags):
+    """
+    returns the value of the id:f tag from the optional columns of a GAF line, NA if there is none
+    """
+    # the tab in front so only a whole tag name matches
+    tags = "\t" + tags
+    start = tags.find("\tid:f:")
+    if start == -1:
+        return "NA"
+    end = tags.find("\t", start + 1)
+    if end == -1:
+        end = len(tags)
+    return tags[start + 6:end]
+
+
+def parse_gaf_lines(lines, names=None):
+    """
+    parses GAF lines and yields the alignments with a node path, see iter_gaf
+
+    :param lines: iterable of GAF lines
+    :param names: set of alignment names to keep, all are kept if None
+    """
+    for line in lines:
+        # the 12 mandatory columns and then all the tags in one string
+        line = line.rstrip("\r\n").split("\t", 12)
+        if len(line) < 6:
+            continue
+        name = f"{line[0]}_{line[2]}_{line[3]}"
+        if names is not None and name not in names:
+            continue
+        path = parse_path(line[5])
+        if path is None:
+            logging.debug(f"The alignment {name} does not have a node path, skipping")
+            continue
+        tags = line[12] if len(line) > 12 else ""
+        yield name, path, int(line[3]) - int(line[2]), alignment_identity(tags)
+
+
+def iter_gaf(gaf_file, names=None):
+    """
+    Reads a GAF file one line at a time and yields the alignments with a node path
+
+    The name of an alignment is the query name with its start and end, e.g. read1_100_2000,
+    when names is given only these alignments are parsed and the rest of the line is skipped
+
+    :param gaf_file: GAF file, can be gzipped
+    :param names: set of alignment names to keep, all are kept if None
+    :return: generator of (name, list of path node ids, alignment length, alignment identity)
+    """
+    with open_gaf(gaf_file) as infile:
+        yield from parse_gaf_lines(infile, names)
@@ -0,0 +1,200 @@
+import os
+import mmap
+import zlib
+import struct
+import logging
+from array import array
+from GFASubgraph.CompactNodes import CompactNodes
+from GFASubgraph.graph_io import read_gfa_compact, open_sequences
+
+# A binary sidecar next to the GFA file (graph.gfa.gsi) holding the
+# CompactNodes arrays, so the graph is memory mapped instead of parsed again.
+#
+# Layout: a fixed header with the size, mtime and a checksum of the source GFA,
+# followed by a table of (offset, number of bytes) for each section in SECTIONS,
+# the sections themselves are the raw arrays aligned to 8 bytes.
+# The sequences are not copied, the sidecar keeps their offsets in the GFA
+# and the GFA itself is memory mapped to read them.
+
+MAGIC = b"GFASIDX\x01"
+HEADER = struct.Struct("<8sQqIIQ")
+SECTION = struct.Struct("<QQ")
+SECTIONS = [("ids", "B"), ("id_offsets", "Q"), ("id_order", "q"),
+            ("seq_lens", "Q"), ("seq_pos", "Q"),
+            ("optionals", "B"), ("optional_offsets", "Q"),
+            ("ptr", "q"), ("adj", "q"), ("overlaps", "i")]
+# size of the blocks at the start and end of the GFA that are checksummed
+CHECKSUM_BLOCK = 2**20
+
+
+def index_path(gfa_file):
+    return gfa_file + ".gsi"
+
+
+def source_signature(gfa_file):
+    """
+    returns (size, mtime in ns, checksum) of the GFA file
+    the checksum only covers the first and last MiB so it stays cheap on very big files
+    """
+    stat = os.stat(gfa_file)
+    crc = 0
+    with open(gfa_file, "rb") as infile:
+        crc = zlib.crc32(infile.read(CHECKSUM_BLOCK), crc)
+        if stat.st_size > CHECKSUM_BLOCK:
+            infile.seek(max(CHECKSUM_BLOCK, stat.st_size - CHECKSUM_BLOCK))
+            crc = zlib.crc32(infile.read(CHECKSUM_BLOCK), crc)
+    return stat.st_size, stat.st_mtime_ns, crc
+
+
+def pack_strings(strings):
+    """
+    packs strings into one utf-8 blob and an array of n + 1 offsets into it
+    """
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for s in strings:
+        blob += s.encode()
+        offsets.append(len(blob))
+    return blob, offsets
+
+
+class MappedStrings:
+    """
+    read-only list of strings stored as a blob and offsets in the sidecar
+    """
+
+    __slots__ = ['blob', 'offsets']
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx):
+        return self.get_bytes(idx).decode()
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def get_bytes(self, idx):
+        return bytes(self.blob[self.offsets[idx]:self.offsets[idx + 1]])
+
+
+class MappedIndex:
+    """
+    node id to index lookup with a binary search over the ids sorted in the sidecar
+    replaces the id dict so nothing has to be built when the index is loaded
+    """
+
+    __slots__ = ['ids', 'order']
+
+    def __init__(self, ids, order):
+        self.ids = ids
+        self.order = order
+
+    def __len__(self):
+        return len(self.order)
+
+    def __contains__(self, key):
+        return self.get(key, -1) != -1
+
+    def get(self, key, default=None):
+        # the ids are strings, like a dict anything else is just not there
+        if not isinstance(key, str):
+            return default
+        key = key.encode()
+        lo, hi = 0, len(self.order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = self.ids.get_bytes(self.order[mid])
+            if current < key:
+                lo = mid + 1
+            elif current > key:
+                hi = mid
+            else:
+                return self.order[mid]
+        return default
+
+
+def write_index(gfa_file, output_file=None):
+    """
+    parses the GFA file and writes the binary sidecar for it
+
+    :param gfa_file: GFA graph file
+    :param output_file: path of the sidecar, default is the GFA path with .gsi added
+    """
+    if output_file is None:
+        output_file = index_path(gfa_file)
+    signature = source_signature(gfa_file)
+    nodes = read_gfa_compact(gfa_file, low_mem=True)
+
+    id_blob, id_offsets = pack_strings(nodes.ids)
+    # utf-8 bytes sort the same way as the strings do
+    id_order = array("q", sorted(range(len(nodes.ids)), key=nodes.ids.__getitem__))
+    opt_blob, opt_offsets = pack_strings(nodes.optionals)
+    sections = {"ids": id_blob, "id_offsets": id_offsets, "id_order": id_order,
+                "seq_lens": nodes.seq_lens, "seq_pos": nodes.seq_pos,
+                "optionals": opt_blob, "optional_offsets": opt_offsets,
+                "ptr": nodes.ptr, "adj": nodes.adj, "overlaps": nodes.overlaps}
+
+    table = []
+    offset = HEADER.size + SECTION.size * len(SECTIONS)
+    for name, _ in SECTIONS:
+        offset += -offset % 8
+        nbytes = memoryview(sections[name]).nbytes
+        table.append((offset, nbytes))
+        offset += nbytes
+
+    size, mtime, crc = signature
+    with open(output_file, "wb") as out:
+        out.write(HEADER.pack(MAGIC, size, mtime, crc, 0, len(nodes.ids)))
+        for entry in table:
+            out.write(SECTION.pack(*entry))
+        for (name, _), (offset, _) in zip(SECTIONS, table):
+            out.write(b"\x00" * (offset - out.tell()))
+            out.write(sections[name])
+    logging.info(f"Wrote the index {output_file} for {len(nodes.ids)} nodes")
+    return output_file
+
+
+def load_index(gfa_file, index_file=None):
+    """
+    memory maps the sidecar of the GFA file if it exists and is fresh
+
+    :param gfa_file: GFA graph file
+    :param index_file: path of the sidecar, default is the GFA path with .gsi added
+    :return: a CompactNodes over the mapped arrays or None if there is no usable sidecar
+    """
+    if index_file is None:
+        index_file = index_path(gfa_file)
+    if not os.path.exists(index_file):
+        return None
+
+    with open(index_file, "rb") as infile:
+        # ACCESS_COPY so removing nodes and edges changes the pages in memory only
+        index_map = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_COPY)
+    magic, size, mtime, crc, _, n_nodes = HEADER.unpack_from(index_map, 0)
+    if magic != MAGIC:
+        logging.warning(f"{index_file} is not a GFASubgraph index, it is ignored")
+        return None
+    if (size, mtime, crc) != source_signature(gfa_file):
+        logging.warning(f"The index {index_file} is older than {gfa_file}, it is ignored. "
+                        f"Run the index subcommand again to update it")
+        return None
+
+    view = memoryview(index_map)
+    sections = dict()
+    for i, (name, code) in enumerate(SECTIONS):
+        offset, nbytes = SECTION.unpack_from(index_map, HEADER.size + i * SECTION.size)
+        sections[name] = view[offset:offset + nbytes].cast(code)
+
+    ids = MappedStrings(sections["ids"], sections["id_offsets"])
+    seq_data = open_sequences(gfa_file)
+    logging.info(f"Loaded the index {index_file} with {n_nodes} nodes")
+    return CompactNodes(ids, MappedIndex(ids, sections["id_order"]), sections["seq_lens"],
+                        sections["ptr"], sections["adj"], sections["overlaps"],
+                        optionals=MappedStrings(sections["optionals"], sections["optional_offsets"]),
+                        seq_data=seq_data, seq_pos=sections["seq_pos"])
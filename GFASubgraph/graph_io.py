@@ -1,11 +1,177 @@
 import os
 import sys
+import time
+import mmap
+import zlib
+import queue
+import struct
+import threading
+from collections import OrderedDict
 from GFASubgraph.Node import Node
+from GFASubgraph.CompactNodes import CompactBuilder
+from GFASubgraph import profiling
+from GFASubgraph.profiling import peak_rss_mb
 import logging
 
 
+class SequenceSource:
+    """
+    gives the sequence of a node, for nodes loaded in low memory mode
+    the sequence is sliced from a memory map of the GFA file
+    """
+
+    __slots__ = ['graph_file', 'data']
+
+    def __init__(self, graph_file):
+        self.graph_file = graph_file
+        self.data = None
+
+    def get(self, node):
+        if node.seq_pos == -1:
+            return node.seq
+        if self.data is None:
+            self.data = open_sequences(self.graph_file)
+        return self.data[node.seq_pos:node.seq_pos + node.seq_len].decode()
+
+
+# the orientation of the second node of an L line from the side the edge goes into
+TO_ORIENTATION = ("+", "-")
+# size of the uncompressed data in each BGZF block, the same as bgzip uses
+BGZF_BLOCK_SIZE = 0xff00
+BGZF_EOF = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+
+
+def bgzf_block(data):
+    """
+    compresses data (at most BGZF_BLOCK_SIZE bytes) into one BGZF block
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    cdata = compressor.compress(data) + compressor.flush()
+    # gzip header with the BC extra field holding the block size minus 1
+    header = struct.pack("<4BI2BH2BHH", 31, 139, 8, 4, 0, 0, 255, 6, 66, 67, 2, len(cdata) + 25)
+    return header + cdata + struct.pack("<II", zlib.crc32(data), len(data))
+
+
+class CompressedWriter:
+    """
+    File-like object that writes gzip or bgzip (BGZF) compressed text
+
+    The text is joined into chunks and handed to a thread that compresses
+    and writes them, zlib releases the GIL so the compression runs while
+    the caller keeps making lines.
+    """
+
+    def __init__(self, output_file, append=False, bgzip=False, chunk_size=2**20):
+        self.f = open(output_file, "ab" if append else "wb")
+        self.bgzip = bgzip
+        self.chunk_size = chunk_size
+        self.pending = []
+        self.pending_size = 0
+        self.error = None
+        self.queue = queue.Queue(maxsize=8)
+        self.thread = threading.Thread(target=self._compress, daemon=True)
+        self.thread.start()
+
+    def write(self, text):
+        self.pending.append(text)
+        self.pending_size += len(text)
+        if self.pending_size >= self.chunk_size:
+            self._submit()
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def _submit(self):
+        if self.pending:
+            self.queue.put("".join(self.pending).encode())
+        self.pending = []
+        self.pending_size = 0
+
+    def _compress(self):
+        try:
+            if self.bgzip:
+                carry = b""
+                while True:
+                    data = self.queue.get()
+                    if data is None:
+                        break
+                    carry += data
+                    while len(carry) >= BGZF_BLOCK_SIZE:
+                        self.f.write(bgzf_block(carry[:BGZF_BLOCK_SIZE]))
+                        carry = carry[BGZF_BLOCK_SIZE:]
+                if carry:
+                    self.f.write(bgzf_block(carry))
+                self.f.write(BGZF_EOF)
+            else:
+                compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+                while True:
+                    data = self.queue.get()
+                    if data is None:
+                        break
+                    self.f.write(compressor.compress(data))
+                self.f.write(compressor.flush())
+        except Exception as e:
+            self.error = e
+            # keep taking chunks so the writing side does not block forever
+            while self.queue.get() is not None:
+                pass
+
+    def close(self):
+        self._submit()
+        self.queue.put(None)
+        self.thread.join()
+        self.f.close()
+        if self.error is not None:
+            raise self.error
+
+
+def open_output(output_file, append=False, compression=None):
+    """
+    opens a text output with a large buffer, or a CompressedWriter
+
+    :param output_file: path of the output
+    :param append: append to the file instead of rewriting it
+    :param compression: None, "gzip" or "bgzip", files ending with .gz are gzip compressed if None
+    """
+    if compression is None and output_file.endswith(".gz"):
+        compression = "gzip"
+    if compression is None:
+        return open(output_file, "a" if append else "w", buffering=2**20)
+    if compression not in ("gzip", "bgzip"):
+        raise ValueError("compression should be gzip or bgzip, not {}".format(compression))
+    return CompressedWriter(output_file, append=append, bgzip=compression == "bgzip")
+
+
+def node_lines(nodes, n1, keep, sequences):
+    """
+    returns the S line of node n1 and the L lines of its edges to nodes in keep
+    an edge is only given by the smaller of its two (node, side) ends
+    so writing the lines of all nodes writes every link once
+
+    :param nodes: the nodes of the graph
+    :param n1: node id
+    :param keep: set (or dict) of the node ids that are written
+    :param sequences: a SequenceSource for the graph
+    """
+    node = nodes[n1]
+    if node.optional:  # if there are extra tags, write them as is
+        lines = [f"S\t{n1}\t{sequences.get(node)}\t{node.optional}\n"]
+    else:
+        lines = [f"S\t{n1}\t{sequences.get(node)}\n"]
+
+    for (n2, side2), overlap in node.start.items():
+        if n1 <= n2 and n2 in keep:
+            lines.append(f"L\t{n1}\t-\t{n2}\t{TO_ORIENTATION[side2]}\t{overlap}M\n")
+
+    for (n2, side2), overlap in node.end.items():
+        if (n1 < n2 or (n1 == n2 and side2 == 1)) and n2 in keep:
+            lines.append(f"L\t{n1}\t+\t{n2}\t{TO_ORIENTATION[side2]}\t{overlap}M\n")
+    return lines
+
+
 def write_gfa(graph, set_of_nodes=None,
-              output_file="output_file.gfa", append=False):
+              output_file="output_file.gfa", append=False, compression=None):
     """
     Write a gfa out
 
@@ -13,153 +179,438 @@ def write_gfa(graph, set_of_nodes=None,
     :param set_of_nodes: A list of node ids of the path or nodes we want to generate a GFA file for.
     :param output_file: path to output file
     :param append: if I want to append to a file instead of rewriting it
+    :param compression: None, "gzip" or "bgzip", files ending with .gz are gzip compressed if None
+    """
+    if append and not os.path.exists(output_file):
+        logging.warning("Trying to append to a non-existent file\n"
+                        "creating an output file")
+        append = False
+    f = open_output(output_file, append, compression)
+    for batch in gfa_batches(graph, set_of_nodes):
+        f.writelines(batch)
+    f.close()
+
+
+def gfa_batches(graph, set_of_nodes=None, batch_size=10000):
+    """
+    yields the GFA lines of the nodes and the links between them in lists of about batch_size lines
+
+    :param graph: A graph object from class Graph
+    :param set_of_nodes: node ids to give the lines of, all nodes if None
+    :param batch_size: number of lines after which a list is given
     """
     nodes = graph.nodes
     if set_of_nodes is None:
-        set_of_nodes = graph.nodes.keys()
-
-    if append is False:
-        f = open(output_file, "w+")
+        set_of_nodes = nodes
+        keep = nodes
+    elif isinstance(set_of_nodes, (set, frozenset, dict)):
+        keep = set_of_nodes
     else:
-        if os.path.exists(output_file):
-            f = open(output_file, "a")
-        else:
-            logging.warning("Trying to append to a non-existent file\n"
-                            "creating an output file")
-            f = open(output_file, "w+")
+        # lists and dict views are made into a set once for the edge checks
+        keep = set(set_of_nodes)
+    sequences = SequenceSource(graph.graph_file)
+
+    batch = []
     for n1 in set_of_nodes:
         if n1 not in nodes:
             logging.warning("Node {} does not exist in the graph, skipped in output".format(n1))
             continue
 
-        # else:
-        if nodes[n1].optional:  # if there are extra tags, write them as is
-            line = str("\t".join(["S", str(n1), nodes[n1].seq, nodes[n1].optional]))
-        else:
-            line = str("\t".join(["S", str(n1), nodes[n1].seq]))
+        batch.extend(node_lines(nodes, n1, keep, sequences))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
 
-        line = line + "\n"
-        f.write(line)
+def copy_gfa_lines(graph, gfa_file, output_file, compression=None):
+    """
+    Streams the source GFA into output_file keeping only what is still in the graph
+    after nodes or edges were removed, the kept lines are copied as they are with their tags
 
-        # writing edges
-        edges = []
-        # overlap = str(graph.k - 1) + "M\n"
+    H lines are kept, S and L lines are kept if their node or edge is still in the graph
+    and the other records (P, W, ...) are skipped as their nodes may be gone
 
-        for n in nodes[n1].start:
-            overlap = str(n[2]) + "M\n"
+    :param graph: A graph object from class Graph
+    :param gfa_file: the GFA the graph was read from
+    :param output_file: path to output file
+    :param compression: None, "gzip" or "bgzip", files ending with .gz are gzip compressed if None
+    :return: (number of S lines, number of L lines) written
+    """
+    n_segments = n_links = n_others = 0
+    f = open_output(output_file, compression=compression)
+    with open(gfa_file, "r") as infile:
+        for line in infile:
+            if line[0] == "S":
+                if line.rstrip("\r\n").split("\t", 2)[1] in graph:
+                    f.write(line)
+                    n_segments += 1
+            elif line[0] == "L":
+                if graph.has_edge(parse_link(line.rstrip("\r\n").split("\t", 6))):
+                    f.write(line)
+                    n_links += 1
+            elif line[0] == "H":
+                f.write(line)
+            elif line.strip():
+                n_others += 1
+    f.close()
+    if n_others:
+        logging.warning(f"{n_others} lines that are not H, S or L were not copied to {output_file}")
+    return n_segments, n_links
 
-            if n[0] in set_of_nodes:
-                if n[1] == 0:
-                    edge = str("\t".join(("L", str(n1), "-", str(n[0]), "+", overlap)))
-                    edges.append(edge)
-                else:
-                    edge = str("\t".join(("L", str(n1), "-", str(n[0]), "-", overlap)))
-                    edges.append(edge)
 
-        for n in nodes[n1].end:
-            overlap = str(n[2]) + "M\n"
+class ComponentRouter:
+    """
+    Sends GFA lines to the file of their component
 
-            if n[0] in set_of_nodes:
-                if n[1] == 0:
-                    edge = str("\t".join(("L", str(n1), "+", str(n[0]), "+", overlap)))
-                    edges.append(edge)
-                else:
-                    edge = str("\t".join(("L", str(n1), "+", str(n[0]), "-", overlap)))
-                    edges.append(edge)
+    The lines are buffered per component and flushed when the buffers get
+    bigger than buffer_size, the files are kept in a pool of at most max_open_files
+    handles and the least recently used handle is closed when the pool is full.
+    With single_file, everything goes to that one file and each line gets a CC:i:<rank> tag.
+    With paths, a dict of rank to file path, the ranks go to these files instead of component<rank>.gfa
+    """
+
+    def __init__(self, output_dir=".", single_file=None, max_open_files=256, buffer_size=2**25, paths=None):
+        self.output_dir = output_dir
+        self.paths = paths
+        self.single_file = single_file
+        self.max_open_files = max_open_files
+        self.buffer_size = buffer_size
+        self.buffers = dict()
+        self.buffered = 0
+        self.handles = OrderedDict()
+        self.started = set()
+        if single_file is not None:
+            self.single_handle = open(single_file, "w")
+
+    def path(self, rank):
+        if self.paths is not None:
+            return self.paths[rank]
+        return self.output_dir + os.path.sep + "component{}.gfa".format(rank)
+
+    def add(self, rank, line):
+        """
+        adds a line (ending with a new line) to the component with this rank
+        """
+        if self.single_file is not None:
+            self.single_handle.write("{}\tCC:i:{}\n".format(line[:-1], rank))
+            return
+        buffer = self.buffers.get(rank)
+        if buffer is None:
+            buffer = self.buffers[rank] = []
+        buffer.append(line)
+        self.buffered += len(line)
+        if self.buffered > self.buffer_size:
+            self.flush()
+
+    def handle(self, rank):
+        f = self.handles.get(rank)
+        if f is not None:
+            self.handles.move_to_end(rank)
+            return f
+        if len(self.handles) >= self.max_open_files:
+            _, oldest = self.handles.popitem(last=False)
+            oldest.close()
+        # the first open truncates, the later ones append to what was written before
+        f = open(self.path(rank), "a" if rank in self.started else "w")
+        self.started.add(rank)
+        self.handles[rank] = f
+        return f
+
+    def flush(self):
+        for rank, lines in self.buffers.items():
+            self.handle(rank).writelines(lines)
+        self.buffers = dict()
+        self.buffered = 0
+
+    def close(self, ranks=()):
+        """
+        flushes and closes everything, the ranks that never got a line still get an empty file
+        """
+        if self.single_file is not None:
+            self.single_handle.close()
+            return
+        self.flush()
+        for rank in ranks:
+            if rank not in self.started:
+                self.handle(rank)
+        for f in self.handles.values():
+            f.close()
+        self.handles = OrderedDict()
+
+
+def write_components(graph, labels_of, ranks, output_dir=".", single_file=None,
+                     source=None, max_open_files=256):
+    """
+    Writes several components in one pass instead of one write_gfa per component
+
+    :param graph: graph object from class Graph
+    :param labels_of: function from a node id to its component label, -1 if the node is not in the graph
+    :param ranks: list of component labels to write, ranks[i] goes to component{i + 1}.gfa
+    :param output_dir: directory of the component files
+    :param single_file: if given all components go to this file with a CC:i:<rank> tag on each line
+    :param source: GFA file to stream the S and L lines from so they are copied with all their tags,
+        if None the lines are made from the nodes in memory
+    :param max_open_files: most files kept open at the same time
+    """
+    rank_of_label = dict()
+    for i, label in enumerate(ranks):
+        rank_of_label[label] = i + 1
+    router = ComponentRouter(output_dir, single_file, max_open_files)
+
+    if source is not None:
+        with open(source, "r") as lines:
+            for line in lines:
+                if line.startswith("S") or line.startswith("L"):
+                    fields = line.split("\t", 4)
+                    label = labels_of(fields[1])
+                    # links to nodes not in the graph are dropped like in read_gfa
+                    if label == -1 or (line.startswith("L") and labels_of(fields[3]) == -1):
+                        continue
+                    rank = rank_of_label.get(label)
+                    if rank is not None:
+                        if not line.endswith("\n"):
+                            line += "\n"
+                        router.add(rank, line)
+    else:
+        nodes = graph.nodes
+        sequences = SequenceSource(graph.graph_file)
+        for n1 in nodes:
+            rank = rank_of_label.get(labels_of(n1))
+            if rank is not None:
+                for line in node_lines(nodes, n1, nodes, sequences):
+                    router.add(rank, line)
 
-        for e in edges:
-            f.write(e)
+    router.close(range(1, len(ranks) + 1))
 
-    f.close()
 
+def open_sequences(gfa_file_path):
+    """
+    memory maps the GFA file read-only so sequences can be sliced at their file offsets
+    without loading them, only the pages that are read are brought into memory
+    """
+    if os.path.getsize(gfa_file_path) == 0:  # empty files cannot be mapped
+        return b""
+    with open(gfa_file_path, "rb") as infile:
+        return mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def log_read_stats(gfa_file_path, n_lines, n_segments, n_links, elapsed):
+    profiling.add("parse", seconds=elapsed, lines=n_lines, segments=n_segments, links=n_links)
+    rate = n_lines / elapsed if elapsed > 0 else 0
+    peak = peak_rss_mb()
+    peak = "unknown" if peak is None else "{:.1f} MiB".format(peak)
+    logging.info(f"Read {gfa_file_path}: {n_lines} lines ({n_segments} segments, {n_links} links) "
+                 f"in {elapsed:.2f}s, {rate:.0f} lines/sec, peak RSS {peak}")
+
+
+def parse_link(line):
+    """
+    parses an L line into (node1, side1, node2, side2, overlap)
+    side 0 is the start of a node and side 1 is its end, so L x - y - is from start of x to end of y
+
+    :param line: the L line already split on tabs
+    """
+    if line[5] == "*":
+        overlap = 0
+    else:
+        overlap = int(line[5][:-1])
+    side1 = 0 if line[2] == "-" else 1
+    side2 = 1 if line[4] == "-" else 0
+    return line[1], side1, line[3], side2, overlap
+
+
+def link_key(n1, side1, n2, side2, overlap):
+    """
+    returns the two (node, side) ends of a link in a fixed order, the same for an L line and its reverse,
+    a link read again with another overlap has the same key and replaces the first one
+    """
+    if (n1, side1) <= (n2, side2):
+        return n1, side1, n2, side2
+    return n2, side2, n1, side1
+
+
+def edge_tag_specs(edge_tags):
+    """
+    turns tag names like "ec", "ec:i" or "dv:f" into (name, array typecode) pairs,
+    integer tags (the default) are kept as int64 and float tags as float64
+    """
+    specs = []
+    for tag in edge_tags:
+        name, _, tag_type = tag.partition(":")
+        specs.append((name, 'd' if tag_type == "f" else 'q'))
+    return specs
+
+
+def parse_tag_values(line, specs):
+    """
+    returns the values of the tags in specs from an L line, 0 for the tags the line does not have
+
+    :param line: the stripped L line split with split("\t", 6), so the tags are all in line[6]
+    :param specs: (name, typecode) pairs from edge_tag_specs
+    :return: list of values and the number of tags that were missing
+    """
+    values = [0] * len(specs)
+    missing = len(specs)
+    if len(line) > 6:
+        for tag in line[6].split("\t"):
+            name, _, value = tag.split(":", 2)
+            for i, (spec_name, code) in enumerate(specs):
+                if name == spec_name:
+                    values[i] = float(value) if code == 'd' else int(value)
+                    missing -= 1
+    return values, missing
+
+
+def add_edge(nodes, n1, side1, n2, side2, overlap):
+    """
+    adds an edge to both nodes, the edge is given the same way as in Graph.remove_edge
+    """
+    if side1 == 0:
+        nodes[n1].add_to_start(n2, side2, overlap)
+    else:
+        nodes[n1].add_to_end(n2, side2, overlap)
 
-def read_gfa(gfa_file_path, low_mem=False):
+    if side2 == 0:
+        nodes[n2].add_to_start(n1, side1, overlap)
+    else:
+        nodes[n2].add_to_end(n1, side1, overlap)
+
+
+def read_gfa(gfa_file_path, low_mem=False, edge_counts=None):
     """
-    Read a gfa file
+    Read a gfa file in one pass
+
+    The edges are added to the nodes as the L lines are read, only the links
+    that come before one of their segments are kept aside and added at the end,
+    so the memory is that of the graph and not that of the file.
+    A link given again by a later L line keeps the overlap of the last line,
+    also when the first one was kept aside, like read_gfa_compact.
 
     :param gfa_file_path: gfa graph file.
+    :param low_mem: if True the sequences are not kept, only their offsets in the file
+    :param edge_counts: if a dict is given, it is filled with the ec:i count of each link
+        keyed by (node1, side1, node2, side2, overlap) like get_edges_counts returns, 0 when missing
     """
     if not os.path.exists(gfa_file_path):
         logging.error("the gfa file path you gave does not exists, please try again!")
         sys.exit()
 
     nodes = dict()
-    edges = []
-
-    with open(gfa_file_path, "r") as lines:
-        for line in lines:
-            if line.startswith("S"):
-                line = line.strip().split()
-                n_id = str(line[1])
-                n_len = len(line[2])
-                nodes[n_id] = Node(n_id)
-
-                nodes[n_id].seq_len = n_len
+    # links seen before their segments by link_key
+    pending = dict()
+    n_lines = n_segments = n_links = 0
+    no_count = 0
+    count_spec = edge_tag_specs(["ec"])
+    offset = 0
+    start_time = time.perf_counter()
+
+    # reading as bytes to know the file offset of each sequence
+    with open(gfa_file_path, "rb") as lines:
+        for raw in lines:
+            n_lines += 1
+            if raw.startswith(b"S"):
+                n_segments += 1
+                line = raw.decode().rstrip("\r\n").split("\t")
+                n_id = line[1]
+                # a repeated S line updates the node and keeps its edges
+                if n_id not in nodes:
+                    nodes[n_id] = Node(n_id)
+                node = nodes[n_id]
+
+                node.seq_len = len(line[2])
                 if not low_mem:
-                    nodes[n_id].seq = str(line[2]).strip()
+                    node.seq = line[2]
                 else:
-                    nodes[n_id].seq = "*"
+                    # only where the sequence is in the file is kept, like a FASTA .fai
+                    node.seq = "*"
+                    node.seq_pos = offset + raw.index(b"\t", 2) + 1
                 # adding the extra tags if any to the node object
                 if len(line) > 3:
-                    nodes[n_id].optional = "\t".join(line[3:])
-
-            elif line.startswith("L"):
-                edges.append(line)
-
-    for e in edges:
-        line = e.split()
-
-        # I take the overlap in 5 and see if there are any more tags and make a dict out of them
-        k = line[1]
-        if k not in nodes:  # if the edge is there but not the node
-            continue
-        if line[5] == "*":
-            overlap = 0
-        else:
-            overlap = int(line[5][:-1])
-
-        neighbor = line[3]
-        if neighbor not in nodes:
-            continue
-
-        if line[2] == "-":
-            from_start = True
-        else:
-            from_start = False
-
-        if line[4] == "-":
-            to_end = True
-        else:
-            to_end = False
+                    node.optional = "\t".join(line[3:])
+
+            elif raw.startswith(b"L"):
+                n_links += 1
+                line = raw.decode().rstrip("\r\n").split("\t", 6)
+                edge = parse_link(line)
+                if edge_counts is not None:
+                    values, missing = parse_tag_values(line, count_spec)
+                    edge_counts[edge] = values[0]
+                    no_count += missing
+                if edge[0] in nodes and edge[2] in nodes:
+                    add_edge(nodes, *edge)
+                    if pending:
+                        # the later line replaces a copy of the link that waits for its segments
+                        pending.pop(link_key(*edge), None)
+                else:
+                    pending[link_key(*edge)] = edge
 
-        if from_start and to_end:  # from start to end L x - y -
-            if (neighbor, 1, overlap) not in nodes[k].start:
-                nodes[k].start.add((neighbor, 1, overlap))
-            if (k, 0, overlap) not in nodes[neighbor].end:
-                nodes[neighbor].end.add((k, 0, overlap))
+            offset += len(raw)
 
-        elif from_start and not to_end:  # from start to start L x - y +
+    for edge in pending.values():
+        # if the edge is there but not the node
+        if edge[0] in nodes and edge[2] in nodes:
+            add_edge(nodes, *edge)
 
-            if (neighbor, 0, overlap) not in nodes[k].start:
-                nodes[k].start.add((neighbor, 0, overlap))
+    if no_count:
+        logging.warning(f"{no_count} edges do not have the ec tag, their count is 0")
+    log_read_stats(gfa_file_path, n_lines, n_segments, n_links, time.perf_counter() - start_time)
+    return nodes
 
-            if (k, 0, overlap) not in nodes[neighbor].start:
-                nodes[neighbor].start.add((k, 0, overlap))
 
-        elif not from_start and not to_end:  # from end to start L x + y +
-            if (neighbor, 0, overlap) not in nodes[k].end:
-                nodes[k].end.add((neighbor, 0, overlap))
+def read_gfa_compact(gfa_file_path, low_mem=False, edge_tags=()):
+    """
+    Read a gfa file into an array-backed CompactNodes instead of a dict of Node objects
 
-            if (k, 1, overlap) not in nodes[neighbor].start:
-                nodes[neighbor].start.add((k, 1, overlap))
+    :param gfa_file_path: gfa graph file.
+    :param low_mem: if True the sequences are not kept, only their offsets in the file
+    :param edge_tags: numeric L line tags to keep in arrays aligned with the adjacency,
+        e.g. ["ec"] for the edge counts, see edge_tag_specs
+    """
+    if not os.path.exists(gfa_file_path):
+        logging.error("the gfa file path you gave does not exists, please try again!")
+        sys.exit()
 
-        elif not from_start and to_end:  # from end to end L x + y -
-            if (neighbor, 1, overlap) not in nodes[k].end:
-                nodes[k].end.add((neighbor, 1, overlap))
+    specs = edge_tag_specs(edge_tags)
+    builder = CompactBuilder(low_mem=low_mem, edge_tags=specs)
+    missing_tags = 0
+    n_lines = n_segments = n_links = 0
+    offset = 0
+    start_time = time.perf_counter()
+    # reading as bytes to know the file offset of each sequence
+    with open(gfa_file_path, "rb") as lines:
+        for line in lines:
+            n_lines += 1
+            if line.startswith(b"S"):
+                n_segments += 1
+                fields = line.rstrip(b"\r\n").split(b"\t")
+                seq_start = offset + len(fields[0]) + len(fields[1]) + 2
+                if len(fields) > 3:
+                    optional = b"\t".join(fields[3:]).decode()
+                else:
+                    optional = ""
+                builder.add_segment(fields[1].decode(), fields[2], optional, seq_start)
+
+            elif line.startswith(b"L"):
+                n_links += 1
+                fields = line.decode().rstrip("\r\n").split("\t", 6)
+                if specs:
+                    values, missing = parse_tag_values(fields, specs)
+                    missing_tags += missing
+                    builder.add_link(*parse_link(fields), values)
+                else:
+                    builder.add_link(*parse_link(fields))
 
-            if (k, 1, overlap) not in nodes[neighbor].end:
-                nodes[neighbor].end.add((k, 1, overlap))
+            offset += len(line)
 
+    nodes = builder.finish()
+    if low_mem:
+        # the sequences are sliced from the file itself when needed
+        nodes.seq_data = open_sequences(gfa_file_path)
+    if missing_tags:
+        logging.warning(f"{missing_tags} edge tags were missing from L lines, they are 0")
+    log_read_stats(gfa_file_path, n_lines, n_segments, n_links, time.perf_counter() - start_time)
     return nodes
 
 
@@ -0,0 +1,136 @@
+import time
+import logging
+from collections import defaultdict
+from GFASubgraph.multi_bfs import map_chunks, multi_source_distance
+
+
+# the most start nodes of the bounded check searched together, see _check_groups_bounded
+UNION_GROUP = 16
+
+
+def chromosome_groups(graph, neighborhood):
+    """
+    returns a dict of chromosome and the nodes of the neighborhood on it,
+    or None when the neighborhood touches one chromosome or none.
+    The chromosomes are taken from graph.annotations if they were loaded there
+    and from the chromosome of each node otherwise
+    """
+    chromosomes = graph.annotations.get("chromosome")
+    if chromosomes is not None:
+        # only the codes are compared, the dict is built for the few mixed neighborhoods
+        if chromosomes.n_labels(neighborhood) <= 1:
+            return None
+        return chromosomes.groups(neighborhood)
+
+    chrom_set = defaultdict(list)
+    for n in neighborhood:
+        if graph[n].chromosome:
+            chrom_set[graph[n].chromosome].append(n)
+    if len(chrom_set) <= 1:
+        return None
+    return chrom_set
+
+
+def group_candidates(graph, edges):
+    """
+    dedupes the candidate edges by the node their bfs starts from, so the edges with the same
+    start node are checked with one bfs instead of one each. With a size, edges with different
+    start nodes still get their own bfs even when their neighborhoods overlap, as each neighborhood
+    is cut at its own size; with bp/hop bounds, nearby groups share searches in _check_groups_bounded.
+    The groups keep the order the edges come in
+
+    :param edges: edges as (node1, side1, node2, side2, overlap), the bfs starts from node1
+    :return: list of (start node, [edges])
+    """
+    by_start = dict()
+    for e in edges:
+        if e[0] in graph and e[2] in graph:
+            by_start.setdefault(e[0], []).append(e)
+        else:
+            logging.warning(f"The edge {e} has a node that is not in the graph, skipping")
+    return list(by_start.items())
+
+
+def _check_groups(graph, groups, size):
+    """
+    runs one bfs per distinct start node and returns [(edge, chromosomes dict), ...] for the problem edges
+    """
+    problems = []
+    for start_node, edges in groups:
+        chrom_set = chromosome_groups(graph, graph.bfs(start_node, size))
+        if chrom_set:
+            for e in edges:
+                problems.append((e, chrom_set))
+    return problems
+
+
+def _check_groups_bounded(graph, groups, bounds):
+    """
+    same as _check_groups with the neighborhoods bounded by (max bp, max hops) instead of a size
+
+    Up to UNION_GROUP groups next to each other share one search from all their start nodes, that is
+    the union of their neighborhoods with each node expanded once. When it is on one chromosome none of
+    them is a problem, otherwise they are split in halves that are searched again, down to one start node
+    whose search is its own neighborhood, so the problems are the same as with one search per start node
+    """
+    max_bp, max_hops = bounds
+    problems = []
+    # a stack of runs of groups, the first run on top so the problems keep the order of the groups
+    parts = [groups[i:i + UNION_GROUP] for i in range(0, len(groups), UNION_GROUP)]
+    parts.reverse()
+    while parts:
+        part = parts.pop()
+        neighborhood = multi_source_distance(graph, [start_node for start_node, _ in part], max_bp, max_hops)
+        chrom_set = chromosome_groups(graph, neighborhood)
+        if not chrom_set:
+            continue
+        if len(part) == 1:
+            for e in part[0][1]:
+                problems.append((e, chrom_set))
+        else:
+            half = len(part) // 2
+            parts.append(part[half:])
+            parts.append(part[:half])
+    return problems
+
+
+def iter_problem_edges(graph, edges, size, cores=1, chunk_size=None, max_bp=None, max_hops=None):
+    """
+    checks the neighborhood around each candidate edge and yields the edges with nodes
+    from more than one chromosome around them, as the workers finish them
+
+    :param graph: A graph object from class Graph with the chromosomes set on the nodes
+    :param edges: candidate edges as (node1, side1, node2, side2, overlap)
+    :param size: size of the neighborhood around each edge
+    :param cores: number of worker processes
+    :param chunk_size: number of start nodes given to a worker at once, chosen from the number of nodes if None
+    :param max_bp: if given with or without max_hops, the neighborhoods are every node within max_bp bp
+        and max_hops edges of the edge instead of size nodes, see multi_bfs.multi_source_distance
+    :param max_hops: bound on the edges from the candidate edge, see max_bp
+    :return: generator of (edge, dict of chromosome and list of nodes)
+    """
+    groups = group_candidates(graph, edges)
+    worker = _check_groups
+    if max_bp is not None or max_hops is not None:
+        worker = _check_groups_bounded
+        size = (max_bp, max_hops)
+    n_edges = sum(len(group[1]) for group in groups)
+    logging.info(f"{n_edges} candidate edges start from {len(groups)} nodes")
+    start = time.perf_counter()
+    yield from map_chunks(graph, groups, size, cores, chunk_size, worker)
+    elapsed = time.perf_counter() - start
+    logging.info(f"Checked {n_edges} edges in {elapsed:.2f} seconds "
+                 f"({n_edges / max(elapsed, 1e-9):.0f} edges/sec)")
+
+
+def problem_edge_lines(edge, chrom_set):
+    """
+    TSV lines for one problem edge, one per chromosome with
+    node1, orientation1, node2, orientation2, overlap, chromosome and the comma separated nodes
+    """
+    n1, side1, n2, side2, overlap = edge
+    # the link leaves node1 from its end when it is +, and enters node2 from its end when it is -
+    orient1 = "+" if side1 else "-"
+    orient2 = "-" if side2 else "+"
+    prefix = f"{n1}\t{orient1}\t{n2}\t{orient2}\t{overlap}M"
+    return [f"{prefix}\t{chrom}\t{','.join(nodes)}\n" for chrom, nodes in chrom_set.items()]
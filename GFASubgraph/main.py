@@ -1,326 +1,647 @@
+import os
+import sys
+import logging
 import argparse
-import random
-import pickle
-import pdb
-import multiprocessing as mp
-from GFASubgraph.main_helpers import *
-from GFASubgraph.graph_io import write_gfa, get_edges_counts
-from GFASubgraph.Graph import Graph
-from GFASubgraph.connected_components import all_components
-from GFASubgraph.x11_colors import color_list
+from GFASubgraph import profiling
+from GFASubgraph.main_helpers import error, warning
 
+# the modules each subcommand needs are imported in its run_ function,
+# so a call only pays for the imports of the subcommand it runs
 
-parser = argparse.ArgumentParser(description='Output neighborhood in Graph', add_help=True)
-subparsers = parser.add_subparsers(help='Available subcommands', dest="subcommands")
 
-parser._positionals.title = 'Subcommands'
-parser._optionals.title = 'Global Arguments'
+def build_parser():
+    """
+    returns the argument parser of all subcommands
+    """
+    parser = argparse.ArgumentParser(description='Output neighborhood in Graph', add_help=True)
+    subparsers = parser.add_subparsers(help='Available subcommands', dest="subcommands")
 
-########################## general commands ###############################
-parser.add_argument("-g", "--in_graph", metavar="GRAPH_PATH", dest="in_graph",
-                    default=None, type=str, help="graph file path (GFA or VG)")
+    parser._positionals.title = 'Subcommands'
+    parser._optionals.title = 'Global Arguments'
 
-parser.add_argument("--log_file", dest="log_file", type=str, default="log.log",
-                    help="The name/path of the log file. Default: log.log")
+    ########################## general commands ###############################
+    parser.add_argument("-g", "--in_graph", metavar="GRAPH_PATH", dest="in_graph",
+                        default=None, type=str, help="graph file path (GFA or VG)")
 
-parser.add_argument("--log", dest="log_level", type=str, default="DEBUG",
-                    help="The logging level [DEBUG, INFO, WARNING, ERROR, CRITICAL]")
+    parser.add_argument("--low_mem", dest="low_mem", action="store_true", default=False,
+                        help="Do not keep the sequences in memory, they are read from the GFA file when writing outputs")
 
-########################## Output components ###############################
-comp_parser = subparsers.add_parser('output_comps',
-                                    help='Command for outputting each connected component in a separate GFA file')
+    parser.add_argument("--compact", dest="compact", action="store_true", default=False,
+                        help="Keep the graph in flat arrays instead of a Node object per node, which needs a fraction "
+                             "of the memory. low_cov_edges and filter --min_edge_count always use it")
 
-comp_parser.add_argument("--output_dir", dest="output_dir", metavar="OUTPUT_DIR",
-                         type=str, default=".", help="Output neighborhood file")
+    parser.add_argument("--threads", dest="threads", type=int, default=1,
+                        help="Number of processes used to parse the GFA file. Default: 1")
 
-comp_parser.add_argument("-n", "--n-components", dest="n_comps", type=int, default=0,
-                         help="If you want to output the n largest components in node size. Default: all")
+    parser.add_argument("--bfs_cache", dest="bfs_cache", metavar="MB", type=int, default=0,
+                        help="Keep up to MB megabytes of bfs neighborhoods to answer repeated searches, "
+                             "each worker process has its own cache. Default: 0 (no cache)")
 
-comp_parser.add_argument("--seq-size", dest="seq_size", action="store_true", default=False,
-                         help="If this argument given, then the components are sorted based on the seq size, "
-                              "otherwise the number of nodes is used")
+    parser.add_argument("--log_file", dest="log_file", type=str, default="log.log",
+                        help="The name/path of the log file. Default: log.log")
 
-########################## BFS commands ###############################
-bfs_parser = subparsers.add_parser('bfs', help='Command for separating neighborhood')
+    parser.add_argument("--log", dest="log_level", type=str, default="DEBUG",
+                        help="The logging level [DEBUG, INFO, WARNING, ERROR, CRITICAL]")
 
-bfs_parser.add_argument("--start", dest="starting_nodes", metavar="START_NODES", type=str, nargs="+",
-                        default=None, help="Give the starting node(s) for neighborhood extraction")
+    parser.add_argument("--profile", dest="profile", metavar="REPORT", type=str, default=None,
+                        help="Write a JSON report of the time, counters and peak memory of each stage "
+                             "(parse, traversal, components, write...) to REPORT")
 
-bfs_parser.add_argument("--start_list", dest="starting_list", type=str, default=None,
-                        help="a filwith a list of start node, each node id in one line")
+    parser.add_argument("--profiler", dest="profiler", choices=["cprofile", "pyinstrument"], default=None,
+                        help="With --profile, also run the subcommand under this profiler, the output goes next "
+                             "to REPORT (.prof for cProfile, .html for pyinstrument which has to be installed)")
 
-bfs_parser.add_argument("--cores", dest="cores", default=1, type=int,
-                        help="number of threads")
+    ########################## Index ###############################
+    subparsers.add_parser('index',
+                          help='Command for writing a binary index next to the graph (GRAPH_PATH.gsi) '
+                               'that the other subcommands load with --compact instead of parsing the GFA')
 
-bfs_parser.add_argument("--neighborhood_size", dest="bfs_len", metavar="SIZE", default=5,
-                        type=int, help="With -s --start option, size of neighborhood to extract. Default: 5")
+    ########################## Output components ###############################
+    comp_parser = subparsers.add_parser('output_comps',
+                                        help='Command for outputting each connected component in a separate GFA file')
 
-bfs_parser.add_argument("--output_neighborhood", dest="output_neighborhood", metavar="OUTPUT",
-                        type=str, default=None, help="Output neighborhood file")
+    comp_parser.add_argument("--output_dir", dest="output_dir", metavar="OUTPUT_DIR",
+                             type=str, default=".", help="Output neighborhood file")
 
-bfs_parser.add_argument("--append", dest="append", action="store_true", default=False,
-                         help="If used, then the output graph will be appended to any graph with the same name that exist, otherwise will be created")
+    comp_parser.add_argument("-n", "--n-components", dest="n_comps", type=int, default=0,
+                             help="If you want to output the n largest components in node size. Default: all")
 
-########################## Alignment subgraph ###############################
-alignment_subgraph = subparsers.add_parser('alignment_subgraph', help='Command for outputting each '
-                                                                      'connected component in a separate GFA file')
+    comp_parser.add_argument("--seq-size", dest="seq_size", action="store_true", default=False,
+                             help="If this argument given, then the components are sorted based on the seq size, "
+                                  "otherwise the number of nodes is used")
 
-alignment_subgraph.add_argument("--input_gaf", dest="input_gaf", metavar="INPUT_GAF",
-                                type=str, default=None, help="The input alignment gaf file")
+    comp_parser.add_argument("--single-file", dest="single_file", metavar="OUTPUT", type=str, default=None,
+                             help="Write all the components in this one GFA file instead of one file each, "
+                                  "every line gets a CC:i: tag with the component number")
 
-alignment_subgraph.add_argument("--alignment_list", dest="alignment_list", type=str, default=None,
-                                help="List of sequence names from the GAF file to separate, if not given "
-                                     "all alignments in GAF will be considered")
+    ########################## BFS commands ###############################
+    bfs_parser = subparsers.add_parser('bfs', help='Command for separating neighborhood')
 
-alignment_subgraph.add_argument("--neighborhood_size", dest="bfs_len", metavar="SIZE", default=3,
-                                type=int, help="the neighborhood size around each node in the alignment path, "
-                                               "default: 3")
+    bfs_parser.add_argument("--start", dest="starting_nodes", metavar="START_NODES", type=str, nargs="+",
+                            default=None, help="Give the starting node(s) for neighborhood extraction")
 
-alignment_subgraph.add_argument("--prefix", dest="prefix", type=str, default="alignment_subgraph",
-                                help="prefix for the output files")
+    bfs_parser.add_argument("--start_list", dest="starting_list", type=str, default=None,
+                            help="a filwith a list of start node, each node id in one line")
 
+    bfs_parser.add_argument("--cores", dest="cores", default=1, type=int,
+                            help="number of worker processes sharing the graph")
 
-########################## Remove low coverage edges ###############################
-low_cov_edges = subparsers.add_parser('low_cov_edges',
-                                      help='Command for outputting each connected component in a separate GFA file')
+    bfs_parser.add_argument("--neighborhood_size", dest="bfs_len", metavar="SIZE", default=5,
+                            type=int, help="With -s --start option, size of neighborhood to extract. Default: 5")
 
+    bfs_parser.add_argument("--max_bp", dest="max_bp", metavar="BP", default=None, type=int,
+                            help="take every node within BP base pairs of the start nodes instead of "
+                                 "a neighborhood of --neighborhood_size nodes, can be combined with --max_hops")
 
-low_cov_edges.add_argument("--coverage_cutoff", dest="edge_cov_cutoff", default=1,
-                           type=int, help="the neighborhood size around each node in the alignment path, default: 0")
+    bfs_parser.add_argument("--max_hops", dest="max_hops", metavar="HOPS", default=None, type=int,
+                            help="take every node at most HOPS edges away from the start nodes "
+                                 "instead of a neighborhood of --neighborhood_size nodes")
 
+    bfs_parser.add_argument("--output_neighborhood", dest="output_neighborhood", metavar="OUTPUT",
+                            type=str, default=None, help="Output neighborhood file")
 
-low_cov_edges.add_argument("--neighborhood_size", dest="bfs_len", metavar="SIZE", default=50,
-                           type=int, help="the neighborhood size around low-coverage nodes default: 50")
+    bfs_parser.add_argument("--append", dest="append", action="store_true", default=False,
+                             help="If used, then the output graph will be appended to any graph with the same name that exist, otherwise will be created")
 
+    ########################## Alignment subgraph ###############################
+    alignment_subgraph = subparsers.add_parser('alignment_subgraph', help='Command for outputting each '
+                                                                          'connected component in a separate GFA file')
 
-low_cov_edges.add_argument("--nodes_info", dest="nodes_info", type=str,
-                           default=None, help="Two column TSV of node ids and their chromosome")
+    alignment_subgraph.add_argument("--input_gaf", dest="input_gaf", metavar="INPUT_GAF",
+                                    type=str, default=None, help="The input alignment gaf file")
 
-low_cov_edges.add_argument("--output_edges", dest="out_edges",
-                           type=str, default="problem_edges.pickle",
-                           help="pickled dict with problem edges and the chromosomes around them")
+    alignment_subgraph.add_argument("--alignment_list", dest="alignment_list", type=str, default=None,
+                                    help="List of sequence names from the GAF file to separate, if not given "
+                                         "all alignments in GAF will be considered")
 
+    alignment_subgraph.add_argument("--neighborhood_size", dest="bfs_len", metavar="SIZE", default=3,
+                                    type=int, help="the neighborhood size around each node in the alignment path, "
+                                                   "default: 3")
 
-args = parser.parse_args()
+    alignment_subgraph.add_argument("--max_hops", dest="max_hops", metavar="HOPS", default=None, type=int,
+                                    help="take every node at most HOPS edges away from the alignment paths "
+                                         "instead of a neighborhood of --neighborhood_size nodes around each path node")
 
-log_file = args.log_file
+    alignment_subgraph.add_argument("--max_bp", dest="max_bp", metavar="BP", default=None, type=int,
+                                    help="take every node within BP base pairs of the alignment paths instead of "
+                                         "a neighborhood of --neighborhood_size nodes, can be combined with --max_hops")
 
-logging.basicConfig(filename=log_file, filemode='w',
-                    format='[%(asctime)s] %(message)s',
-                    level=getattr(logging, args.log_level.upper()))
+    alignment_subgraph.add_argument("--cores", dest="cores", default=1, type=int,
+                                    help="number of processes for the neighborhoods around the path nodes, default: 1")
 
-logging.info(" ".join(["arguments given:"] + sys.argv))
+    alignment_subgraph.add_argument("--prefix", dest="prefix", type=str, default="alignment_subgraph",
+                                    help="prefix for the output files")
 
+    alignment_subgraph.add_argument("--split_components", dest="split_components", action="store_true", default=False,
+                                    help="also write each connected component of the subgraph in a separate GFA "
+                                         "file in the directory PREFIXcomponents")
 
-def main():
-    if len(sys.argv) == 1:
-        print("You did not provide any arguments\n"
-              "Try to use -h or --help for help")
-        sys.exit()
 
-    if args.subcommands is None:
-        print("Please provide a subcommand after the global commands")
-        sys.exit(1)
+    ########################## Remove low coverage edges ###############################
+    low_cov_edges = subparsers.add_parser('low_cov_edges',
+                                          help='Command for outputting each connected component in a separate GFA file')
+
+
+    low_cov_edges.add_argument("--coverage_cutoff", dest="edge_cov_cutoff", default=1,
+                               type=int, help="the neighborhood size around each node in the alignment path, default: 0")
+
+
+    low_cov_edges.add_argument("--neighborhood_size", dest="bfs_len", metavar="SIZE", default=50,
+                               type=int, help="the neighborhood size around low-coverage nodes default: 50")
+
+
+    low_cov_edges.add_argument("--max_bp", dest="max_bp", metavar="BP", default=None, type=int,
+                               help="check every node within BP base pairs of the edge instead of "
+                                    "a neighborhood of --neighborhood_size nodes, can be combined with --max_hops")
+
+    low_cov_edges.add_argument("--max_hops", dest="max_hops", metavar="HOPS", default=None, type=int,
+                               help="check every node at most HOPS edges away from the edge instead of "
+                                    "a neighborhood of --neighborhood_size nodes")
+
+    low_cov_edges.add_argument("--nodes_info", dest="nodes_info", type=str,
+                               default=None, help="Two column TSV of node ids and their chromosome")
+
+    low_cov_edges.add_argument("--output_edges", dest="out_edges",
+                               type=str, default="problem_edges.pickle",
+                               help="pickled dict with problem edges and the chromosomes around them, "
+                                    "if the file ends with .tsv the edges are written as they are found "
+                                    "one line per edge and chromosome")
+
+    low_cov_edges.add_argument("--cores", dest="cores", default=1, type=int,
+                               help="number of processes checking the edges, default: 1")
+
+    ########################## Filter ###############################
+    filter_parser = subparsers.add_parser('filter', help='Remove low count edges and nodes outside the degree '
+                                                         'thresholds and write the cleaned graph')
+
+    filter_parser.add_argument("--min_edge_count", dest="min_edge_count", metavar="N", type=int, default=None,
+                               help="remove the edges with an ec:i count below N")
+
+    filter_parser.add_argument("--min_degree", dest="min_degree", metavar="D", type=int, default=None,
+                               help="remove the nodes with less than D edges, after the edges are removed")
+
+    filter_parser.add_argument("--max_degree", dest="max_degree", metavar="D", type=int, default=None,
+                               help="remove the nodes with more than D edges, after the edges are removed")
+
+    filter_parser.add_argument("--output", dest="output", type=str, default="filtered.gfa",
+                               help="output GFA, the kept lines are copied from the input with their tags, "
+                                    "default: filtered.gfa")
+
+    ########################## Batch ###############################
+    batch_parser = subparsers.add_parser('batch', help='Run many neighborhood jobs from a TSV on one loaded graph, '
+                                                       'each job written to its own GFA')
+
+    batch_parser.add_argument("--jobs", dest="jobs", metavar="JOBS_TSV", type=str, default=None,
+                              help="TSV with one job per line: job name, comma separated start nodes, "
+                                   "a neighborhood size (e.g. 50) or distance (e.g. 5000bp) and optionally "
+                                   "the output GFA, which is OUTPUT_DIR/<job name>.gfa if not given")
+
+    batch_parser.add_argument("--output_dir", dest="output_dir", metavar="OUTPUT_DIR", type=str, default=".",
+                              help="directory of the output files, default: .")
+
+    batch_parser.add_argument("--cores", dest="cores", default=1, type=int,
+                              help="number of worker processes running the jobs, default: 1")
+
+    batch_parser.add_argument("--max_open_files", dest="max_open_files", default=256, type=int,
+                              help="most output files kept open at the same time, default: 256")
+
+    ########################## Query server ###############################
+    serve_parser = subparsers.add_parser('serve', help='Load the graph once and answer subgraph queries over HTTP')
+
+    serve_parser.add_argument("--host", dest="host", type=str, default="127.0.0.1",
+                              help="address to listen on, default: 127.0.0.1")
+
+    serve_parser.add_argument("--port", dest="port", type=int, default=8000,
+                              help="port to listen on, default: 8000")
+
+    serve_parser.add_argument("--socket", dest="socket_path", metavar="PATH", type=str, default=None,
+                              help="listen on this unix socket instead of the host and port")
+
+    serve_parser.add_argument("--workers", dest="workers", type=int, default=2,
+                              help="number of processes answering the queries, 0 answers them in "
+                                   "the server process, default: 2")
+
+    return parser
+
+
+def load_graph(args):
+    """
+    loads the input graph of the subcommand with the global options
+    """
+    from GFASubgraph.Graph import Graph
+    logging.info(f"Loading graph {args.in_graph}")
+    # the edge counts are read in the same pass as the graph when they are needed
+    edge_count = args.subcommands == "low_cov_edges" or \
+        (args.subcommands == "filter" and args.min_edge_count is not None)
+    # the compact graph keeps the edge counts in an array next to the edges,
+    # so the low count edges are found with one pass over that array
+    return Graph(args.in_graph, low_mem=args.low_mem, threads=args.threads, compact=args.compact or edge_count,
+                 edge_count=edge_count, cache_bytes=args.bfs_cache * 2**20)
 
-    if args.in_graph is None:
-        print("Please provide an input graph with -g, --in_graph")
-        sys.exit(1)
-    else:
-        logging.info(f"Loading graph {args.in_graph}")
-        graph = Graph(args.in_graph)
 
-    ############################################## biggest component
-    if args.subcommands == "output_comps":
+def run_index(args):
+    """
+    writes the binary index next to the graph
+    """
+    from GFASubgraph.graph_index import write_index
+    if not os.path.exists(args.in_graph):
+        error(f"the file {args.in_graph} does not exist", args.log_file)
+    logging.info(f"Indexing graph {args.in_graph}")
+    write_index(args.in_graph)
+    logging.info("Done...")
+
+
+def run_output_comps(graph, args):
+    """
+    writes the connected components of the graph
+    """
+    from GFASubgraph.connected_components import component_labels, label_lookup
+    from GFASubgraph.graph_io import write_components
+
+    if args.single_file is None:
         if not os.path.isdir(args.output_dir):
             os.mkdir(args.output_dir)
         else:
             logging.warning("Directory {} already exists, will add files to it anyway".format(args.output_dir))
-        # logging.info("Reading Graph...")
-
-        # graph = Graph(graph_file=args.in_graph)
-
-        logging.info("Finding Biggest Component...")
-        connected_comps = all_components(graph)
-        if not connected_comps:
-            logging.error("Something went wrong, there are no components returned")
-            sys.exit()
-        counter = 1
-        logging.info("There are {} components in this graph".format(len(connected_comps)))
-        logging.info("Writing Components...")
-        if args.n_comps != 0:
-            if args.seq_size:
-                connected_comps.sort(key=lambda x: seq_size(graph, x), reverse=True)
-            else:
-                connected_comps.sort(key=lambda x: len(x), reverse=True)
-        else:  # all comps
-            args.n_comps = len(connected_comps)
-        for cc in connected_comps[:args.n_comps]:
-            output_file = args.output_dir + os.path.sep + "component{}.gfa".format(counter)
-            # logging.info("Writing Component {}...".format(output_file))
-            # print("I am here")
-            write_gfa(graph, cc, output_file, False)
-            counter += 1
-
-        logging.info("Done...")
-
-    ############################################## BFS
-    if args.subcommands == "bfs":
-        output_nodes = set()
-        if args.cores > os.cpu_count():
-            print("Your system only have {} available cores at the moment".format(os.cpu_count()))
-            sys.exit()
-        start_nodes = set()
-        if args.starting_nodes is not None:
-            if args.bfs_len is not None:
-                if args.output_neighborhood is not None:
-                    start_nodes = set(args.starting_nodes)
-                else:
-                    error("You need to give an output file name --output_neighborhood", args.log_file)
-            else:
-                error("You did not set the neighborhood size", args.log_file)
+
+    logging.info("Finding the components...")
+    with profiling.stage("components"):
+        ids, labels, sizes, seq_lengths = component_labels(graph)
+    profiling.add("components", components=len(sizes))
+    if len(sizes) == 0:
+        logging.error("Something went wrong, there are no components returned")
+        sys.exit()
+    logging.info("There are {} components in this graph".format(len(sizes)))
+    # sizes and sequence lengths are computed once with the labels
+    ranks = list(range(len(sizes)))
+    if args.n_comps != 0:
+        if args.seq_size:
+            ranks.sort(key=seq_lengths.__getitem__, reverse=True)
         else:
-            if not os.path.exists(args.starting_list):
-                error(f"the file {args.starting_list} does not exist", args.log_file)
-            else:
-                start_nodes = set()
-                with open(args.starting_list) as infile:
-                    for l in infile:
-                        start_nodes.add(l.strip())
-        # logging.info("Reading Graph...")
-        # graph = Graph(args.in_graph)
-        if os.path.exists(args.output_neighborhood):
-            warning(f"The file {args.output_neighborhood} already exist, the results will "
-                    f"be appended, if you don't want that to happen, give another output file "
-                    f"or remove this current one", args.log_file)
-        processes = []
-        queue = mp.Queue()
-        logging.info("Extracting neighborhoods...")
-        if not start_nodes:
-            error("the list of start nodes is empty, please check your inputs", args.log_file)
-        if len(graph.nodes) == 0:
-            error("The graph is empty for some reason, check your GFA file")
-        for n in start_nodes:
-            process = mp.Process(target=bfs_queue, args=(graph, n, args.bfs_len, queue,))
-            processes.append(process)
-
-            if len(processes) == args.cores:
-                for p in processes:
-                    p.start()
-                n_sentinals = 0
-                while n_sentinals != len(processes):
-                    nodes = queue.get()
-                    if not nodes:
-                        n_sentinals += 1
-                    else:
-                        # write to file
-                        for n in nodes:
-                            output_nodes.add(n)
-                        # graph.write_graph(set_of_nodes=nodes, output_file=args.output_neighborhood,
-                        #                   append=True)
-                for p in processes:
-                    p.join()
-
-                processes = []
-                queue = mp.Queue()
-
-        # leftovers
-        for p in processes:
-            p.start()
-        n_sentinals = 0
-        while n_sentinals != len(processes):
-            nodes = queue.get()
-            if not nodes:
-                n_sentinals += 1
-            else:
-                # write to file
-                for n in nodes:
-                    output_nodes.add(n)
-                # graph.write_graph(set_of_nodes=nodes, output_file=args.output_neighborhood,
-                #                   append=True)
-        for p in processes:
-            p.join()
-
-        logging.info("Writing output file...")
-        graph.write_graph(set_of_nodes=output_nodes, output_file=args.output_neighborhood, append=args.append)
-        logging.info("Done...")
-############################################## Alignment subgraph
+            ranks.sort(key=sizes.__getitem__, reverse=True)
+        ranks = ranks[:args.n_comps]
+
+    logging.info("Writing Components...")
+    with profiling.stage("write"):
+        write_components(graph, label_lookup(graph, ids, labels), ranks, output_dir=args.output_dir,
+                         single_file=args.single_file, source=args.in_graph)
+    if args.single_file is not None:
+        profiling.add_file_sizes("write", [args.single_file])
+    else:
+        profiling.add_file_sizes("write", [os.path.join(args.output_dir, f"component{rank}.gfa")
+                                           for rank in range(1, len(ranks) + 1)])
+
+    logging.info("Done...")
+
+
+def run_bfs(graph, args):
+    """
+    writes the neighborhood around the start nodes
+    """
+    from GFASubgraph.multi_bfs import multi_source_bfs, multi_source_hops, multi_source_distance
 
-    if args.subcommands == "alignment_subgraph":
-        if not args.input_gaf:
-            error("You need to provide an input GAF file", args.log_file)
-        alignments = read_gaf(args.input_gaf, args.log_file)
+    if args.cores > os.cpu_count():
+        print("Your system only have {} available cores at the moment".format(os.cpu_count()))
+        sys.exit()
+    start_nodes = set()
+    if args.starting_nodes is not None:
+        if args.bfs_len is not None:
+            if args.output_neighborhood is not None:
+                start_nodes = set(args.starting_nodes)
+            else:
+                error("You need to give an output file name --output_neighborhood", args.log_file)
+        else:
+            error("You did not set the neighborhood size", args.log_file)
+    else:
+        if not os.path.exists(args.starting_list):
+            error(f"the file {args.starting_list} does not exist", args.log_file)
+        else:
+            start_nodes = set()
+            with open(args.starting_list) as infile:
+                for l in infile:
+                    start_nodes.add(l.strip())
+    # logging.info("Reading Graph...")
+    # graph = Graph(args.in_graph)
+    if os.path.exists(args.output_neighborhood):
+        warning(f"The file {args.output_neighborhood} already exist, the results will "
+                f"be appended, if you don't want that to happen, give another output file "
+                f"or remove this current one", args.log_file)
+    logging.info("Extracting neighborhoods...")
+    if not start_nodes:
+        error("the list of start nodes is empty, please check your inputs", args.log_file)
+    if len(graph.nodes) == 0:
+        error("The graph is empty for some reason, check your GFA file", args.log_file)
+    with profiling.stage("traversal"):
+        if args.max_bp is not None:
+            output_nodes = multi_source_distance(graph, start_nodes, args.max_bp, args.max_hops)
+        elif args.max_hops is not None:
+            output_nodes = multi_source_hops(graph, start_nodes, args.max_hops)
+        else:
+            output_nodes = multi_source_bfs(graph, start_nodes, args.bfs_len, cores=args.cores)
 
-        if not args.alignment_list:  # take all alignments
-            to_extract = list(alignments.keys())
+    logging.info("Writing output file...")
+    appended_to = os.path.getsize(args.output_neighborhood) if args.append and \
+        os.path.exists(args.output_neighborhood) else 0
+    with profiling.stage("write"):
+        graph.write_graph(set_of_nodes=output_nodes, output_file=args.output_neighborhood, append=args.append)
+    profiling.add("write", bytes=os.path.getsize(args.output_neighborhood) - appended_to)
+    logging.info("Done...")
+
+
+def run_alignment_subgraph(graph, args):
+    """
+    writes the subgraph around the alignment paths and the CSV to color them
+    """
+    import random
+    from GFASubgraph.gaf_io import iter_gaf
+    from GFASubgraph.multi_bfs import multi_source_bfs, multi_source_hops, multi_source_distance
+    from GFASubgraph.connected_components import component_labels, label_lookup
+    from GFASubgraph.graph_io import write_components
+    from GFASubgraph.x11_colors import color_list
+
+    if not args.input_gaf:
+        error("You need to provide an input GAF file", args.log_file)
+    if not os.path.exists(args.input_gaf):
+        error(f"The file {args.input_gaf} does not exist", args.log_file)
+
+    if not args.alignment_list:  # take all alignments
+        to_extract = None
+    else:
+        with open(args.alignment_list, "r") as infile:
+            to_extract = {line.strip() for line in infile if line.strip()}
+    found = set()
+    path_nodes = set()
+
+    # the GAF is streamed, only the alignments to extract are parsed
+    # the nodes of all paths are collected once and the neighborhood
+    # is taken around all of them together at the end
+    # also outputting a CSV file with node names and coloring based on each alignment
+    logging.info("Extracting the alignments...")
+    with profiling.stage("gaf"), open(args.prefix + "colors.csv", "w") as out_csv:
+        out_csv.write("Name,Colour,Alignment Name,Alignment length, Alignment ID, Alignment coordinates\n")
+
+        for align_name, align_path, align_size, align_ident in iter_gaf(args.input_gaf, to_extract):
+            found.add(align_name)
+            color = random.choice(color_list)
+            logging.info(f"Extracting the alignment {align_name} and will be coloured {color}")
+
+            path_nodes.update(align_path)
+            for n in align_path:  # I am only coloring the path
+                out_csv.write(f"{n},{color},{align_name},{align_size},{align_ident}\n")
+
+    if to_extract is not None:
+        for align_name in to_extract - found:
+            logging.warning(f"The alignment {align_name} in {args.alignment_list} is not present in {args.input_gaf}")
+
+    logging.info(f"The alignments go through {len(path_nodes)} different nodes")
+    profiling.add("gaf", alignments=len(found), path_nodes=len(path_nodes))
+    with profiling.stage("traversal"):
+        if args.max_bp is not None:
+            final_nodes = multi_source_distance(graph, path_nodes, args.max_bp, args.max_hops)
+        elif args.max_hops is not None:
+            final_nodes = multi_source_hops(graph, path_nodes, args.max_hops)
+        elif args.bfs_len == 1:  # only the nodes of the paths
+            final_nodes = multi_source_hops(graph, path_nodes, 0)
         else:
-            to_extract = []
-            with open(args.alignment_list, "r") as infile:
-                for line in infile:
-                    line = line.strip()
-                    if line not in alignments:
-                        logging.warning(f"The alignment {line} in {args.alignment_list} is not present in {args.input_gaf}")
-                    else:
-                        to_extract.append(line.strip())
-        final_nodes = set()
-
-        # finished preparing and now need to go through each alignment
-        # and for each alignment go through each node and consider that as a start node
-        # look at the neighbrohood around it
-        # also outputting a CSV file with node names and coloring based on each alignment
-        logging.info("Extracting the alignments...")
-        with open(args.prefix + "colors.csv", "w") as out_csv:
-            out_csv.write("Name,Colour,Alignment Name,Alignment length, Alignment ID, Alignment coordinates\n")
-
-            for align_name in to_extract:
-                color = random.choice(color_list)
-                logging.info(f"Extracting the alignment {align_name} and will be coloured {color}")
-
-                align_path, align_size, align_ident = alignments[align_name]
-                extract_alignments(align_path, graph, args.bfs_len, final_nodes)  # adds to final_nodes
-                for n in align_path:  # I am only coloring the path
-                    out_csv.write(f"{n},{color},{align_name},{align_size},{align_ident}\n")
-
-        out_graph = args.prefix + 'subgraph.gfa'
-        logging.info(f"Writing the output graph {out_graph}")
+            if args.cores > os.cpu_count():
+                print("Your system only have {} available cores at the moment".format(os.cpu_count()))
+                sys.exit()
+            final_nodes = multi_source_bfs(graph, path_nodes, args.bfs_len, cores=args.cores)
+
+    out_graph = args.prefix + 'subgraph.gfa'
+    logging.info(f"Writing the output graph {out_graph}")
+    with profiling.stage("write"):
         graph.write_graph(set_of_nodes=final_nodes, output_file=out_graph)
+    profiling.add_file_sizes("write", [out_graph])
+
+    if args.split_components:
+        # the components are found on a view of the subgraph, nothing is copied from the graph
+        subgraph = graph.subgraph(final_nodes)
+        with profiling.stage("components"):
+            ids, labels, sizes, _ = component_labels(subgraph)
+        profiling.add("components", components=len(sizes))
+        out_dir = args.prefix + "components"
+        os.makedirs(out_dir, exist_ok=True)
+        logging.info(f"Writing the {len(sizes)} components of the subgraph to {out_dir}")
+        with profiling.stage("write"):
+            write_components(subgraph, label_lookup(subgraph, ids, labels), list(range(len(sizes))),
+                             output_dir=out_dir)
+        profiling.add_file_sizes("write", [os.path.join(out_dir, f"component{rank}.gfa")
+                                           for rank in range(1, len(sizes) + 1)])
+
+
+def run_low_cov_edges(graph, args):
+    """
+    finds the low coverage edges with more than one chromosome around them
+    """
+    import pickle
+    from GFASubgraph.annotations import load_node_labels
+    from GFASubgraph.low_coverage import iter_problem_edges, problem_edge_lines
+
+    if not args.nodes_info:
+        error("You need to give the nodes info TSV, first column is node "
+              "ids and second is chr, no header", args.log_file)
+    # it's a hacky section here but this still under testing, whether I need this feature or not
+    # loading the chromosome of the nodes as integer codes in graph.annotations
+    with profiling.stage("annotations"):
+        load_node_labels(graph, args.nodes_info)
+
+    logging.info("Checking for low cov edges and their neighborhood")
+    low_cov_edges = graph.low_coverage_edges(args.edge_cov_cutoff)
+    logging.info(f"There were {len(low_cov_edges)} edges with counts equal or less than threshold of "
+                 f"{args.edge_cov_cutoff}")
+    if args.cores > os.cpu_count():
+        print("Your system only have {} available cores at the moment".format(os.cpu_count()))
+        sys.exit()
+    # problem_edges are the low cov edges with two difference chromosomes around them
+    # the value (chrom_set) is a dict of chromosomes and list of nodes for that chromosome
+    problem_edges = iter_problem_edges(graph, low_cov_edges, args.bfs_len, cores=args.cores,
+                                       max_bp=args.max_bp, max_hops=args.max_hops)
+    # the edges are checked as they are written, so the writing is in the traversal stage
+    with profiling.stage("traversal"):
+        if args.out_edges.endswith(".tsv"):
+            n_problems = 0
+            with open(args.out_edges, "w") as outfile:
+                for e, chrom_set in problem_edges:
+                    outfile.writelines(problem_edge_lines(e, chrom_set))
+                    n_problems += 1
+        else:
+            problem_edges = dict(problem_edges)
+            n_problems = len(problem_edges)
+            with open(args.out_edges, "wb") as outfile:
+                logging.info("Pickling the info")
+                pickle.dump(problem_edges, outfile)
+    profiling.add("traversal", candidate_edges=len(low_cov_edges), problem_edges=n_problems)
+    logging.info(f"There were {n_problems} edges with two different chromosomes around them")
+
+
+def run_filter(graph, args):
+    """
+    removes low count edges and nodes outside the degree thresholds and writes the rest
+    """
+    from GFASubgraph.graph_io import copy_gfa_lines
+
+    if args.min_edge_count is None and args.min_degree is None and args.max_degree is None:
+        error("Give at least one of --min_edge_count, --min_degree or --max_degree", args.log_file)
+    if args.min_edge_count is not None:
+        with profiling.stage("filter"):
+            low_cov = graph.low_coverage_edges(args.min_edge_count - 1)
+            n_removed = graph.remove_edges(low_cov)
+        profiling.add("filter", removed_edges=n_removed)
+        logging.info(f"Removed {n_removed} edges with a count below {args.min_edge_count}")
+    if args.min_degree is not None or args.max_degree is not None:
+        min_degree = args.min_degree if args.min_degree is not None else 0
+        max_degree = args.max_degree if args.max_degree is not None else float("inf")
+        with profiling.stage("filter"):
+            ids, degrees = graph.degrees()
+            to_remove = [n_id for n_id, degree in zip(ids, degrees)
+                         if n_id is not None and not min_degree <= degree <= max_degree]
+            n_removed = graph.remove_nodes(to_remove)
+        profiling.add("filter", removed_nodes=n_removed)
+        logging.info(f"Removed {n_removed} nodes with a degree outside [{min_degree}, {max_degree}]")
+    logging.info(f"Writing the filtered graph to {args.output}")
+    with profiling.stage("write"):
+        n_segments, n_links = copy_gfa_lines(graph, args.in_graph, args.output)
+    profiling.add_file_sizes("write", [args.output])
+    logging.info(f"Wrote {n_segments} segments and {n_links} links")
+
+
+def run_batch(graph, args):
+    """
+    runs the neighborhood jobs of the TSV and writes one GFA per job
+    """
+    from GFASubgraph.batch import read_jobs, run_jobs
+
+    try:
+        jobs = read_jobs(args.jobs, args.output_dir)
+    except ValueError as e:
+        error(str(e), args.log_file)
+    if not jobs:
+        error(f"There are no jobs in {args.jobs}", args.log_file)
+    if args.cores > os.cpu_count():
+        print("Your system only have {} available cores at the moment".format(os.cpu_count()))
+        sys.exit()
+    logging.info(f"Running {len(jobs)} jobs from {args.jobs}")
+    # the jobs write their outputs as they finish, so the writing is in the batch stage
+    with profiling.stage("batch"):
+        n_done = run_jobs(graph, jobs, cores=args.cores, max_open_files=args.max_open_files)
+    profiling.add("batch", jobs=n_done)
+    profiling.add_file_sizes("batch", [job[4] for job in jobs])
+    logging.info("Done...")
+
+
+def run_serve(graph, args):
+    """
+    answers subgraph queries on the graph until the server is stopped
+    """
+    from GFASubgraph.server import serve
+
+    serve(graph, host=args.host, port=args.port, socket_path=args.socket_path, workers=args.workers)
+
+
+def run_subcommand(args):
+    """
+    loads the graph and runs the subcommand on it
+    """
+    with profiling.stage("load"):
+        graph = load_graph(args)
+    profiling.add("load", nodes=len(graph.nodes))
+    HANDLERS[args.subcommands](graph, args)
+
+    if graph.cache is not None:
+        logging.info(f"bfs cache of the main process: {graph.cache.stats()}")
+
+
+def profile_call(args, function, *function_args):
+    """
+    calls function(*function_args) under the profiler of --profiler, if any, and writes
+    its output next to the --profile report
+    """
+    prefix = os.path.splitext(args.profile)[0]
+    if args.profiler == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(function, *function_args)
+        finally:
+            profiler.dump_stats(prefix + ".prof")
+            logging.info(f"Wrote the cProfile stats to {prefix}.prof, read them with python -m pstats")
+    if args.profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            error("pyinstrument is not installed, install it with pip install pyinstrument "
+                  "or use --profiler cprofile", args.log_file)
+        profiler = Profiler()
+        profiler.start()
+        try:
+            return function(*function_args)
+        finally:
+            profiler.stop()
+            with open(prefix + ".html", "w") as outfile:
+                outfile.write(profiler.output_html())
+            logging.info(f"Wrote the pyinstrument report to {prefix}.html")
+    return function(*function_args)
+
+
+HANDLERS = {"output_comps": run_output_comps, "bfs": run_bfs, "alignment_subgraph": run_alignment_subgraph,
+            "low_cov_edges": run_low_cov_edges, "filter": run_filter, "batch": run_batch, "serve": run_serve}
+
+
+def run(argv=None):
+    """
+    runs GFASubgraph with the command line arguments in argv, e.g.
+    run(["-g", "graph.gfa", "bfs", "--start", "1", "--output_neighborhood", "out.gfa"])
+
+    :param argv: list of arguments without the program name, sys.argv[1:] if None
+    :return: the exit status, errors exit with sys.exit like on the command line
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv:
+        print("You did not provide any arguments\n"
+              "Try to use -h or --help for help")
+        return 0
 
+    args = build_parser().parse_args(argv)
+    # force so that every run in the same process gets its own log file
+    logging.basicConfig(filename=args.log_file, filemode='w',
+                        format='[%(asctime)s] %(message)s',
+                        level=getattr(logging, args.log_level.upper()), force=True)
+    logging.info(" ".join(["arguments given:"] + list(argv)))
 
-############################################## Edge coverage
+    if args.subcommands is None:
+        print("Please provide a subcommand after the global commands")
+        return 1
 
-    if args.subcommands == "low_cov_edges":
-        if not args.nodes_info:
-            error("You need to give the nodes info TSV, first column is node "
-                  "ids and second is chr, no header", args.log_file)
-    # it's a hacky section here but this still under testing, whether I need this feature or not
-        # adding the chromosome to the nodes
-        with open(args.nodes_info, "r") as infile:
-            for line in infile:
-                line = line.strip().split()
-                if line[0] in graph:
-                    graph[line[0]].chromosome = line[1]
-                else:
-                    logging.warning(f"The nodes {line[0]} in the TSV is not present in the graph")
-
-        logging.info(f"Loading edge counts from {args.in_graph}")
-        edges = get_edges_counts(args.in_graph)
-        logging.info("Checking for low cov edges and their neighborhood")
-        low_cov_edges = []
-        for e, c in edges.items():
-            if c <= args.edge_cov_cutoff:
-                low_cov_edges.append(e)
-        logging.info(f"There were {len(low_cov_edges)} edges with counts equal or less than threshold of "
-                     f"{args.edge_cov_cutoff}")
-        # problem_edges are the low cov edges with two difference chromosomes around them
-        # the value (tmp) is a dict of chromosomes and list of edges for that chromosome
-        problem_edges = dict()
-        for e in low_cov_edges:
-            tmp = check_candidate_edges(graph, e, args.bfs_len)
-            if tmp:
-                problem_edges[e] = tmp
-        logging.info(f"There were {len(problem_edges)} edges with two different chromosomes around them")
-        with open(args.out_edges, "wb") as outfile:
-            logging.info("Pickling the info")
-            pickle.dump(problem_edges, outfile)
+    if args.in_graph is None:
+        print("Please provide an input graph with -g, --in_graph")
+        return 1
+    if args.subcommands == "index":
+        run_index(args)
+        return 0
+    # checking the inputs before the graph is loaded
+    if args.subcommands == "batch" and (args.jobs is None or not os.path.exists(args.jobs)):
+        error("Give an existing jobs TSV with --jobs", args.log_file)
+
+    if args.profiler is not None and args.profile is None:
+        error("--profiler needs --profile for where to write its output", args.log_file)
+
+    if args.profile is None:
+        run_subcommand(args)
+        return 0
+    profiling.enable()
+    try:
+        profile_call(args, run_subcommand, args)
+    finally:
+        profiling.write_report(args.profile, command=["GFASubgraph"] + list(argv), subcommand=args.subcommands)
+        logging.info(f"Wrote the profile report to {args.profile}")
+        profiling.disable()
+    return 0
+
+
+def main():
+    sys.exit(run())
 
 
 if __name__ == "__main__":
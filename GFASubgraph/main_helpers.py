@@ -1,16 +1,9 @@
 import logging
 import sys
 import os
-from GFASubgraph.bfs import bfs
-from collections import defaultdict
 
-
-def bfs_queue(graph, n, length, queue):
-
-    set_of_nodes = bfs(graph, n, length)
-    if set_of_nodes:
-        queue.put(set_of_nodes)
-    queue.put(None)
+# main imports error and warning from here before it knows the subcommand,
+# so the modules of the other helpers are imported in the helpers
 
 
 def seq_size(graph, nodes):
@@ -32,28 +25,21 @@ def warning(msg, logfile):
 
 
 def read_gaf(in_gaf, log_file):
+    """
+    returns a dict of all the alignments in the GAF with a node path,
+    alignment name to [path nodes, alignment length, alignment identity].
+    For big GAF files use gaf_io.iter_gaf which does not keep them all in memory
+    """
+    from GFASubgraph.gaf_io import iter_gaf
+
     if not os.path.exists(in_gaf):
         error(f"The file {in_gaf} does not exist", log_file)
         return None
 
-    else:
-        alignments = dict()
-        with open(in_gaf, "r") as infile:
-            for l in infile:
-                l = l.strip().split("\t")
-                name = l[0]
-                where_id = [idx for idx in range(len(l)) if "id:f" in l[idx]][0]
-                l_length = int(l[3]) - int(l[2])  # alignment length
-                l_id = l[where_id].split(":")[-1]
-                coordinates = f"{l[2]}_{l[3]}"
-                name = name + "_" + coordinates
-                path = l[5]
-                if path[0] in {"<", ">"}:  # making sure it is where the path is
-                    path = path[1:].replace(">", ",")  # removing the first > or <
-                    path = path.replace("<", ",")
-                    alignments[name] = [path.split(","), l_length, l_id]
-
-        return alignments
+    alignments = dict()
+    for name, path, length, identity in iter_gaf(in_gaf):
+        alignments[name] = [path, length, identity]
+    return alignments
 
 
 def extract_alignments(alignment_nodes, graph, n_size, final_nodes):
@@ -65,23 +51,18 @@ def extract_alignments(alignment_nodes, graph, n_size, final_nodes):
         if n_size == 1:  # only the node of the path
             set_of_nodes = {n}
         else:
-            set_of_nodes = bfs(graph, n, n_size)
+            set_of_nodes = graph.bfs(n, n_size)
         for n_id in set_of_nodes:
             final_nodes.add(n_id)  # if the node already exists won't be added twice
 
 
 def check_candidate_edges(graph, edge, n_size):
+    from GFASubgraph.low_coverage import chromosome_groups
+
     # as I'm doing BFS, doesn't matter from which edge I start
     # both nodes will be included
 
     # edge is (n1, side1, n2, side2, overlap)
     start_node = edge[0]
-    neighborhood = bfs(graph, start_node, n_size)
-    chrom_set = defaultdict(list)
-    for n in neighborhood:
-        if graph[n].chromosome:
-            chrom_set[graph[n].chromosome].append(n)
-    if len(chrom_set.keys()) == 1:
-        return None
-    else:
-        return chrom_set
+    neighborhood = graph.bfs(start_node, n_size)
+    return chromosome_groups(graph, neighborhood)
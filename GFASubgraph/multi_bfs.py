@@ -0,0 +1,268 @@
+import logging
+import heapq
+from GFASubgraph import profiling
+from GFASubgraph.CompactNodes import CompactNodes
+
+INF = float("inf")
+
+# The graph the workers run on. It is set before the pool is forked so the
+# workers share the parent's graph copy-on-write instead of each getting a pickled copy
+_GRAPH = None
+
+
+def _init_worker(graph):
+    global _GRAPH
+    _GRAPH = graph
+
+
+def _bfs_chunk(graph, start_nodes, size):
+    """
+    runs bfs for a chunk of start nodes and returns [(start node, neighborhood), ...]
+    """
+    return [(n, graph.bfs(n, size)) for n in start_nodes]
+
+
+def _bfs_chunk_union(graph, start_nodes, size):
+    """
+    same as _bfs_chunk but merges the chunk in the worker so less is sent back
+    """
+    merged = set()
+    for n in start_nodes:
+        merged.update(graph.bfs(n, size))
+    return [(None, merged)]
+
+
+def _pool_task(task):
+    worker, start_nodes, size = task
+    return worker(_GRAPH, start_nodes, size)
+
+
+def _make_pool(graph, cores):
+    # imported here so the single process searches do not pay for it
+    import multiprocessing as mp
+    global _GRAPH
+    if "fork" in mp.get_all_start_methods():
+        _GRAPH = graph
+        return mp.get_context("fork").Pool(cores)
+    # without fork the graph has to be sent to each worker once
+    return mp.Pool(cores, initializer=_init_worker, initargs=(graph,))
+
+
+def map_chunks(graph, items, size, cores, chunk_size, worker):
+    """
+    runs worker(graph, chunk, size) over chunks of items in a pool that shares the graph
+    and yields what the workers return as they finish, in one process if cores is 1
+
+    :param worker: a module level function returning a list, so it can be sent to the pool
+    """
+    global _GRAPH
+    if cores <= 1 or len(items) < 2:
+        yield from worker(graph, items, size)
+        return
+
+    if chunk_size is None:
+        # a few chunks per core so the faster workers pick up the rest
+        chunk_size = max(1, min(1000, len(items) // (4 * cores)))
+    tasks = ((worker, items[i:i + chunk_size], size) for i in range(0, len(items), chunk_size))
+    pool = _make_pool(graph, cores)
+    try:
+        for results in pool.imap_unordered(_pool_task, tasks):
+            yield from results
+    finally:
+        pool.terminate()
+        pool.join()
+        _GRAPH = None
+
+
+def _run(graph, start_nodes, size, cores, chunk_size, worker):
+    present = []
+    for n in start_nodes:
+        if n in graph:
+            present.append(n)
+        else:
+            logging.warning(f"The start node {n} is not in the graph, skipping")
+    yield from map_chunks(graph, present, size, cores, chunk_size, worker)
+
+
+def iter_neighborhoods(graph, start_nodes, size, cores=1, chunk_size=None):
+    """
+    Runs bfs from many start nodes over one shared graph and yields the
+    neighborhoods as the workers finish them, so not in the order of start_nodes
+
+    :param graph: A graph object from class Graph
+    :param start_nodes: iterable of start node ids, the ones not in the graph are skipped
+    :param size: size of each neighborhood
+    :param cores: number of worker processes, 1 runs everything in this process
+    :param chunk_size: number of start nodes given to a worker at once, chosen from the number of nodes if None
+    :return: generator of (start node, neighborhood set)
+    """
+    return _run(graph, start_nodes, size, cores, chunk_size, _bfs_chunk)
+
+
+def multi_source_bfs(graph, start_nodes, size, cores=1, chunk_size=None):
+    """
+    Returns the union of the bfs neighborhoods of all start nodes
+    the parameters are the same as iter_neighborhoods
+    """
+    output_nodes = set()
+    for _, neighborhood in _run(graph, start_nodes, size, cores, chunk_size, _bfs_chunk_union):
+        output_nodes.update(neighborhood)
+    return output_nodes
+
+
+def multi_source_hops(graph, start_nodes, hops):
+    """
+    Returns all nodes that are at most hops edges away from any of the start nodes
+
+    This is one breadth-first expansion from all the start nodes at once, so every
+    node is visited once however many start nodes it is close to
+
+    :param graph: A graph object from class Graph
+    :param start_nodes: iterable of start node ids, the ones not in the graph are skipped
+    :param hops: the hop radius, 0 returns the start nodes themselves
+    """
+    nodes = graph.nodes
+    reached = set()
+    frontier = []
+    for n in start_nodes:
+        if n not in nodes:
+            logging.warning(f"The start node {n} is not in the graph, skipping")
+        elif n not in reached:
+            reached.add(n)
+            frontier.append(n)
+
+    n_expanded = 0
+    frontier_peak = len(frontier)
+    for _ in range(hops):
+        n_expanded += len(frontier)
+        next_frontier = []
+        for n in frontier:
+            node = nodes[n]
+            for edges in (node.start, node.end):
+                for neighbor, _ in edges:
+                    if neighbor not in reached:
+                        reached.add(neighbor)
+                        next_frontier.append(neighbor)
+        if not next_frontier:
+            break
+        frontier = next_frontier
+        frontier_peak = max(frontier_peak, len(frontier))
+    profiling.add("traversal", searches=1, nodes_expanded=n_expanded)
+    profiling.peak("traversal", frontier_peak=frontier_peak)
+    return reached
+
+
+def _compact_distances(nodes, start_nodes, max_bp, max_hops, bound_hops):
+    """
+    multi_source_distance over the arrays of a CompactNodes, the nodes are their indices
+    """
+    ptr, adj, overlaps, seq_lens = nodes.ptr, nodes.adj, nodes.overlaps, nodes.seq_lens
+    step = 1 if bound_hops else 0
+    dist = dict()
+    settled_hops = dict()
+    heap = []
+    for n in start_nodes:
+        idx = nodes.index_of(n)
+        if idx != -1:
+            heap.append((0, 0, idx))
+    heapq.heapify(heap)
+
+    n_expanded = 0
+    frontier_peak = len(heap)
+    while heap:
+        if len(heap) > frontier_peak:
+            frontier_peak = len(heap)
+        d, h, idx = heapq.heappop(heap)
+        # the labels come out by bp, so one is dominated if the node already has one with fewer or as many hops
+        if h >= settled_hops.get(idx, INF):
+            continue
+        settled_hops[idx] = h
+        if idx not in dist:
+            dist[idx] = d
+        if h >= max_hops:
+            continue
+        n_expanded += 1
+        for k in range(ptr[2 * idx], ptr[2 * idx + 2]):
+            target = adj[k]
+            if target < 0:
+                continue
+            n_idx = target >> 1
+            new_d = d + max(0, seq_lens[n_idx] - overlaps[k])
+            if new_d <= max_bp and h + step < settled_hops.get(n_idx, INF):
+                heapq.heappush(heap, (new_d, h + step, n_idx))
+
+    profiling.add("traversal", searches=1, nodes_expanded=n_expanded)
+    profiling.peak("traversal", frontier_peak=frontier_peak)
+    ids = nodes.ids
+    return {ids[idx]: d for idx, d in dist.items()}
+
+
+def multi_source_distance(graph, start_nodes, max_bp=None, max_hops=None):
+    """
+    Returns every node within max_bp base pairs and max_hops edges of any of the start nodes,
+    as a dict of node id and its distance in bp
+
+    The distance is the length of the sequence added by the nodes on the way, so stepping
+    over an edge costs the sequence length of the next node minus the overlap of the edge,
+    and the start nodes are at 0. It is one Dijkstra from all start nodes at once that never
+    goes past max_bp, so the neighborhood is about the same genomic span however fragmented
+    the graph is. With both bounds a node is kept if it is reached by a path within both.
+    For a bound on hops alone multi_source_hops gives the same nodes faster
+
+    :param graph: A graph object from class Graph
+    :param start_nodes: iterable of start node ids, the ones not in the graph are skipped
+    :param max_bp: the distance bound in bp, no bound if None
+    :param max_hops: the bound on the number of edges, no bound if None
+    """
+    start_nodes = list(start_nodes)
+    for n in start_nodes:
+        if n not in graph:
+            logging.warning(f"The start node {n} is not in the graph, skipping")
+    if max_bp is None and max_hops is None:
+        raise ValueError("give max_bp, max_hops or both")
+    # with a bound on hops a node can be reached again by a longer path with fewer edges,
+    # so every (bp, hops) label of a node that no label with less bp and fewer hops dominates is
+    # expanded, the labels of one path. Without that bound the hops are not counted and
+    # this is a plain Dijkstra that settles every node once
+    bound_hops = max_hops is not None
+    if max_bp is None:
+        max_bp = INF
+    if max_hops is None:
+        max_hops = INF
+
+    nodes = graph.nodes
+    if isinstance(nodes, CompactNodes):
+        return _compact_distances(nodes, start_nodes, max_bp, max_hops, bound_hops)
+
+    step = 1 if bound_hops else 0
+    dist = dict()
+    settled_hops = dict()
+    heap = []
+    for n in start_nodes:
+        if n in nodes:
+            heap.append((0, 0, n))
+    heapq.heapify(heap)
+
+    n_expanded = 0
+    frontier_peak = len(heap)
+    while heap:
+        if len(heap) > frontier_peak:
+            frontier_peak = len(heap)
+        d, h, n = heapq.heappop(heap)
+        if h >= settled_hops.get(n, INF):
+            continue
+        settled_hops[n] = h
+        if n not in dist:
+            dist[n] = d
+        if h >= max_hops:
+            continue
+        n_expanded += 1
+        node = nodes[n]
+        for edges in (node.start, node.end):
+            for (neighbor, _), overlap in edges.items():
+                new_d = d + max(0, nodes[neighbor].seq_len - overlap)
+                if new_d <= max_bp and h + step < settled_hops.get(neighbor, INF):
+                    heapq.heappush(heap, (new_d, h + step, neighbor))
+    profiling.add("traversal", searches=1, nodes_expanded=n_expanded)
+    profiling.peak("traversal", frontier_peak=frontier_peak)
+    return dist
@@ -0,0 +1,231 @@
+import os
+import sys
+import time
+import logging
+import multiprocessing as mp
+from array import array
+from itertools import repeat
+from GFASubgraph.Node import Node
+from GFASubgraph.CompactNodes import CompactBuilder
+from GFASubgraph.graph_io import parse_link, open_sequences, log_read_stats, edge_tag_specs, parse_tag_values
+
+
+def chunk_ranges(gfa_file_path, n_chunks):
+    """
+    splits the file into about n_chunks byte ranges that start and end on line boundaries
+
+    :return: list of (start, end) byte offsets
+    """
+    size = os.path.getsize(gfa_file_path)
+    bounds = [0]
+    with open(gfa_file_path, "rb") as infile:
+        for i in range(1, n_chunks):
+            pos = size * i // n_chunks
+            if pos <= bounds[-1]:
+                continue
+            # reading the rest of the line the boundary falls in,
+            # starting one byte before so a boundary at a line start stays there
+            infile.seek(pos - 1)
+            infile.readline()
+            pos = infile.tell()
+            if bounds[-1] < pos < size:
+                bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def parse_chunk(task):
+    """
+    parses the S and L lines in a byte range of the GFA into packed arrays, the node ids
+    of the links are interned per chunk so the links come back as integers
+
+    :param task: (gfa file path, start offset, end offset, edge tag specs, sequences) where sequences
+        is "text" for the sequences as a list of str, "bytes" for one bytes object with the sequences
+        one after the other and None to not send them back
+    :return: (number of lines, segments, links, number of missing tags) where segments are
+        (ids, lengths, sequence offsets in the file, optional tags, sequences) and links are
+        (ids, sides1, sides2, overlaps, an array per edge tag) with the sides packed as 2 * position in ids + side
+    """
+    gfa_file_path, start, end, specs, seq_mode = task
+    seg_ids = []
+    seg_lens = array('Q')
+    seg_pos = array('Q')
+    optionals = []
+    seqs = []
+    # node id to its position in the ids of the links
+    index = dict()
+    sides1 = array('q')
+    sides2 = array('q')
+    overlaps = array('i')
+    tags = [array(code) for _, code in specs]
+    missing_tags = 0
+    n_lines = 0
+
+    with open(gfa_file_path, "rb") as lines:
+        lines.seek(start)
+        offset = start
+        for raw in lines:
+            if offset >= end:
+                break
+            n_lines += 1
+            if raw.startswith(b"S"):
+                fields = raw.rstrip(b"\r\n").split(b"\t")
+                seg_ids.append(fields[1].decode())
+                seg_lens.append(len(fields[2]))
+                seg_pos.append(offset + len(fields[0]) + len(fields[1]) + 2)
+                if len(fields) > 3:
+                    optionals.append(b"\t".join(fields[3:]).decode())
+                else:
+                    optionals.append("")
+                if seq_mode == "text":
+                    seqs.append(fields[2].decode())
+                elif seq_mode == "bytes":
+                    seqs.append(fields[2])
+
+            elif raw.startswith(b"L"):
+                fields = raw.decode().rstrip("\r\n").split("\t", 6)
+                n1, side1, n2, side2, overlap = parse_link(fields)
+                sides1.append(2 * index.setdefault(n1, len(index)) + side1)
+                sides2.append(2 * index.setdefault(n2, len(index)) + side2)
+                overlaps.append(overlap)
+                if specs:
+                    values, missing = parse_tag_values(fields, specs)
+                    missing_tags += missing
+                    for tag_values, value in zip(tags, values):
+                        tag_values.append(value)
+
+            offset += len(raw)
+
+    if seq_mode != "text":
+        seqs = b"".join(seqs)
+    segments = (seg_ids, seg_lens, seg_pos, optionals, seqs)
+    links = (list(index), sides1, sides2, overlaps, tags)
+    return n_lines, segments, links, missing_tags
+
+
+def add_segments(nodes, ids, seq_lens, file_pos, optionals, seqs, low_mem=False):
+    """
+    adds the segments of a chunk from parse_chunk to a dict of Node objects like read_gfa does
+    """
+    if low_mem:
+        seqs = repeat("*")
+    else:
+        file_pos = repeat(-1)
+    for n_id, seq_len, seq_pos, optional, seq in zip(ids, seq_lens, file_pos, optionals, seqs):
+        # a repeated S line updates the node and keeps its edges
+        node = nodes.get(n_id)
+        if node is None:
+            node = nodes[n_id] = Node(n_id)
+        node.seq = seq
+        node.seq_len = seq_len
+        node.seq_pos = seq_pos
+        if optional:
+            node.optional = optional
+
+
+def add_links(nodes, ids, sides1, sides2, overlaps, tags, edge_counts=None):
+    """
+    adds the links of a chunk from parse_chunk to a dict of Node objects, the links to
+    nodes without a segment are skipped like read_gfa skips them
+
+    :param edge_counts: dict filled with the count in the first edge tag of each link, see read_gfa
+    """
+    # the edges dict and the (node, side) key of each side in the chunk, so a link is two dict assignments
+    side_edges = []
+    side_keys = []
+    for n_id in ids:
+        node = nodes.get(n_id)
+        if node is None:
+            side_edges.extend((None, None))
+        else:
+            side_edges.extend((node.start, node.end))
+        side_keys.extend(((n_id, 0), (n_id, 1)))
+
+    for a, b, overlap in zip(sides1, sides2, overlaps):
+        edges_a = side_edges[a]
+        edges_b = side_edges[b]
+        if edges_a is not None and edges_b is not None:
+            edges_a[side_keys[b]] = overlap
+            edges_b[side_keys[a]] = overlap
+
+    if edge_counts is not None:
+        for a, b, overlap, count in zip(sides1, sides2, overlaps, tags[0]):
+            edge_counts[side_keys[a] + side_keys[b] + (overlap,)] = count
+
+
+def read_gfa_parallel(gfa_file_path, low_mem=False, threads=2, compact=False, edge_tags=(), edge_counts=None):
+    """
+    Read a gfa file with the parsing split over several processes
+
+    The file is split into byte ranges on line boundaries and each range is parsed
+    in a process pool into packed arrays, with the node ids of its links interned in the worker.
+    Here the segments of each range are added as a whole when it arrives and the links once
+    all segments are known, in file order, so only their ids are looked up once per range
+    and the result is the same as read_gfa or read_gfa_compact.
+
+    :param gfa_file_path: gfa graph file.
+    :param low_mem: if True the sequences are not kept, only their offsets in the file
+    :param threads: number of parsing processes
+    :param compact: if True a CompactNodes is returned instead of a dict of Node objects
+    :param edge_tags: L line tags kept with the edges of the CompactNodes, see read_gfa_compact
+    :param edge_counts: dict filled with the ec:i count of each link, see read_gfa
+    """
+    if not os.path.exists(gfa_file_path):
+        logging.error("the gfa file path you gave does not exists, please try again!")
+        sys.exit()
+
+    start_time = time.perf_counter()
+    if compact:
+        specs = edge_tag_specs(edge_tags)
+    else:
+        specs = edge_tag_specs(["ec"]) if edge_counts is not None else []
+    if low_mem:
+        seq_mode = None
+    else:
+        seq_mode = "bytes" if compact else "text"
+    # a few chunks per process so one slow chunk does not hold the others
+    tasks = [(gfa_file_path, start, end, specs, seq_mode)
+             for start, end in chunk_ranges(gfa_file_path, 4 * threads)]
+    n_lines = n_segments = n_links = missing_tags = 0
+
+    if compact:
+        builder = CompactBuilder(low_mem=low_mem, edge_tags=specs)
+        known = builder.index
+    else:
+        nodes = known = dict()
+    # the links of a range with ids that have no S line yet wait for the segments of the ranges
+    # after it, with the links of all the ranges after it so they are still added in file order
+    waiting = []
+    with mp.Pool(threads) as pool:
+        for chunk_lines, segments, links, chunk_missing in pool.imap(parse_chunk, tasks):
+            n_lines += chunk_lines
+            missing_tags += chunk_missing
+            n_segments += len(segments[0])
+            n_links += len(links[1])
+            if compact:
+                builder.add_segments(*segments)
+            else:
+                add_segments(nodes, *segments, low_mem=low_mem)
+            if waiting or not all(map(known.__contains__, links[0])):
+                waiting.append(links)
+            elif compact:
+                builder.add_links(*links)
+            else:
+                add_links(nodes, *links, edge_counts=edge_counts)
+
+    for links in waiting:
+        if compact:
+            builder.add_links(*links)
+        else:
+            add_links(nodes, *links, edge_counts=edge_counts)
+    del waiting
+
+    if compact:
+        nodes = builder.finish()
+        if low_mem:
+            nodes.seq_data = open_sequences(gfa_file_path)
+
+    if missing_tags:
+        logging.warning(f"{missing_tags} edge tags were missing from L lines, they are 0")
+    log_read_stats(gfa_file_path, n_lines, n_segments, n_links, time.perf_counter() - start_time)
+    return nodes
@@ -0,0 +1,137 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Stage timers and counters of the --profile report. Nothing is recorded until enable() is called,
+# until then add, peak and stage return right away, so the searches can call them as they are.
+# Only this process is recorded, the counters of the worker processes of --cores are lost
+# but their time is in the stage that started them
+_stages = None
+_start = None
+
+# counter of a stage that is divided by its seconds for a rate in the report
+RATES = {"parse": ("lines", "lines_per_sec"),
+         "traversal": ("nodes_expanded", "nodes_per_sec"),
+         "write": ("bytes", "bytes_per_sec"),
+         "batch": ("jobs", "jobs_per_sec")}
+
+
+def peak_rss_mb(children=False):
+    """
+    returns the peak resident memory of this process in MiB, or None if it cannot be known
+
+    :param children: the largest peak of the finished child processes (e.g. the workers) instead
+    """
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / 2**20
+    return peak / 2**10
+
+
+def enable():
+    """
+    starts recording, the stages recorded before are dropped
+    """
+    global _stages, _start
+    _stages = dict()
+    _start = time.perf_counter()
+
+
+def disable():
+    global _stages, _start
+    _stages = None
+    _start = None
+
+
+def enabled():
+    return _stages is not None
+
+
+def add(name, **counters):
+    """
+    adds the counters to the ones of the stage name, e.g. add("parse", lines=10, links=4)
+    """
+    if _stages is None:
+        return
+    entry = _stages.setdefault(name, dict())
+    for key, value in counters.items():
+        entry[key] = entry.get(key, 0) + value
+
+
+def peak(name, **values):
+    """
+    keeps the largest value seen of each counter of the stage name, e.g. peak("traversal", frontier_peak=30)
+    """
+    if _stages is None:
+        return
+    entry = _stages.setdefault(name, dict())
+    for key, value in values.items():
+        if value is not None and (key not in entry or value > entry[key]):
+            entry[key] = value
+
+
+def add_file_sizes(name, paths):
+    """
+    adds the size of the files in paths that exist to the bytes of the stage name
+    """
+    if _stages is None:
+        return
+    add(name, bytes=sum(os.path.getsize(path) for path in paths if os.path.exists(path)))
+
+
+@contextmanager
+def stage(name):
+    """
+    times the block as the stage name, the wall and CPU seconds of the stage
+    add up over its blocks and the peak RSS is taken at the end of each
+    """
+    if _stages is None:
+        yield
+        return
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        yield
+    finally:
+        add(name, calls=1, seconds=time.perf_counter() - wall, cpu_seconds=time.process_time() - cpu)
+        peak(name, peak_rss_mb=peak_rss_mb())
+
+
+def report(**extra):
+    """
+    returns the report of what was recorded as a dict that can be written as JSON,
+    with the rates of RATES added to the stages and the extra keys given
+
+    :param extra: added to the report as they are, e.g. the command line
+    """
+    stages = dict()
+    for name, entry in (_stages or dict()).items():
+        entry = dict(entry)
+        counter, rate = RATES.get(name, (None, None))
+        if counter in entry and entry.get("seconds"):
+            entry[rate] = entry[counter] / entry["seconds"]
+        stages[name] = entry
+    result = dict(extra)
+    result["total_seconds"] = time.perf_counter() - _start if _start is not None else None
+    result["peak_rss_mb"] = peak_rss_mb()
+    result["children_peak_rss_mb"] = peak_rss_mb(children=True)
+    result["stages"] = stages
+    return result
+
+
+def write_report(output_file, **extra):
+    """
+    writes report(**extra) to output_file as JSON
+    """
+    import json  # only needed when there is a report
+    with open(output_file, "w") as outfile:
+        json.dump(report(**extra), outfile, indent=2)
+        outfile.write("\n")
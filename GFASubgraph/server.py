@@ -0,0 +1,279 @@
+import os
+import json
+import signal
+import asyncio
+import logging
+import multiprocessing as mp
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from GFASubgraph.graph_io import gfa_batches
+from GFASubgraph.gaf_io import parse_gaf_lines
+from GFASubgraph.multi_bfs import multi_source_bfs, multi_source_hops
+from GFASubgraph.connected_components import component_labels, label_lookup, component_members
+
+# The graph and its component labels the query workers run on, set before
+# the workers are forked so they share the parent's copy, like in multi_bfs
+_GRAPH = None
+_COMPONENTS = None
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error"}
+# lines per chunk of the streamed GFA
+BATCH_SIZE = 2000
+
+
+class QueryError(Exception):
+    """
+    a query that can not be answered, status is the HTTP status sent back
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class StreamAborted(Exception):
+    """
+    a query that failed after the 200 headers and part of the GFA were sent,
+    the status can not be changed anymore so the connection is dropped
+    """
+
+
+def _init_worker(graph, components):
+    global _GRAPH, _COMPONENTS
+    _GRAPH = graph
+    _COMPONENTS = components
+
+
+def run_query(kind, start_nodes, size):
+    """
+    runs one query on the worker's graph and returns the list of node ids of the subgraph
+
+    :param kind: bfs (a neighborhood of size nodes around each start node),
+        hops (every node at most size edges away) or component
+    :param start_nodes: the start node ids, the one node for component
+    :param size: the neighborhood size or the number of hops
+    """
+    graph = _GRAPH
+    if kind == "bfs":
+        return list(multi_source_bfs(graph, start_nodes, size))
+    if kind == "hops":
+        return list(multi_source_hops(graph, start_nodes, size))
+    # component
+    ids, order, offsets, lookup = _COMPONENTS
+    label = lookup(start_nodes[0])
+    if label == -1:
+        return []
+    return [ids[pos] for pos in order[offsets[label]:offsets[label + 1]]]
+
+
+def _next_chunk(batches):
+    """
+    formats the next batch of GFA lines as one chunk of the chunked encoding, None after the last one
+    """
+    batch = next(batches, None)
+    if batch is None:
+        return None
+    chunk = "".join(batch).encode()
+    return b"%x\r\n%s\r\n" % (len(chunk), chunk)
+
+
+def _int_param(params, name, default):
+    try:
+        return int(params.get(name, [default])[0])
+    except ValueError:
+        raise QueryError(400, f"{name} should be an integer")
+
+
+def _start_nodes(params):
+    # start=1&start=2 and start=1,2 are the same
+    return [n for value in params.get("start", []) for n in value.split(",") if n]
+
+
+class SubgraphServer:
+    """
+    Answers subgraph queries on one loaded graph over HTTP
+
+    GET /bfs?start=ID[,ID...]&size=N          neighborhood of N nodes around each start node
+    GET /hops?start=ID[,ID...]&hops=N         every node at most N edges from the start nodes
+    GET /component?node=ID                    the connected component of the node
+    POST /alignment_subgraph?size=N[&hops=N]  body is GAF lines, the subgraph around their paths
+    GET /stats                                graph size and the served queries, as JSON
+
+    The subgraphs are computed in a pool of worker processes sharing the graph and
+    the GFA lines are sent back with chunked transfer encoding as they are made
+    """
+
+    def __init__(self, graph, workers=2):
+        global _GRAPH, _COMPONENTS
+        self.graph = graph
+        self.workers = workers
+        self.n_queries = 0
+        self.n_errors = 0
+        logging.info("Labeling the connected components for the component queries")
+        ids, labels, sizes, _ = component_labels(graph)
+        _GRAPH = graph
+        # the nodes of each component are grouped once so a query only reads its own
+        order, offsets = component_members(labels, sizes)
+        _COMPONENTS = (ids, order, offsets, label_lookup(graph, ids, labels))
+        if workers > 0 and "fork" in mp.get_all_start_methods():
+            self.executor = ProcessPoolExecutor(workers, mp_context=mp.get_context("fork"))
+        elif workers > 0:
+            # without fork the graph has to be sent to each worker once
+            self.executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(graph, _COMPONENTS))
+        else:
+            # the queries run in a thread of this process
+            self.executor = ThreadPoolExecutor(1)
+        # starting the workers now, before the event loop has threads of its own
+        for future in [self.executor.submit(os.getpid) for _ in range(max(1, workers))]:
+            future.result()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    async def handle(self, reader, writer):
+        try:
+            method, target, body = await self.read_request(reader)
+            await self.respond(writer, method, target, body)
+        except QueryError as e:
+            self.n_errors += 1
+            await self.send_error(writer, e.status, str(e))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except StreamAborted:
+            # ending the chunked body would make the partial GFA look complete
+            self.n_errors += 1
+            logging.exception("Query failed while its GFA was sent, dropping the connection")
+            writer.transport.abort()
+        except Exception as e:
+            self.n_errors += 1
+            logging.exception("Query failed")
+            await self.send_error(writer, 500, str(e))
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) != 3:
+            raise QueryError(400, "malformed request line")
+        method, target, _ = request_line
+        headers = dict()
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = b""
+        if "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        return method, target, body
+
+    async def respond(self, writer, method, target, body):
+        url = urlsplit(target)
+        params = parse_qs(url.query)
+        if url.path == "/stats":
+            stats = {"nodes": len(self.graph), "queries": self.n_queries, "errors": self.n_errors,
+                     "workers": self.workers}
+            if self.graph.cache is not None:
+                stats["cache"] = self.graph.cache.stats()
+            await self.send(writer, 200, json.dumps(stats) + "\n", "application/json")
+            return
+
+        if url.path in ("/bfs", "/hops", "/component") and method != "GET":
+            raise QueryError(405, f"{url.path} only takes GET")
+        if url.path == "/bfs":
+            query = ("bfs", _start_nodes(params), _int_param(params, "size", 50))
+        elif url.path == "/hops":
+            query = ("hops", _start_nodes(params), _int_param(params, "hops", 1))
+        elif url.path == "/component":
+            query = ("component", params.get("node", []), 0)
+        elif url.path == "/alignment_subgraph":
+            if method != "POST":
+                raise QueryError(405, "/alignment_subgraph takes the GAF lines with POST")
+            path_nodes = set()
+            for _, path, _, _ in parse_gaf_lines(body.decode().splitlines()):
+                path_nodes.update(path)
+            if "hops" in params:
+                query = ("hops", list(path_nodes), _int_param(params, "hops", 1))
+            else:
+                query = ("bfs", list(path_nodes), _int_param(params, "size", 3))
+        else:
+            raise QueryError(404, f"unknown path {url.path}")
+
+        if not query[1]:
+            raise QueryError(400, "no start nodes given")
+        if not any(n in self.graph for n in query[1]):
+            raise QueryError(404, "none of the start nodes are in the graph")
+        self.n_queries += 1
+        loop = asyncio.get_running_loop()
+        subgraph = await loop.run_in_executor(self.executor, run_query, *query)
+        await self.stream_gfa(writer, subgraph)
+
+    async def stream_gfa(self, writer, subgraph):
+        loop = asyncio.get_running_loop()
+        batches = gfa_batches(self.graph, subgraph, batch_size=BATCH_SIZE)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/x-gfa\r\n"
+                     b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+        try:
+            while True:
+                # the lines are formatted in a thread so a big subgraph does not hold up the other connections
+                chunk = await loop.run_in_executor(None, _next_chunk, batches)
+                if chunk is None:
+                    break
+                writer.write(chunk)
+                # waiting for the client to take the data so a slow client does not fill the memory
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        except ConnectionError:
+            raise
+        except Exception as e:
+            raise StreamAborted(str(e)) from e
+
+    async def send(self, writer, status, text, content_type="text/plain"):
+        data = text.encode()
+        writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data)
+        await writer.drain()
+
+    async def send_error(self, writer, status, message):
+        try:
+            await self.send(writer, status, message + "\n")
+        except ConnectionError:
+            pass
+
+
+async def _serve(server, host, port, socket_path):
+    if socket_path is not None:
+        listener = await asyncio.start_unix_server(server.handle, path=socket_path)
+        logging.info(f"Serving the graph on the unix socket {socket_path}")
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+        logging.info(f"Serving the graph on http://{host}:{port}")
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    async with listener:
+        await stop.wait()
+    logging.info("Stopping the server")
+
+
+def serve(graph, host="127.0.0.1", port=8000, socket_path=None, workers=2):
+    """
+    serves subgraph queries on the graph until the process gets SIGINT or SIGTERM, see SubgraphServer
+
+    :param graph: A graph object from class Graph
+    :param host: address to listen on
+    :param port: port to listen on
+    :param socket_path: if given, listen on this unix socket instead of host and port
+    :param workers: number of query processes, 0 runs the queries in a thread of the server process
+    """
+    server = SubgraphServer(graph, workers)
+    try:
+        asyncio.run(_serve(server, host, port, socket_path))
+    finally:
+        server.close()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
@@ -0,0 +1,81 @@
+"""
+alignment_subgraph on many overlapping alignments, one bfs per path node occurrence
+against collecting the unique path nodes first and expanding around them once,
+by neighborhood size, by hops or by base pairs
+
+python -m benchmarks.bench_alignments --alignments 1000000 --cores 4
+"""
+import os
+import time
+import argparse
+import tempfile
+from GFASubgraph.Graph import Graph
+from GFASubgraph.gaf_io import iter_gaf
+from GFASubgraph.main_helpers import extract_alignments
+from GFASubgraph.multi_bfs import multi_source_bfs, multi_source_hops, multi_source_distance
+from benchmarks.generators import write_bubble_chain, write_bubble_gaf
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Neighborhoods around alignment paths")
+    parser.add_argument("--alignments", type=int, default=1000000, help="number of GAF lines")
+    parser.add_argument("--bubbles", type=int, default=100000, help="number of bubbles in the synthetic graph")
+    parser.add_argument("--path_bubbles", type=int, default=10, help="number of bubbles each alignment goes through")
+    parser.add_argument("--size", type=int, default=3, help="neighborhood size around each path node")
+    parser.add_argument("--hops", type=int, default=2, help="hop radius for the hop expansion")
+    parser.add_argument("--max_bp", type=int, default=100, help="bp radius for the bounded expansion")
+    parser.add_argument("--cores", type=int, default=min(4, os.cpu_count()), help="worker processes")
+    parser.add_argument("--legacy_max", type=int, default=10000,
+                        help="number of alignments to time one bfs per path node on, the rate is extrapolated")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gfa_file = os.path.join(tmp_dir, "bubbles.gfa")
+        gaf_file = os.path.join(tmp_dir, "alignments.gaf")
+        write_bubble_chain(gfa_file, args.bubbles)
+        write_bubble_gaf(gaf_file, args.alignments, args.bubbles, args.path_bubbles)
+        graph = Graph(gfa_file)
+        compact_graph = Graph(gfa_file, compact=True, use_index=False)
+
+        start = time.perf_counter()
+        final_nodes = set()
+        for i, (_, path, _, _) in enumerate(iter_gaf(gaf_file)):
+            if i == args.legacy_max:
+                break
+            extract_alignments(path, graph, args.size, final_nodes)
+        elapsed = time.perf_counter() - start
+        n_legacy = min(args.legacy_max, args.alignments)
+        print(f"{'one bfs per path node':<28}{n_legacy / elapsed:>14.0f} alignments/sec "
+              f"(~{elapsed * args.alignments / n_legacy:.1f} s for all)")
+
+        start = time.perf_counter()
+        path_nodes = set()
+        for _, path, _, _ in iter_gaf(gaf_file):
+            path_nodes.update(path)
+        collect_time = time.perf_counter() - start
+        print(f"{'reading and collecting':<28}{args.alignments / collect_time:>14.0f} alignments/sec "
+              f"({len(path_nodes)} unique path nodes)")
+
+    for cores in sorted({1, args.cores}):
+        start = time.perf_counter()
+        result = multi_source_bfs(graph, path_nodes, args.size, cores=cores)
+        elapsed = time.perf_counter() - start + collect_time
+        print(f"{f'unique nodes bfs {cores} cores':<28}{args.alignments / elapsed:>14.0f} alignments/sec "
+              f"({len(result)} nodes, {elapsed:.1f} s)")
+
+    start = time.perf_counter()
+    result = multi_source_hops(graph, path_nodes, args.hops)
+    elapsed = time.perf_counter() - start + collect_time
+    print(f"{f'{args.hops} hops expansion':<28}{args.alignments / elapsed:>14.0f} alignments/sec "
+          f"({len(result)} nodes, {elapsed:.1f} s)")
+
+    for name, bp_graph in (("dict", graph), ("compact", compact_graph)):
+        start = time.perf_counter()
+        result = multi_source_distance(bp_graph, path_nodes, args.max_bp)
+        elapsed = time.perf_counter() - start + collect_time
+        print(f"{f'{args.max_bp} bp {name}':<28}{args.alignments / elapsed:>14.0f} alignments/sec "
+              f"({len(result)} nodes, {elapsed:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Many per-locus neighborhood jobs with the batch subcommand against one tool call per job,
+which parses the graph again every time
+
+python -m benchmarks.bench_batch --bubbles 100000 --jobs 5000 --cores 4
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+from GFASubgraph.Graph import Graph
+from GFASubgraph.batch import read_jobs, run_jobs
+from benchmarks.generators import write_bubble_chain
+
+
+def main():
+    parser = argparse.ArgumentParser(description="batch jobs on one loaded graph")
+    parser.add_argument("--bubbles", type=int, default=100000, help="number of bubbles in the synthetic graph")
+    parser.add_argument("--jobs", type=int, default=5000, help="number of jobs")
+    parser.add_argument("--size", type=int, default=50, help="neighborhood size of each job")
+    parser.add_argument("--cores", type=int, default=min(4, os.cpu_count()), help="worker processes")
+    parser.add_argument("--single_calls", type=int, default=5,
+                        help="number of jobs to time as separate tool calls, the rate is extrapolated")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gfa_file = os.path.join(tmp_dir, "bubbles.gfa")
+        jobs_file = os.path.join(tmp_dir, "jobs.tsv")
+        write_bubble_chain(gfa_file, args.bubbles)
+        rng = random.Random(1)
+        n_nodes = 3 * args.bubbles
+        with open(jobs_file, "w") as outfile:
+            for i in range(args.jobs):
+                outfile.write(f"locus{i}\t{rng.randint(1, n_nodes)}\t{args.size}\n")
+
+        start = time.perf_counter()
+        for i in range(args.single_calls):
+            subprocess.run([sys.executable, "-m", "GFASubgraph.main", "-g", gfa_file,
+                            "--log_file", os.path.join(tmp_dir, "single.log"), "bfs", "--start", str(i + 1),
+                            "--neighborhood_size", str(args.size),
+                            "--output_neighborhood", os.path.join(tmp_dir, f"single{i}.gfa")], check=True)
+        elapsed = time.perf_counter() - start
+        print(f"{'one call per job':<24}{args.single_calls / elapsed:>12.1f} jobs/sec "
+              f"(~{elapsed * args.jobs / args.single_calls:.0f} s for all)")
+
+        start = time.perf_counter()
+        graph = Graph(gfa_file)
+        load_time = time.perf_counter() - start
+        jobs = read_jobs(jobs_file, os.path.join(tmp_dir, "batch"))
+        for cores in sorted({1, args.cores}):
+            start = time.perf_counter()
+            run_jobs(graph, jobs, cores=cores)
+            elapsed = time.perf_counter() - start + load_time
+            print(f"{f'batch {cores} cores':<24}{args.jobs / elapsed:>12.1f} jobs/sec ({elapsed:.1f} s with loading)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Microbenchmark of the bfs traversal core on a hub-heavy graph, against the
+old loop that checked the deque for membership
+
+python -m benchmarks.bench_bfs --hubs 20 --spokes 2000
+"""
+import os
+import time
+import argparse
+import tempfile
+from collections import deque
+from GFASubgraph.Graph import Graph
+from GFASubgraph.bfs import bfs
+from benchmarks.generators import write_hub_graph
+
+
+def deque_scan_bfs(graph, start_node, size):
+    """
+    bfs before the set-backed frontier, n not in queue scans the deque
+    """
+    if size > len(graph):
+        size = len(graph) - 1
+    queue = deque([start_node])
+    visited = {start_node}
+    neighborhood = {start_node}
+    while len(neighborhood) <= size and len(queue) > 0:
+        start = queue.popleft()
+        neighborhood.add(start)
+        visited.add(start)
+        for n in graph[start].neighbors():
+            if n not in visited and n not in queue:
+                queue.append(n)
+    return neighborhood
+
+
+def timed(function, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = function()
+    return (time.perf_counter() - start) / repeats, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bfs microbenchmark on a hub-heavy graph")
+    parser.add_argument("--hubs", type=int, default=20, help="number of hub nodes")
+    parser.add_argument("--spokes", type=int, default=2000, help="spokes around each hub")
+    parser.add_argument("--repeats", type=int, default=3, help="runs per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gfa_file = os.path.join(tmp_dir, "hubs.gfa")
+        write_hub_graph(gfa_file, args.hubs, args.spokes)
+        graph = Graph(gfa_file)
+
+    print(f"{'size':>8}{'deque scan (s)':>16}{'ordered (s)':>14}{'unordered (s)':>16}")
+    for size in (100, 1000, 10000, 50000):
+        old_time, old = timed(lambda: deque_scan_bfs(graph, "h0", size), args.repeats)
+        ordered_time, ordered = timed(lambda: bfs(graph, "h0", size), args.repeats)
+        unordered_time, _ = timed(lambda: bfs(graph, "h0", size, ordered=False), args.repeats)
+        assert old == ordered
+        print(f"{size:>8}{old_time:>16.4f}{ordered_time:>14.4f}{unordered_time:>16.4f}")
+
+
+if __name__ == "__main__":
+    main()
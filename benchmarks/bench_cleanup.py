@@ -0,0 +1,48 @@
+"""
+Graph cleanup on a dict of Nodes, removing a share of the nodes and then the lonely nodes left behind,
+one node at a time and then in one batch with remove_nodes, on both backends for the batch
+
+python -m benchmarks.bench_cleanup --bubbles 1000000
+"""
+import os
+import time
+import argparse
+import tempfile
+from GFASubgraph.Graph import Graph
+from benchmarks.generators import write_bubble_chain
+
+
+def main():
+    parser = argparse.ArgumentParser(description="remove_node and remove_lonely_nodes throughput")
+    parser.add_argument("--bubbles", type=int, default=1000000, help="number of bubbles in the synthetic graph")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gfa_file = os.path.join(tmp_dir, "bubbles.gfa")
+        write_bubble_chain(gfa_file, args.bubbles)
+        graph = Graph(gfa_file)
+        batch_graphs = [("dict", Graph(gfa_file)), ("compact", Graph(gfa_file, compact=True, use_index=False))]
+    print(f"{len(graph)} nodes")
+
+    # removing every anchor leaves the two alternatives of each bubble without neighbors
+    anchors = [str(3 * b + 1) for b in range(args.bubbles)]
+    for name, batch_graph in batch_graphs:
+        start = time.perf_counter()
+        batch_graph.remove_nodes(anchors)
+        elapsed = time.perf_counter() - start
+        print(f"{'remove_nodes ' + name:<22}{len(anchors) / elapsed:>14.0f} nodes/sec")
+    start = time.perf_counter()
+    for n_id in anchors:
+        graph.remove_node(n_id)
+    elapsed = time.perf_counter() - start
+    print(f"{'remove_node':<22}{len(anchors) / elapsed:>14.0f} nodes/sec")
+
+    n_before = len(graph)
+    start = time.perf_counter()
+    graph.remove_lonely_nodes()
+    elapsed = time.perf_counter() - start
+    print(f"{'remove_lonely_nodes':<22}{(n_before - len(graph)) / elapsed:>14.0f} nodes/sec")
+
+
+if __name__ == "__main__":
+    main()
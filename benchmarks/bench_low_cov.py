@@ -0,0 +1,71 @@
+"""
+Edges per second of the low_cov_edges check, the batched engine against
+one bfs per candidate edge like the subcommand did before
+
+python -m benchmarks.bench_low_cov --bubbles 200000 --cores 4
+"""
+import os
+import time
+import argparse
+import tempfile
+from GFASubgraph.Graph import Graph
+from GFASubgraph.main_helpers import check_candidate_edges
+from GFASubgraph.low_coverage import iter_problem_edges
+from GFASubgraph.annotations import load_node_labels
+from benchmarks.generators import write_bubble_chain
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Edges per second of the low_cov_edges check")
+    parser.add_argument("--bubbles", type=int, default=200000, help="number of bubbles in the synthetic graph")
+    parser.add_argument("--size", type=int, default=50, help="neighborhood size")
+    parser.add_argument("--cutoff", type=int, default=1, help="edges with ec:i at most this are candidates")
+    parser.add_argument("--chrom_len", type=int, default=3000,
+                        help="number of consecutive nodes given the same chromosome")
+    parser.add_argument("--cores", type=int, default=min(4, os.cpu_count()), help="worker processes")
+    parser.add_argument("--legacy_max", type=int, default=20000,
+                        help="number of candidate edges to time the one bfs per edge loop on")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gfa_file = os.path.join(tmp_dir, "bubbles.gfa")
+        write_bubble_chain(gfa_file, args.bubbles, max_count=5)
+        graph = Graph(gfa_file, edge_count=True)
+        nodes_info = os.path.join(tmp_dir, "nodes_info.tsv")
+        with open(nodes_info, "w") as out:
+            for i, n_id in enumerate(graph.nodes):
+                out.write("{}\tchr{}\n".format(n_id, i // args.chrom_len))
+
+        # the legacy loop reads the chromosome of each node, the engine the interned codes
+        start = time.perf_counter()
+        with open(nodes_info) as infile:
+            for line in infile:
+                n_id, chrom = line.split()
+                graph[n_id].chromosome = chrom
+        print(f"chromosomes on the nodes loaded in {time.perf_counter() - start:.2f} s")
+        start = time.perf_counter()
+        load_node_labels(graph, nodes_info)
+        print(f"chromosome codes loaded in {time.perf_counter() - start:.2f} s")
+    edges = graph.low_coverage_edges(args.cutoff)
+    print(f"{len(graph)} nodes, {len(edges)} candidate edges")
+
+    legacy_edges = edges[:args.legacy_max]
+    annotations = dict(graph.annotations)
+    graph.annotations.clear()
+    start = time.perf_counter()
+    for e in legacy_edges:
+        check_candidate_edges(graph, e, args.size)
+    elapsed = time.perf_counter() - start
+    graph.annotations.update(annotations)
+    print(f"{'one bfs per edge':<22}{len(legacy_edges) / elapsed:>14.0f} edges/sec")
+
+    for cores in sorted({1, args.cores}):
+        start = time.perf_counter()
+        n_problems = sum(1 for _ in iter_problem_edges(graph, edges, args.size, cores=cores))
+        elapsed = time.perf_counter() - start
+        print(f"{f'engine {cores} cores':<22}{len(edges) / elapsed:>14.0f} edges/sec "
+              f"({n_problems} problem edges)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Memory benchmark of the dict of Node objects from read_gfa against
+the array-backed CompactNodes from read_gfa_compact
+
+python -m benchmarks.bench_memory --bubbles 100000
+"""
+import os
+import time
+import argparse
+import tempfile
+import tracemalloc
+from GFASubgraph.graph_io import read_gfa, read_gfa_compact
+from benchmarks.generators import write_bubble_chain
+
+
+def measure(loader, gfa_file):
+    tracemalloc.start()
+    start = time.perf_counter()
+    nodes = loader(gfa_file)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del nodes
+    return elapsed, retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory of read_gfa against read_gfa_compact")
+    parser.add_argument("--bubbles", type=int, default=100000, help="number of bubbles in the synthetic graph")
+    parser.add_argument("--seq_len", type=int, default=20, help="length of the segment sequences")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gfa_file = os.path.join(tmp_dir, "bubbles.gfa")
+        n_segments, n_links = write_bubble_chain(gfa_file, args.bubbles, args.seq_len)
+        file_size = os.path.getsize(gfa_file)
+        print(f"graph: {n_segments} segments, {n_links} links, {file_size / 2**20:.1f} MiB on disk")
+        print(f"{'loader':<18}{'time (s)':>10}{'retained (MiB)':>16}{'peak (MiB)':>12}{'x file':>8}")
+        for name, loader in (("read_gfa", read_gfa), ("read_gfa_compact", read_gfa_compact)):
+            elapsed, retained, peak = measure(loader, gfa_file)
+            print(f"{name:<18}{elapsed:>10.2f}{retained / 2**20:>16.1f}{peak / 2**20:>12.1f}"
+                  f"{retained / file_size:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Scaling of the multi-source bfs engine with the number of start nodes,
+against the old one process per start node approach for the small counts
+
+python -m benchmarks.bench_multi_bfs --bubbles 50000 --cores 4
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import multiprocessing as mp
+from GFASubgraph.Graph import Graph
+from GFASubgraph.bfs import bfs
+from GFASubgraph.multi_bfs import multi_source_bfs
+from benchmarks.generators import write_bubble_chain
+
+
+def _bfs_queue(graph, n, length, queue):
+    queue.put(bfs(graph, n, length))
+    queue.put(None)
+
+
+def process_per_node(graph, start_nodes, size, cores):
+    """
+    the bfs subcommand before the engine, one process per start node in batches of cores
+    """
+    output_nodes = set()
+    start_nodes = list(start_nodes)
+    for i in range(0, len(start_nodes), cores):
+        queue = mp.Queue()
+        processes = [mp.Process(target=_bfs_queue, args=(graph, n, size, queue))
+                     for n in start_nodes[i:i + cores]]
+        for p in processes:
+            p.start()
+        n_sentinels = 0
+        while n_sentinels != len(processes):
+            nodes = queue.get()
+            if nodes is None:
+                n_sentinels += 1
+            else:
+                output_nodes.update(nodes)
+        for p in processes:
+            p.join()
+    return output_nodes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling of multi_source_bfs with the number of start nodes")
+    parser.add_argument("--bubbles", type=int, default=50000, help="number of bubbles in the synthetic graph")
+    parser.add_argument("--size", type=int, default=50, help="neighborhood size")
+    parser.add_argument("--cores", type=int, default=min(4, os.cpu_count()), help="worker processes")
+    parser.add_argument("--max_starts", type=int, default=100000, help="largest number of start nodes")
+    parser.add_argument("--legacy_max", type=int, default=100,
+                        help="largest number of start nodes to run the process per node approach on")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gfa_file = os.path.join(tmp_dir, "bubbles.gfa")
+        write_bubble_chain(gfa_file, args.bubbles)
+        graph = Graph(gfa_file)
+    all_nodes = list(graph.nodes)
+    rng = random.Random(1)
+
+    print(f"{'starts':>8}{'engine 1 core (s)':>20}{f'engine {args.cores} cores (s)':>22}"
+          f"{'process per node (s)':>22}")
+    n_starts = 1
+    while n_starts <= args.max_starts:
+        start_nodes = [rng.choice(all_nodes) for _ in range(n_starts)]
+        timings = []
+        for cores in (1, args.cores):
+            start = time.perf_counter()
+            result = multi_source_bfs(graph, start_nodes, args.size, cores=cores)
+            timings.append(time.perf_counter() - start)
+        legacy = "-"
+        if n_starts <= args.legacy_max:
+            start = time.perf_counter()
+            assert process_per_node(graph, start_nodes, args.size, args.cores) == result
+            legacy = f"{time.perf_counter() - start:.2f}"
+        print(f"{n_starts:>8}{timings[0]:>20.2f}{timings[1]:>22.2f}{legacy:>22}")
+        n_starts *= 10
+
+
+if __name__ == "__main__":
+    main()
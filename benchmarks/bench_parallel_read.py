@@ -0,0 +1,45 @@
+"""
+Speedup of the parallel GFA loader with the number of processes
+
+python -m benchmarks.bench_parallel_read --bubbles 500000 --threads 1 2 4 8
+"""
+import os
+import time
+import argparse
+import tempfile
+from GFASubgraph.graph_io import read_gfa, read_gfa_compact
+from GFASubgraph.parallel_io import read_gfa_parallel
+from benchmarks.generators import write_bubble_chain
+
+
+def main():
+    parser = argparse.ArgumentParser(description="read_gfa_parallel speedup")
+    parser.add_argument("--bubbles", type=int, default=500000, help="number of bubbles in the synthetic graph")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8], help="process counts to time")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gfa_file = os.path.join(tmp_dir, "bubbles.gfa")
+        write_bubble_chain(gfa_file, args.bubbles)
+        print(f"graph: {os.path.getsize(gfa_file) / 2**20:.1f} MiB on disk, {os.cpu_count()} cpus")
+        print(f"{'threads':>8}{'dict (s)':>10}{'speedup':>9}{'compact (s)':>13}{'speedup':>9}")
+        base = []
+        for loader in (read_gfa, read_gfa_compact):
+            start = time.perf_counter()
+            loader(gfa_file)
+            base.append(time.perf_counter() - start)
+        print(f"{1:>8}{base[0]:>10.2f}{1:>9.2f}{base[1]:>13.2f}{1:>9.2f}")
+        for threads in args.threads:
+            if threads < 2:
+                continue
+            timings = []
+            for compact in (False, True):
+                start = time.perf_counter()
+                read_gfa_parallel(gfa_file, threads=threads, compact=compact)
+                timings.append(time.perf_counter() - start)
+            print(f"{threads:>8}{timings[0]:>10.2f}{base[0] / timings[0]:>9.2f}"
+                  f"{timings[1]:>13.2f}{base[1] / timings[1]:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Throughput and peak RSS of the GFA readers, each loader runs in its own
+process so the peak RSS of one does not hide the other
+
+python -m benchmarks.bench_read --bubbles 200000
+"""
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+from benchmarks.generators import write_bubble_chain
+
+CHILD = """
+import sys, time
+from GFASubgraph import graph_io
+start = time.perf_counter()
+nodes = getattr(graph_io, sys.argv[1])(sys.argv[2])
+print(time.perf_counter() - start, graph_io.peak_rss_mb())
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lines/sec and peak RSS of the GFA readers")
+    parser.add_argument("--bubbles", type=int, default=200000, help="number of bubbles in the synthetic graph")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gfa_file = os.path.join(tmp_dir, "bubbles.gfa")
+        n_segments, n_links = write_bubble_chain(gfa_file, args.bubbles)
+        n_lines = n_segments + n_links + 1
+        print(f"graph: {n_lines} lines, {os.path.getsize(gfa_file) / 2**20:.1f} MiB on disk")
+        print(f"{'loader':<18}{'time (s)':>10}{'lines/sec':>12}{'peak RSS (MiB)':>16}")
+        for loader in ("read_gfa", "read_gfa_compact"):
+            out = subprocess.run([sys.executable, "-c", CHILD, loader, gfa_file],
+                                 capture_output=True, text=True, check=True).stdout.split()
+            elapsed, peak = float(out[0]), float(out[1])
+            print(f"{loader:<18}{elapsed:>10.2f}{n_lines / elapsed:>12.0f}{peak:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Load test of the serve subcommand, starts a local server on a synthetic graph
+and sends bfs queries from a number of concurrent clients, reporting p50/p99 latency
+
+python -m benchmarks.bench_server --bubbles 100000 --workers 4 --concurrency 1 8 32
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from benchmarks.generators import write_bubble_chain
+
+
+async def query(host, port, socket_path, target):
+    """
+    sends one GET and reads the whole response, returns the status and number of bytes
+    """
+    if socket_path is not None:
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status = int(response.split(b" ", 2)[1]) if response else 0
+    return status, len(response)
+
+
+async def wait_ready(host, port, socket_path, timeout=600):
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            status, _ = await query(host, port, socket_path, "/stats")
+            if status == 200:
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("the server did not start")
+
+
+async def run_clients(host, port, socket_path, targets, concurrency):
+    """
+    sends all targets with concurrency requests in flight and returns the latencies in seconds
+    """
+    latencies = []
+    pending = iter(targets)
+
+    async def client():
+        for target in pending:
+            start = time.perf_counter()
+            status, _ = await query(host, port, socket_path, target)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                print(f"{target} returned {status}", file=sys.stderr)
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of the serve subcommand under concurrency")
+    parser.add_argument("--bubbles", type=int, default=100000, help="number of bubbles in the synthetic graph")
+    parser.add_argument("--size", type=int, default=50, help="neighborhood size of the queries")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per concurrency level")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count()), help="server worker processes")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32],
+                        help="numbers of concurrent clients to test")
+    parser.add_argument("--port", type=int, default=None, help="use this TCP port instead of a unix socket")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gfa_file = os.path.join(tmp_dir, "bubbles.gfa")
+        write_bubble_chain(gfa_file, args.bubbles)
+        host = "127.0.0.1"
+        socket_path = None if args.port else os.path.join(tmp_dir, "server.sock")
+        command = [sys.executable, "-m", "GFASubgraph.main", "-g", gfa_file,
+                   "--log_file", os.path.join(tmp_dir, "server.log"), "--log", "WARNING",
+                   "serve", "--workers", str(args.workers)]
+        command += ["--port", str(args.port)] if args.port else ["--socket", socket_path]
+        server = subprocess.Popen(command)
+        try:
+            asyncio.run(wait_ready(host, args.port, socket_path))
+            rng = random.Random(1)
+            n_nodes = 3 * args.bubbles
+            print(f"{'clients':>8}{'p50 (ms)':>12}{'p99 (ms)':>12}{'requests/s':>14}")
+            for concurrency in args.concurrency:
+                targets = [f"/bfs?start={rng.randint(1, n_nodes)}&size={args.size}"
+                           for _ in range(args.requests)]
+                start = time.perf_counter()
+                latencies = asyncio.run(run_clients(host, args.port, socket_path, targets, concurrency))
+                elapsed = time.perf_counter() - start
+                print(f"{concurrency:>8}{percentile(latencies, 50) * 1000:>12.1f}"
+                      f"{percentile(latencies, 99) * 1000:>12.1f}{len(latencies) / elapsed:>14.0f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
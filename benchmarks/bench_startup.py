@@ -0,0 +1,80 @@
+"""
+Cold start of the command line tool against the bare interpreter, and the import time
+of GFASubgraph.main, for workflows that call the tool many times on small graphs
+
+python -m benchmarks.bench_startup --runs 50
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+from statistics import median
+from benchmarks.generators import write_bubble_chain
+
+
+def time_command(command, runs, cwd):
+    """
+    returns the median wall time in seconds of running command runs times
+    """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return median(times)
+
+
+def import_time(module):
+    """
+    returns the cumulative import time in seconds of module from python -X importtime
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            check=True, capture_output=True, text=True)
+    for line in result.stderr.splitlines():
+        fields = [f.strip() for f in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1e6
+    return float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time of GFASubgraph")
+    parser.add_argument("--runs", type=int, default=50, help="runs of each command, the median is reported")
+    args = parser.parse_args()
+
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gfa_file = os.path.join(tmp_dir, "tiny.gfa")
+        write_bubble_chain(gfa_file, 10)
+        tool = [sys.executable, "-m", "GFASubgraph.main", "-g", gfa_file]
+        commands = [
+            ("python -c pass", [sys.executable, "-c", "pass"]),
+            ("python -c 'import logging'", [sys.executable, "-c", "import logging"]),
+            ("GFASubgraph --help", [sys.executable, "-m", "GFASubgraph.main", "--help"]),
+            ("GFASubgraph bfs", tool + ["bfs", "--start", "1", "--output_neighborhood", "out.gfa"]),
+            ("GFASubgraph output_comps", tool + ["output_comps", "--output_dir", "comps"]),
+        ]
+        # the package is imported from the checkout, the commands run in the temporary directory
+        os.environ["PYTHONPATH"] = package_dir + os.pathsep + os.environ.get("PYTHONPATH", "")
+        print(f"{'command':<30}{'median (ms)':>14}")
+        for name, command in commands:
+            print(f"{name:<30}{time_command(command, args.runs, tmp_dir) * 1000:>14.1f}")
+        print(f"{'import GFASubgraph.main':<30}{import_time('GFASubgraph.main') * 1000:>14.1f}")
+
+        # the programmatic entry point, no interpreter start at all
+        from GFASubgraph.main import run
+        out_file = os.path.join(tmp_dir, "out.gfa")
+        log_file = os.path.join(tmp_dir, "log.log")
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            if os.path.exists(out_file):
+                os.remove(out_file)
+            run(["-g", gfa_file, "--log_file", log_file, "bfs", "--start", "1", "--output_neighborhood", out_file])
+        elapsed = time.perf_counter() - start
+        print(f"{'run() bfs in process':<30}{elapsed / args.runs * 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark of write_gfa against the writer it replaced, on a subgraph of a
+synthetic bubble chain. Five million bubbles give about ten million edges
+
+python -m benchmarks.bench_write --bubbles 5000000
+"""
+import os
+import time
+import argparse
+import tempfile
+from GFASubgraph.Graph import Graph
+from GFASubgraph.graph_io import write_gfa
+from benchmarks.generators import write_bubble_chain
+
+
+def legacy_write_gfa(graph, set_of_nodes, output_file):
+    """
+    write_gfa before the buffered writer, one write per line and every link from both ends
+    """
+    nodes = graph.nodes
+    with open(output_file, "w+") as f:
+        for n1 in set_of_nodes:
+            if n1 not in nodes:
+                continue
+            f.write(str("\t".join(["S", str(n1), nodes[n1].seq])) + "\n")
+            edges = []
+            for n, overlap in nodes[n1].start.items():
+                if n[0] in set_of_nodes:
+                    edges.append(str("\t".join(("L", str(n1), "-", str(n[0]), "+" if n[1] == 0 else "-",
+                                                str(overlap) + "M\n"))))
+            for n, overlap in nodes[n1].end.items():
+                if n[0] in set_of_nodes:
+                    edges.append(str("\t".join(("L", str(n1), "+", str(n[0]), "+" if n[1] == 0 else "-",
+                                                str(overlap) + "M\n"))))
+            for e in edges:
+                f.write(e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="write_gfa against the previous writer")
+    parser.add_argument("--bubbles", type=int, default=200000, help="number of bubbles in the synthetic graph")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gfa_file = os.path.join(tmp_dir, "bubbles.gfa")
+        write_bubble_chain(gfa_file, args.bubbles)
+        graph = Graph(gfa_file)
+        # the subgraph is given as a dict view like the bfs subcommand used to
+        subgraph = graph.nodes.keys()
+        n_edges = sum(len(n.start) + len(n.end) for n in graph.nodes.values()) // 2
+        print(f"subgraph: {len(subgraph)} nodes, {n_edges} edges")
+        print(f"{'writer':<22}{'time (s)':>10}{'MiB':>10}{'MiB/sec':>10}")
+        runs = (("legacy", lambda out: legacy_write_gfa(graph, subgraph, out), "legacy.gfa"),
+                ("write_gfa", lambda out: write_gfa(graph, subgraph, out), "new.gfa"),
+                ("write_gfa gzip", lambda out: write_gfa(graph, subgraph, out), "new.gfa.gz"),
+                ("write_gfa bgzip", lambda out: write_gfa(graph, subgraph, out, compression="bgzip"), "new.bgz"))
+        for name, writer, out_name in runs:
+            out = os.path.join(tmp_dir, out_name)
+            start = time.perf_counter()
+            writer(out)
+            elapsed = time.perf_counter() - start
+            size = os.path.getsize(out) / 2**20
+            print(f"{name:<22}{elapsed:>10.2f}{size:>10.1f}{size / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Deterministic synthetic GFA generators for the benchmarks
+"""
+import random
+
+BASES = "ACGT"
+
+
+def random_seq(rng, length):
+    return "".join(rng.choice(BASES) for _ in range(length))
+
+
+def count_tag(rng, max_count):
+    """
+    returns a random ec:i tag for a link, or nothing if max_count is None
+    """
+    if max_count is None:
+        return ""
+    return "\tec:i:{}".format(rng.randint(0, max_count))
+
+
+def write_chain(path, n_nodes=1000, seq_len=20, seed=1, max_count=None):
+    """
+    writes a linear chain of nodes, each one linked to the next
+
+    :param path: output GFA path
+    :param n_nodes: number of nodes in the chain
+    :param seq_len: length of every segment sequence
+    :param seed: random seed so the same graph is produced every time
+    :param max_count: if given every link gets a random ec:i count between 0 and max_count
+    :return: the number of segments and links written
+    """
+    rng = random.Random(seed)
+    with open(path, "w") as out:
+        out.write("H\tVN:Z:1.0\n")
+        for n in range(1, n_nodes + 1):
+            out.write("S\t{}\t{}\n".format(n, random_seq(rng, seq_len)))
+            if n > 1:
+                out.write("L\t{}\t+\t{}\t+\t0M{}\n".format(n - 1, n, count_tag(rng, max_count)))
+    return n_nodes, max(0, n_nodes - 1)
+
+
+def write_bubble_chain(path, n_bubbles=1000, seq_len=20, seed=1, max_count=None):
+    """
+    writes a chain of simple bubbles, each bubble is an anchor node followed
+    by two alternative nodes that join again at the next anchor
+
+    :param path: output GFA path
+    :param n_bubbles: number of bubbles in the chain
+    :param seq_len: length of every segment sequence
+    :param seed: random seed so the same graph is produced every time
+    :param max_count: if given every link gets a random ec:i count between 0 and max_count
+    :return: the number of segments and links written
+    """
+    rng = random.Random(seed)
+    n_segments = 0
+    n_links = 0
+    with open(path, "w") as out:
+        out.write("H\tVN:Z:1.0\n")
+        for b in range(n_bubbles):
+            anchor = str(3 * b + 1)
+            for n_id in (anchor, str(3 * b + 2), str(3 * b + 3)):
+                out.write("S\t{}\t{}\n".format(n_id, random_seq(rng, seq_len)))
+                n_segments += 1
+            for alt in (str(3 * b + 2), str(3 * b + 3)):
+                out.write("L\t{}\t+\t{}\t+\t0M{}\n".format(anchor, alt, count_tag(rng, max_count)))
+                n_links += 1
+                if b + 1 < n_bubbles:
+                    out.write("L\t{}\t+\t{}\t+\t0M{}\n".format(alt, 3 * (b + 1) + 1, count_tag(rng, max_count)))
+                    n_links += 1
+    return n_segments, n_links
+
+
+def write_hub_graph(path, n_hubs=10, spokes=1000, seq_len=20, seed=1, max_count=None):
+    """
+    writes a repeat-collapsed like graph, a chain of hub nodes where every hub
+    is linked to many spoke nodes and every spoke also goes to the next hub,
+    so the hubs have a degree of about 2 * spokes
+
+    :param path: output GFA path
+    :param n_hubs: number of hub nodes
+    :param spokes: number of spoke nodes around each hub
+    :param seq_len: length of every segment sequence
+    :param seed: random seed so the same graph is produced every time
+    :param max_count: if given every link gets a random ec:i count between 0 and max_count
+    :return: the number of segments and links written
+    """
+    rng = random.Random(seed)
+    n_segments = 0
+    n_links = 0
+    with open(path, "w") as out:
+        out.write("H\tVN:Z:1.0\n")
+        for h in range(n_hubs):
+            hub = "h{}".format(h)
+            out.write("S\t{}\t{}\n".format(hub, random_seq(rng, seq_len)))
+            n_segments += 1
+            for s in range(spokes):
+                spoke = "s{}_{}".format(h, s)
+                out.write("S\t{}\t{}\n".format(spoke, random_seq(rng, seq_len)))
+                out.write("L\t{}\t+\t{}\t+\t0M{}\n".format(hub, spoke, count_tag(rng, max_count)))
+                n_segments += 1
+                n_links += 1
+                if h + 1 < n_hubs:
+                    out.write("L\t{}\t+\th{}\t+\t0M{}\n".format(spoke, h + 1, count_tag(rng, max_count)))
+                    n_links += 1
+    return n_segments, n_links
+
+
+def write_tiny_components(path, n_components=1000, max_size=3, seq_len=20, seed=1, max_count=None):
+    """
+    writes many small components, each one a chain of 1 to max_size nodes,
+    like the unplaced fragments of an assembly graph
+
+    :param path: output GFA path
+    :param n_components: number of components
+    :param max_size: largest number of nodes in a component
+    :param seq_len: length of every segment sequence
+    :param seed: random seed so the same graph is produced every time
+    :param max_count: if given every link gets a random ec:i count between 0 and max_count
+    :return: the number of segments and links written
+    """
+    rng = random.Random(seed)
+    n_segments = 0
+    n_links = 0
+    with open(path, "w") as out:
+        out.write("H\tVN:Z:1.0\n")
+        for c in range(n_components):
+            size = rng.randint(1, max_size)
+            for i in range(size):
+                out.write("S\tc{}_{}\t{}\n".format(c, i, random_seq(rng, seq_len)))
+                n_segments += 1
+                if i > 0:
+                    out.write("L\tc{}_{}\t+\tc{}_{}\t+\t0M{}\n".format(c, i - 1, c, i, count_tag(rng, max_count)))
+                    n_links += 1
+    return n_segments, n_links
+
+
+def write_walk_gaf(path, graph, n_alignments=1000, path_len=20, seed=1):
+    """
+    writes a GAF of random walks on a loaded graph, so it matches any of the graphs here,
+    each walk starts at a random node and goes to a random neighbor not on the walk yet
+    until it has path_len nodes or gets stuck
+
+    :param path: output GAF path
+    :param graph: the Graph the walks are on
+    :param n_alignments: number of GAF lines
+    :param path_len: most nodes of a walk
+    :param seed: random seed so the same file is produced every time
+    :return: the number of alignments written
+    """
+    rng = random.Random(seed)
+    node_ids = sorted(graph.nodes)
+    with open(path, "w") as out:
+        for a in range(n_alignments):
+            walk = [rng.choice(node_ids)]
+            on_walk = {walk[0]}
+            while len(walk) < path_len:
+                options = [n for n in graph[walk[-1]].neighbors() if n not in on_walk]
+                if not options:
+                    break
+                walk.append(rng.choice(options))
+                on_walk.add(walk[-1])
+            length = sum(graph[n].seq_len for n in walk)
+            out.write("read{}\t{}\t0\t{}\t+\t{}\t{}\t0\t{}\t{}\t{}\t60\tid:f:0.99\n".format(
+                a, length, length, "".join(">" + n for n in walk), length, length, length, length))
+    return n_alignments
+
+
+def write_nodes_info(path, node_ids, chrom_len=3000):
+    """
+    writes the nodes info TSV of low_cov_edges, giving every chrom_len consecutive nodes the same chromosome
+
+    :param path: output TSV path
+    :param node_ids: the node ids in order
+    :param chrom_len: number of consecutive nodes on each chromosome
+    """
+    with open(path, "w") as out:
+        for i, n_id in enumerate(node_ids):
+            out.write("{}\tchr{}\n".format(n_id, i // chrom_len))
+
+
+def write_bubble_gaf(path, n_alignments=1000, n_bubbles=1000, path_bubbles=10, seed=1):
+    """
+    writes a GAF of alignments walking along a graph from write_bubble_chain,
+    each path starts at a random anchor and takes one of the two alternatives in every bubble,
+    so the paths overlap a lot like long reads from the same region do
+
+    :param path: output GAF path
+    :param n_alignments: number of GAF lines
+    :param n_bubbles: number of bubbles of the graph the paths are on
+    :param path_bubbles: number of bubbles each path goes through
+    :param seed: random seed so the same file is produced every time
+    :return: the number of alignments written
+    """
+    rng = random.Random(seed)
+    with open(path, "w") as out:
+        for a in range(n_alignments):
+            first = rng.randrange(max(1, n_bubbles - path_bubbles))
+            steps = []
+            for b in range(first, min(n_bubbles, first + path_bubbles)):
+                steps.append(">{}>{}".format(3 * b + 1, 3 * b + rng.choice((2, 3))))
+            length = 40 * len(steps)
+            out.write("read{}\t{}\t0\t{}\t+\t{}\t{}\t0\t{}\t{}\t{}\t60\tid:f:0.99\n".format(
+                a, length, length, "".join(steps), length, length, length, length))
+    return n_alignments
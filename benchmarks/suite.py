@@ -0,0 +1,210 @@
+"""
+The benchmark suite, times read_gfa, bfs, all_components, write_gfa, read_gaf, extract_alignments
+and check_candidate_edges on every kind of synthetic graph at the given scales, with the memory
+each one allocates at its peak, and compares the results to a stored baseline
+
+python -m benchmarks.suite --scales small medium
+python -m benchmarks.suite --scales small --save_baseline
+
+Everything is generated from fixed seeds in a temporary directory, so the suite runs offline
+and two runs measure the same inputs. Returns 1 if something is slower or takes more memory
+than the baseline by more than the tolerance, so it can fail a CI job
+"""
+import os
+import sys
+import time
+import json
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from GFASubgraph.Graph import Graph
+from GFASubgraph.graph_io import read_gfa, write_gfa
+from GFASubgraph.profiling import peak_rss_mb
+from GFASubgraph.connected_components import all_components
+from GFASubgraph.annotations import load_node_labels
+from GFASubgraph.main_helpers import read_gaf, extract_alignments, check_candidate_edges
+from benchmarks.generators import write_chain, write_bubble_chain, write_hub_graph, write_tiny_components, \
+    write_walk_gaf, write_nodes_info
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# about this many nodes in each graph
+SCALES = {"small": 30000, "medium": 300000, "large": 3000000}
+
+# every link gets an ec:i count up to 5, so the graphs are also the edge count fixtures
+KINDS = {
+    "chain": lambda path, n: write_chain(path, n, max_count=5),
+    "bubbles": lambda path, n: write_bubble_chain(path, max(1, n // 3), max_count=5),
+    "hubs": lambda path, n: write_hub_graph(path, max(1, n // 1001), spokes=1000, max_count=5),
+    "tiny": lambda path, n: write_tiny_components(path, max(1, n // 2), max_count=5),
+}
+
+CASES = ["read_gfa", "bfs", "all_components", "write_gfa", "read_gaf", "extract_alignments",
+         "check_candidate_edges"]
+
+
+class Inputs:
+    """
+    the files and the loaded graph of one kind and scale, made once for all cases
+    """
+
+    def __init__(self, tmp_dir, kind, n_nodes, n_queries):
+        self.tmp_dir = tmp_dir
+        self.gfa_file = os.path.join(tmp_dir, f"{kind}.gfa")
+        self.n_segments, self.n_links = KINDS[kind](self.gfa_file, n_nodes)
+        self.graph = Graph(self.gfa_file, edge_count=True, use_index=False)
+        rng = random.Random(1)
+        node_ids = sorted(self.graph.nodes)
+        self.starts = [rng.choice(node_ids) for _ in range(n_queries)]
+
+        self.gaf_file = os.path.join(tmp_dir, f"{kind}.gaf")
+        write_walk_gaf(self.gaf_file, self.graph, n_alignments=n_queries)
+        nodes_info = os.path.join(tmp_dir, f"{kind}_nodes_info.tsv")
+        write_nodes_info(nodes_info, node_ids)
+        load_node_labels(self.graph, nodes_info)
+        self.edges = self.graph.low_coverage_edges(1)[:n_queries]
+        self.path_nodes = set()
+        for path, _, _ in read_gaf(self.gaf_file, os.path.join(tmp_dir, "log.log")).values():
+            self.path_nodes.update(path)
+
+
+def run_case(case, inputs):
+    graph = inputs.graph
+    if case == "read_gfa":
+        return read_gfa(inputs.gfa_file)
+    if case == "bfs":
+        return [graph.bfs(n, 100) for n in inputs.starts]
+    if case == "all_components":
+        return all_components(graph)
+    if case == "write_gfa":
+        return write_gfa(graph, output_file=os.path.join(inputs.tmp_dir, "out.gfa"))
+    if case == "read_gaf":
+        return read_gaf(inputs.gaf_file, os.path.join(inputs.tmp_dir, "log.log"))
+    if case == "extract_alignments":
+        final_nodes = set()
+        extract_alignments(inputs.path_nodes, graph, 10, final_nodes)
+        return final_nodes
+    if case == "check_candidate_edges":
+        return [check_candidate_edges(graph, e, 50) for e in inputs.edges]
+    raise ValueError(f"unknown case {case}")
+
+
+def measure(case, inputs, repeats, memory):
+    """
+    returns the best time of repeats runs of the case and, with memory,
+    the peak MiB allocated by one more run under tracemalloc
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run_case(case, inputs)
+        best = min(best, time.perf_counter() - start)
+    entry = {"seconds": best}
+    if memory:
+        tracemalloc.start()
+        run_case(case, inputs)
+        entry["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return entry
+
+
+# results below these in the baseline are mostly noise and are not compared
+MIN_COMPARED = {"seconds": 0.1, "peak_mb": 1}
+
+
+def compare(results, baseline, tolerance):
+    """
+    returns the keys of results that are slower, or allocate more, than the baseline by more than tolerance
+    """
+    regressions = []
+    for key, entry in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for measure_name, floor in MIN_COMPARED.items():
+            if measure_name in entry and base.get(measure_name, 0) >= floor:
+                if entry[measure_name] > base[measure_name] * (1 + tolerance):
+                    regressions.append((key, measure_name, entry[measure_name] / base[measure_name]))
+    return regressions
+
+
+def machine():
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor(), "cpus": os.cpu_count()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite on synthetic graphs with baseline comparison")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["small"],
+                        help="graph scales to run, default: small")
+    parser.add_argument("--kinds", nargs="+", choices=list(KINDS), default=list(KINDS),
+                        help="kinds of graphs to run, default: all")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES, help="what to time, default: all")
+    parser.add_argument("--queries", type=int, default=1000,
+                        help="number of bfs start nodes, GAF alignments and candidate edges, default: 1000")
+    parser.add_argument("--repeats", type=int, default=5, help="runs of each case, the best is kept, default: 5")
+    parser.add_argument("--no_memory", action="store_true", default=False,
+                        help="do not run each case again under tracemalloc for its peak memory")
+    parser.add_argument("--baseline", default=BASELINE, help=f"baseline JSON, default: {BASELINE}")
+    parser.add_argument("--save_baseline", action="store_true", default=False,
+                        help="write the results to the baseline instead of comparing, "
+                             "the entries of the scales and kinds not run are kept")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="fraction a result can be above the baseline before it is a regression, default: 0.5")
+    parser.add_argument("--output", default=None, help="also write the results to this JSON")
+    args = parser.parse_args()
+
+    baseline = dict()
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as infile:
+            baseline = json.load(infile)
+        if not args.save_baseline and baseline.get("machine") != machine():
+            print(f"the baseline was recorded on another machine, {baseline.get('machine')}", file=sys.stderr)
+        if baseline.get("queries", args.queries) != args.queries:
+            if args.save_baseline:
+                parser.error(f"the baseline was recorded with --queries {baseline['queries']}, "
+                             f"save it with the same or to another --baseline")
+            print(f"the baseline was recorded with --queries {baseline['queries']}, "
+                  f"the query cases are not comparable", file=sys.stderr)
+    base_results = baseline.get("results", dict())
+
+    results = dict()
+    print(f"{'scale':<8}{'kind':<9}{'case':<23}{'seconds':>10}{'peak MiB':>10}{'vs baseline':>13}")
+    for scale in args.scales:
+        for kind in args.kinds:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                inputs = Inputs(tmp_dir, kind, SCALES[scale], args.queries)
+                for case in args.cases:
+                    key = f"{scale}/{kind}/{case}"
+                    entry = measure(case, inputs, args.repeats, not args.no_memory)
+                    results[key] = entry
+                    base = base_results.get(key, dict()).get("seconds")
+                    ratio = f"{entry['seconds'] / base:.2f}x" if base else "-"
+                    peak = f"{entry['peak_mb']:.1f}" if "peak_mb" in entry else "-"
+                    print(f"{scale:<8}{kind:<9}{case:<23}{entry['seconds']:>10.4f}{peak:>10}{ratio:>13}")
+                del inputs
+    print(f"peak RSS of the suite: {peak_rss_mb():.0f} MiB")
+
+    if args.output is not None:
+        with open(args.output, "w") as outfile:
+            json.dump({"machine": machine(), "queries": args.queries, "results": results}, outfile, indent=2)
+
+    if args.save_baseline:
+        base_results.update(results)
+        with open(args.baseline, "w") as outfile:
+            json.dump({"machine": machine(), "queries": args.queries, "results": base_results},
+                      outfile, indent=2, sort_keys=True)
+            outfile.write("\n")
+        print(f"saved the baseline to {args.baseline}")
+        return 0
+
+    regressions = compare(results, base_results, args.tolerance)
+    for key, measure_name, ratio in regressions:
+        print(f"REGRESSION {key} {measure_name}: {ratio:.2f}x the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
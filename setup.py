@@ -18,7 +18,7 @@ setup(name='GFASubgraph',
       author='Fawaz Dabbaghie',
       author_email='fawaz@hhu.de',
       url='https://fawaz-dabbaghieh.github.io/',
-      packages=find_packages(),
+      packages=find_packages(exclude=["benchmarks", "benchmarks.*", "tests", "tests.*"]),
       # scripts=['bin/main.py'],
       license="LICENSE.TXT",
       long_description=open("README.md").read(),
@@ -0,0 +1,54 @@
+import pytest
+from GFASubgraph.Graph import Graph
+
+# the first copy of the 1+ 50- link comes before S 1 and waits for its segment,
+# a later reversed copy and repeated links elsewhere change the overlap, the last L line wins
+GFA = """H\tVN:Z:1.0
+S\t50\tACGTACGT
+L\t1\t+\t50\t-\t3M
+S\t1\tACGTACGT
+S\t2\tACGTACGT
+L\t1\t-\t2\t+\t1M
+L\t50\t+\t1\t-\t*
+L\t2\t-\t1\t+\t2M
+L\t2\t+\t3\t+\t4M
+S\t3\tACGTACGT
+L\t2\t+\t3\t+\t5M
+"""
+
+LOADERS = {"dict": dict(), "compact": dict(compact=True),
+           "dict_parallel": dict(threads=2), "compact_parallel": dict(compact=True, threads=2)}
+
+
+def overlaps(graph):
+    """
+    the overlap of every link of the graph by the link's (node, side) ends
+    """
+    links = dict()
+    for n_id in graph.nodes:
+        node = graph.nodes[n_id]
+        for side, edges in ((0, node.start), (1, node.end)):
+            for (neighbor, neighbor_side), overlap in edges.items():
+                links[(n_id, side, neighbor, neighbor_side)] = overlap
+    return links
+
+
+@pytest.fixture
+def gfa_file(tmp_path):
+    path = tmp_path / "repeated_links.gfa"
+    path.write_text(GFA)
+    return str(path)
+
+
+@pytest.mark.parametrize("loader", list(LOADERS))
+def test_last_copy_of_a_repeated_link_wins(gfa_file, loader):
+    graph = Graph(gfa_file, use_index=False, **LOADERS[loader])
+    assert overlaps(graph) == {("1", 1, "50", 1): 0, ("50", 1, "1", 1): 0,
+                               ("1", 0, "2", 0): 2, ("2", 0, "1", 0): 2,
+                               ("2", 1, "3", 0): 5, ("3", 0, "2", 1): 5}
+
+
+def test_backends_agree(gfa_file):
+    expected = overlaps(Graph(gfa_file, use_index=False))
+    for loader in LOADERS:
+        assert overlaps(Graph(gfa_file, use_index=False, **LOADERS[loader])) == expected
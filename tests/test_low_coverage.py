@@ -0,0 +1,45 @@
+import pytest
+from GFASubgraph.Graph import Graph
+from GFASubgraph.annotations import load_node_labels
+from GFASubgraph.multi_bfs import multi_source_distance
+from GFASubgraph.low_coverage import group_candidates, chromosome_groups, _check_groups_bounded, UNION_GROUP
+
+# a chain of 10 bp nodes with a new chromosome every CHROM_LEN nodes, long enough that the
+# candidates are searched in several runs and the mixed runs are split down to single nodes
+N_NODES = 4 * UNION_GROUP + 5
+CHROM_LEN = 9
+
+
+@pytest.fixture
+def chain_files(tmp_path):
+    gfa = tmp_path / "chain.gfa"
+    tsv = tmp_path / "nodes.tsv"
+    with open(gfa, "w") as outfile, open(tsv, "w") as labels:
+        outfile.write("H\tVN:Z:1.0\n")
+        for i in range(N_NODES):
+            outfile.write(f"S\t{i}\t{'A' * 10}\n")
+            labels.write(f"{i}\tchr{i // CHROM_LEN}\n")
+        for i in range(N_NODES - 1):
+            outfile.write(f"L\t{i}\t+\t{i + 1}\t+\t0M\n")
+    return str(gfa), str(tsv)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("bounds", [(25, None), (None, 2), (45, 3)])
+def test_shared_searches_find_the_same_problems_as_one_search_per_start(chain_files, compact, bounds):
+    gfa, tsv = chain_files
+    graph = Graph(gfa, compact=compact, use_index=False)
+    load_node_labels(graph, tsv)
+    edges = [(str(i), 1, str(i + 1), 0, 0) for i in range(N_NODES - 1)]
+    groups = group_candidates(graph, edges)
+    expected = []
+    for start_node, group_edges in groups:
+        chrom_set = chromosome_groups(graph, multi_source_distance(graph, [start_node], *bounds))
+        if chrom_set:
+            expected.extend((e, chrom_set) for e in group_edges)
+    problems = _check_groups_bounded(graph, groups, bounds)
+    assert expected
+    assert len(expected) < len(edges)
+    assert [e for e, _ in problems] == [e for e, _ in expected]
+    for (_, found), (_, wanted) in zip(problems, expected):
+        assert {k: sorted(v) for k, v in found.items()} == {k: sorted(v) for k, v in wanted.items()}
@@ -0,0 +1,39 @@
+import pytest
+from GFASubgraph.Graph import Graph
+from GFASubgraph.multi_bfs import multi_source_distance
+
+# s-a1-a2-a3-a4-X is the shortest in bp to X but takes 5 edges, s-b1-X takes the fewest edges
+# but is long, only s-c1-c2-X-Y reaches Y within 60 bp and 5 edges (35 bp, 4 edges)
+SEGMENTS = {"s": 1, "a1": 1, "a2": 1, "a3": 1, "a4": 1, "X": 50, "b1": 10, "c1": 10, "c2": 10, "Y": 10}
+LINKS = [("s", "a1", 0), ("a1", "a2", 0), ("a2", "a3", 0), ("a3", "a4", 0), ("a4", "X", 49),
+         ("s", "b1", 0), ("b1", "X", 0),
+         ("s", "c1", 0), ("c1", "c2", 0), ("c2", "X", 45),
+         ("X", "Y", 0)]
+
+
+@pytest.fixture
+def gfa_file(tmp_path):
+    path = tmp_path / "pareto.gfa"
+    with open(path, "w") as outfile:
+        outfile.write("H\tVN:Z:1.0\n")
+        for name, length in SEGMENTS.items():
+            outfile.write(f"S\t{name}\t{'A' * length}\n")
+        for n1, n2, overlap in LINKS:
+            outfile.write(f"L\t{n1}\t+\t{n2}\t+\t{overlap}M\n")
+    return str(path)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_both_bounds_keep_a_node_reached_by_one_path_within_both(gfa_file, compact):
+    graph = Graph(gfa_file, compact=compact, use_index=False)
+    dist = multi_source_distance(graph, ["s"], max_bp=60, max_hops=5)
+    assert dist["Y"] == 35
+    assert dist["X"] == 5
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_single_bounds(gfa_file, compact):
+    graph = Graph(gfa_file, compact=compact, use_index=False)
+    assert multi_source_distance(graph, ["s"], max_bp=15) == \
+        {"s": 0, "a1": 1, "a2": 2, "a3": 3, "a4": 4, "X": 5, "b1": 10, "c1": 10, "c2": 5, "Y": 15}
+    assert set(multi_source_distance(graph, ["s"], max_hops=2)) == {"s", "a1", "a2", "b1", "X", "c1", "c2"}